@@ -7,11 +7,13 @@
 
 import sqlite3
 import json
+from contextlib import closing, contextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterator, Optional, Sequence, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import logging
+from search_index import EXTENDED_ACCOUNT_SEARCH, fts5_available
 
 class AccountStatus(Enum):
     """Статусы аккаунтов"""
@@ -48,6 +50,126 @@ class AccountInfo:
     notes: str
     tags: List[str]
 
+# Колонки, из которых собирается AccountInfo (в порядке полей)
+ACCOUNT_INFO_COLUMNS = (
+    'id', 'login', 'password', 'email', 'email_password', 'games', 'status', 'category',
+    'price_per_hour', 'total_earnings', 'total_rental_time', 'rental_count', 'created_date',
+    'last_rental_date', 'notes', 'tags'
+)
+# Сортировка и фильтры get_accounts - только по этим колонкам
+SORTABLE_COLUMNS = frozenset({
+    'id', 'login', 'price_per_hour', 'total_earnings', 'total_rental_time', 'rental_count',
+    'created_date', 'last_rental_date', 'level'
+})
+FILTERABLE_COLUMNS = frozenset({
+    'id', 'login', 'email', 'status', 'category', 'steam_guard_enabled', 'country', 'language', 'level'
+})
+JSON_LIST_COLUMNS = frozenset({'games', 'tags'})
+
+def normalize_game(name: str) -> str:
+    """Ключ игры для точного поиска: без лишних пробелов и без учета регистра"""
+    return ' '.join(str(name).split()).casefold()
+
+_UNSET = object()
+
+class AccountRecord:
+    """Компактная запись аккаунта (те же поля, что у AccountInfo)
+
+    Хранит строку БД как есть; JSON-списки и даты разбираются при первом
+    обращении к полю и кешируются, остальные поля читаются из строки напрямую.
+    """
+    __slots__ = ('_row', '_games', '_tags', '_created_date', '_last_rental_date')
+
+    def __init__(self, row: Tuple):
+        self._row = row
+        self._games = self._tags = self._created_date = self._last_rental_date = _UNSET
+
+    @staticmethod
+    def _json_list(value) -> List[str]:
+        try:
+            return json.loads(value) if value else []
+        except (TypeError, ValueError):
+            return []
+
+    @staticmethod
+    def _datetime(value) -> Optional[datetime]:
+        try:
+            return datetime.fromisoformat(value) if value else None
+        except (TypeError, ValueError):
+            return None
+
+    id = property(lambda self: self._row[0])
+    login = property(lambda self: self._row[1])
+    password = property(lambda self: self._row[2])
+    email = property(lambda self: self._row[3] or '')
+    email_password = property(lambda self: self._row[4] or '')
+    price_per_hour = property(lambda self: self._row[8] or 0.0)
+    total_earnings = property(lambda self: self._row[9] or 0.0)
+    total_rental_time = property(lambda self: self._row[10] or 0)
+    rental_count = property(lambda self: self._row[11] or 0)
+    notes = property(lambda self: self._row[14] or '')
+
+    @property
+    def status(self) -> AccountStatus:
+        return AccountStatus(self._row[6])
+
+    @property
+    def category(self) -> AccountCategory:
+        return AccountCategory(self._row[7])
+
+    @property
+    def games(self) -> List[str]:
+        if self._games is _UNSET:
+            self._games = self._json_list(self._row[5])
+        return self._games
+
+    @property
+    def tags(self) -> List[str]:
+        if self._tags is _UNSET:
+            self._tags = self._json_list(self._row[15])
+        return self._tags
+
+    @property
+    def created_date(self) -> Optional[datetime]:
+        if self._created_date is _UNSET:
+            self._created_date = self._datetime(self._row[12])
+        return self._created_date
+
+    @property
+    def last_rental_date(self) -> Optional[datetime]:
+        if self._last_rental_date is _UNSET:
+            self._last_rental_date = self._datetime(self._row[13])
+        return self._last_rental_date
+
+    # Колонки с небольшим числом разных значений (games, status, category, tags):
+    # в потоке записей одинаковые строки хранятся в одном экземпляре
+    _SHARED_POSITIONS = (5, 6, 7, 15)
+
+    @classmethod
+    def factory(cls, max_shared: int = 10_000):
+        """Конструктор записей для одной выборки с общими экземплярами повторяющихся строк"""
+        shared: Dict[str, str] = {}
+
+        def make(row: Tuple) -> 'AccountRecord':
+            values = list(row)
+            for position in cls._SHARED_POSITIONS:
+                value = values[position]
+                cached = shared.get(value)
+                if cached is not None:
+                    values[position] = cached
+                elif len(shared) < max_shared:
+                    shared[value] = value
+            return cls(tuple(values))
+
+        return make
+
+    def to_info(self) -> AccountInfo:
+        """Полностью декодированный AccountInfo"""
+        return AccountInfo(**{name: getattr(self, name) for name in ACCOUNT_INFO_COLUMNS})
+
+    def __repr__(self) -> str:
+        return f"AccountRecord(id={self.id}, login={self.login!r})"
+
 class AccountManager:
     """Менеджер аккаунтов Steam"""
     
@@ -130,6 +252,30 @@ class AccountManager:
                 )
             """)
             
+            # Нормализованный индекс игр (источник правды для поиска по игре - эта таблица,
+            # JSON в steam_accounts_extended.games хранится для совместимости)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS account_games (
+                    game_key TEXT NOT NULL,
+                    account_id INTEGER NOT NULL,
+                    game TEXT NOT NULL,
+                    PRIMARY KEY (game_key, account_id),
+                    FOREIGN KEY (account_id) REFERENCES steam_accounts_extended (id)
+                ) WITHOUT ROWID
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_account_games_account ON account_games (account_id)")
+            
+            # Индексы под фильтры и сортировки get_accounts
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_accounts_ext_status_price "
+                           "ON steam_accounts_extended (status, price_per_hour)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_accounts_ext_category ON steam_accounts_extended (category)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_accounts_ext_earnings ON steam_accounts_extended (total_earnings)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_accounts_ext_created ON steam_accounts_extended (created_date)")
+            self._backfill_account_games(cursor)
+            
+            # Полнотекстовый индекс (логин, почта, заметки, игры, теги)
+            EXTENDED_ACCOUNT_SEARCH.create(cursor)
+            
             # Таблица тегов
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS account_tags (
@@ -155,12 +301,24 @@ class AccountManager:
             
             conn.commit()
     
+    @contextmanager
+    def _unit_of_work(self) -> Iterator[sqlite3.Cursor]:
+        """Транзакция изменения аккаунта: теги, индекс игр и история на одном соединении, один commit"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn.cursor()
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
     def add_account(self, account_data: Dict) -> int:
         """Добавление нового аккаунта"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
+            with self._unit_of_work() as cursor:
                 # Подготовка данных
                 games_json = json.dumps(account_data.get('games', []), ensure_ascii=False)
                 tags_json = json.dumps(account_data.get('tags', []), ensure_ascii=False)
@@ -203,14 +361,16 @@ class AccountManager:
                 
                 account_id = cursor.lastrowid
                 
+                # Индекс игр
+                self._sync_account_games(cursor, account_id, account_data.get('games', []))
+                
                 # Добавляем теги
                 if account_data.get('tags'):
-                    self._add_account_tags(account_id, account_data['tags'])
+                    self._add_account_tags(cursor, account_id, account_data['tags'])
                 
                 # Записываем в историю
-                self._log_account_action(account_id, 'account_created', None, json.dumps(account_data))
+                self._log_account_action(cursor, account_id, 'account_created', None, json.dumps(account_data))
                 
-                conn.commit()
                 self.logger.info(f"Добавлен аккаунт {account_data['login']} с ID {account_id}")
                 return account_id
                 
@@ -218,73 +378,99 @@ class AccountManager:
             self.logger.error(f"Ошибка добавления аккаунта: {e}")
             raise
     
-    def get_accounts(self, filters: Optional[Dict] = None, sort_by: str = "created_date", 
-                    sort_order: str = "DESC", limit: Optional[int] = None) -> List[AccountInfo]:
-        """Получение списка аккаунтов с фильтрацией и сортировкой"""
+    def get_accounts(self, filters: Optional[Dict] = None, sort_by: str = "created_date",
+                    sort_order: str = "DESC", limit: Optional[int] = None,
+                    fields: Optional[Sequence[str]] = None, lazy: bool = False) -> List:
+        """Получение списка аккаунтов с фильтрацией и сортировкой
+
+        Без fields возвращаются AccountInfo (или AccountRecord при lazy=True),
+        с fields - словари только с этими полями (JSON-поля games/tags декодируются,
+        только если запрошены).
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Базовый запрос
-                query = "SELECT * FROM steam_accounts_extended"
-                params = []
-                
-                # Применяем фильтры
-                if filters:
-                    conditions = []
-                    for key, value in filters.items():
-                        if key == 'games':
-                            conditions.append("games LIKE ?")
-                            params.append(f'%{value}%')
-                        elif key == 'tags':
-                            conditions.append("tags LIKE ?")
-                            params.append(f'%{value}%')
-                        elif key == 'price_range':
-                            conditions.append("price_per_hour BETWEEN ? AND ?")
-                            params.extend(value)
-                        elif key == 'earnings_range':
-                            conditions.append("total_earnings BETWEEN ? AND ?")
-                            params.extend(value)
-                        elif key == 'status':
-                            conditions.append("status = ?")
-                            params.append(value)
-                        elif key == 'category':
-                            conditions.append("category = ?")
-                            params.append(value)
-                        else:
-                            conditions.append(f"{key} = ?")
-                            params.append(value)
-                    
-                    if conditions:
-                        query += " WHERE " + " AND ".join(conditions)
-                
-                # Сортировка
-                query += f" ORDER BY {sort_by} {sort_order}"
-                
-                # Лимит
-                if limit:
-                    query += f" LIMIT {limit}"
-                
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
-                
-                accounts = []
-                for row in cursor.fetchall():
-                    account = self._row_to_account_info(row)
-                    accounts.append(account)
-                
-                return accounts
-                
+            return list(self.iter_accounts(filters, sort_by, sort_order, limit, fields, lazy=lazy))
+        except ValueError:
+            raise
         except Exception as e:
             self.logger.error(f"Ошибка получения аккаунтов: {e}")
             return []
+
+    def iter_accounts(self, filters: Optional[Dict] = None, sort_by: str = "created_date",
+                      sort_order: str = "DESC", limit: Optional[int] = None,
+                      fields: Optional[Sequence[str]] = None, batch_size: int = 500,
+                      lazy: bool = False) -> Iterator:
+        """Потоковый обход аккаунтов порциями batch_size (без загрузки всей выборки в память)"""
+        query, params, columns = self._build_accounts_query(filters, sort_by, sort_order, limit, fields)
+        if fields is not None:
+            convert = lambda row: self._project_row(columns, row)
+        else:
+            convert = AccountRecord.factory() if lazy else self._row_to_account_info
+
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield convert(row)
+
+    def _build_accounts_query(self, filters: Optional[Dict], sort_by: str, sort_order: str,
+                              limit: Optional[int], fields: Optional[Sequence[str]]) -> Tuple[str, List, Tuple[str, ...]]:
+        """Сборка запроса get_accounts: только разрешенные колонки, значения - параметрами"""
+        columns = tuple(fields) if fields is not None else ACCOUNT_INFO_COLUMNS
+        unknown = [column for column in columns if column not in ACCOUNT_INFO_COLUMNS]
+        if unknown or not columns:
+            raise ValueError(f"Недопустимые поля: {', '.join(unknown) or 'пустой список'}")
+        if sort_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"Сортировка возможна по: {', '.join(sorted(SORTABLE_COLUMNS))}")
+        if sort_order.upper() not in ('ASC', 'DESC'):
+            raise ValueError("Порядок сортировки: ASC или DESC")
+
+        conditions = []
+        params: List = []
+        for key, value in (filters or {}).items():
+            if isinstance(value, Enum):
+                value = value.value
+            if key == 'games':
+                conditions.append("id IN (SELECT account_id FROM account_games WHERE game_key = ?)")
+                params.append(normalize_game(value))
+            elif key == 'tags':
+                conditions.append("EXISTS (SELECT 1 FROM json_each(tags) WHERE json_each.value = ?)")
+                params.append(value)
+            elif key == 'price_range':
+                conditions.append("price_per_hour BETWEEN ? AND ?")
+                params.extend(value)
+            elif key == 'earnings_range':
+                conditions.append("total_earnings BETWEEN ? AND ?")
+                params.extend(value)
+            elif key in FILTERABLE_COLUMNS:
+                conditions.append(f"{key} = ?")
+                params.append(value)
+            else:
+                raise ValueError(f"Недопустимый фильтр: {key}")
+
+        query = f"SELECT {', '.join(columns)} FROM steam_accounts_extended"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {sort_by} {sort_order.upper()}, id {sort_order.upper()}"
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        return query, params, columns
+
+    @staticmethod
+    def _project_row(columns: Tuple[str, ...], row: Tuple) -> Dict:
+        """Строка выборки с проекцией в словарь (JSON-поля декодируются)"""
+        record = dict(zip(columns, row))
+        for key in JSON_LIST_COLUMNS.intersection(record):
+            record[key] = json.loads(record[key]) if record[key] else []
+        return record
     
     def update_account(self, account_id: int, updates: Dict) -> bool:
         """Обновление информации об аккаунте"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
+            with self._unit_of_work() as cursor:
                 # Получаем старые данные для истории
                 cursor.execute("SELECT * FROM steam_accounts_extended WHERE id = ?", (account_id,))
                 old_data = cursor.fetchone()
@@ -310,15 +496,18 @@ class AccountManager:
                 query = f"UPDATE steam_accounts_extended SET {', '.join(set_clause)} WHERE id = ?"
                 cursor.execute(query, params)
                 
+                # Обновляем индекс игр
+                if 'games' in updates:
+                    self._sync_account_games(cursor, account_id, updates['games'])
+                
                 # Обновляем теги если нужно
                 if 'tags' in updates:
-                    self._update_account_tags(account_id, updates['tags'])
+                    self._update_account_tags(cursor, account_id, updates['tags'])
                 
                 # Записываем в историю
-                self._log_account_action(account_id, 'account_updated', 
-                                       json.dumps(old_data), json.dumps(updates))
+                self._log_account_action(cursor, account_id, 'account_updated',
+                                         json.dumps(old_data), json.dumps(updates))
                 
-                conn.commit()
                 self.logger.info(f"Обновлен аккаунт {account_id}")
                 return True
                 
@@ -329,9 +518,7 @@ class AccountManager:
     def delete_account(self, account_id: int) -> bool:
         """Удаление аккаунта"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
+            with self._unit_of_work() as cursor:
                 # Получаем данные для истории
                 cursor.execute("SELECT * FROM steam_accounts_extended WHERE id = ?", (account_id,))
                 old_data = cursor.fetchone()
@@ -345,6 +532,9 @@ class AccountManager:
                 # Удаляем статистику
                 cursor.execute("DELETE FROM account_statistics WHERE account_id = ?", (account_id,))
                 
+                # Удаляем игры из индекса
+                cursor.execute("DELETE FROM account_games WHERE account_id = ?", (account_id,))
+                
                 # Удаляем историю
                 cursor.execute("DELETE FROM account_history WHERE account_id = ?", (account_id,))
                 
@@ -352,9 +542,8 @@ class AccountManager:
                 cursor.execute("DELETE FROM steam_accounts_extended WHERE id = ?", (account_id,))
                 
                 # Записываем в историю
-                self._log_account_action(account_id, 'account_deleted', json.dumps(old_data), None)
+                self._log_account_action(cursor, account_id, 'account_deleted', json.dumps(old_data), None)
                 
-                conn.commit()
                 self.logger.info(f"Удален аккаунт {account_id}")
                 return True
                 
@@ -368,37 +557,30 @@ class AccountManager:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
-                if account_id:
-                    # Статистика конкретного аккаунта
-                    cursor.execute("""
-                        SELECT 
-                            COUNT(*) as total_accounts,
-                            SUM(total_earnings) as total_earnings,
-                            SUM(total_rental_time) as total_rental_time,
-                            SUM(rental_count) as total_rentals,
-                            AVG(price_per_hour) as avg_price,
-                            COUNT(CASE WHEN status = 'available' THEN 1 END) as available_count,
-                            COUNT(CASE WHEN status = 'rented' THEN 1 END) as rented_count,
-                            COUNT(CASE WHEN status = 'maintenance' THEN 1 END) as maintenance_count
-                        FROM steam_accounts_extended 
-                        WHERE id = ?
-                    """, (account_id,))
-                else:
-                    # Общая статистика
-                    cursor.execute("""
-                        SELECT 
-                            COUNT(*) as total_accounts,
-                            SUM(total_earnings) as total_earnings,
-                            SUM(total_rental_time) as total_rental_time,
-                            SUM(rental_count) as total_rentals,
-                            AVG(price_per_hour) as avg_price,
-                            COUNT(CASE WHEN status = 'available' THEN 1 END) as available_count,
-                            COUNT(CASE WHEN status = 'rented' THEN 1 END) as rented_count,
-                            COUNT(CASE WHEN status = 'maintenance' THEN 1 END) as maintenance_count
-                        FROM steam_accounts_extended
-                    """)
-                
-                row = cursor.fetchone()
+                account_filter = "WHERE id = ?" if account_id else ""
+                params = (account_id,) if account_id else ()
+                
+                # Состав и статусы аккаунтов
+                cursor.execute(f"""
+                    SELECT 
+                        COUNT(*) as total_accounts,
+                        AVG(price_per_hour) as avg_price,
+                        COUNT(CASE WHEN status = 'available' THEN 1 END) as available_count,
+                        COUNT(CASE WHEN status = 'rented' THEN 1 END) as rented_count,
+                        COUNT(CASE WHEN status = 'maintenance' THEN 1 END) as maintenance_count
+                    FROM steam_accounts_extended
+                    {account_filter}
+                """, params)
+                accounts_row = cursor.fetchone()
+                
+                # Доход и аренды - из дневных сводок (statistics_rollup.py)
+                cursor.execute(f"""
+                    SELECT SUM(earnings), SUM(rental_time), SUM(rental_count)
+                    FROM account_statistics
+                    {"WHERE account_id = ?" if account_id else ""}
+                """, params)
+                totals_row = cursor.fetchone()
+                row = (accounts_row[0], totals_row[0], totals_row[1], totals_row[2], *accounts_row[1:])
                 
                 # Статистика по категориям
                 cursor.execute("""
@@ -408,12 +590,11 @@ class AccountManager:
                 """)
                 category_stats = {row[0]: {'count': row[1], 'avg_earnings': row[2]} for row in cursor.fetchall()}
                 
-                # Статистика по играм
+                # Статистика по играм (по одной строке на игру, а не на JSON-список)
                 cursor.execute("""
-                    SELECT games, COUNT(*) as count
-                    FROM steam_accounts_extended 
-                    WHERE games IS NOT NULL AND games != '[]'
-                    GROUP BY games
+                    SELECT MIN(game), COUNT(*) as count
+                    FROM account_games
+                    GROUP BY game_key
                     ORDER BY count DESC
                     LIMIT 10
                 """)
@@ -436,21 +617,31 @@ class AccountManager:
             self.logger.error(f"Ошибка получения статистики: {e}")
             return {}
     
-    def search_accounts(self, query: str) -> List[AccountInfo]:
-        """Поиск аккаунтов по различным критериям"""
+    def search_accounts(self, query: str, limit: Optional[int] = None) -> List[AccountInfo]:
+        """Поиск аккаунтов по различным критериям (FTS5: префиксы слов, лучшие совпадения первыми)"""
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
+                if fts5_available():
+                    rows = EXTENDED_ACCOUNT_SEARCH.search(cursor, query, limit=limit)
+                    return [self._row_to_account_info(row) for row in rows]
+                
+                # Без FTS5 - подстрока по полям и по индексу игр
                 search_query = """
                     SELECT * FROM steam_accounts_extended 
-                    WHERE login LIKE ? OR email LIKE ? OR notes LIKE ? 
-                    OR games LIKE ? OR tags LIKE ?
+                    WHERE login LIKE ? OR email LIKE ? OR notes LIKE ? OR tags LIKE ?
+                    OR id IN (SELECT account_id FROM account_games WHERE game_key LIKE ?)
                     ORDER BY total_earnings DESC
                 """
                 
                 search_term = f"%{query}%"
-                cursor.execute(search_query, (search_term, search_term, search_term, search_term, search_term))
+                game_term = f"%{normalize_game(query)}%"
+                params = [search_term, search_term, search_term, search_term, game_term]
+                if limit:
+                    search_query += " LIMIT ?"
+                    params.append(limit)
+                cursor.execute(search_query, params)
                 
                 accounts = []
                 for row in cursor.fetchall():
@@ -463,17 +654,25 @@ class AccountManager:
             self.logger.error(f"Ошибка поиска аккаунтов: {e}")
             return []
     
-    def get_top_earning_accounts(self, limit: int = 10) -> List[AccountInfo]:
-        """Получение топ аккаунтов по доходу"""
+    def get_top_earning_accounts(self, limit: int = 10, days: Optional[int] = None) -> List[AccountInfo]:
+        """Получение топ аккаунтов по доходу (по дневным сводкам, за последние days дней или за все время)"""
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute("""
-                    SELECT * FROM steam_accounts_extended 
-                    ORDER BY total_earnings DESC 
-                    LIMIT ?
-                """, (limit,))
+                period = "AND date >= DATE('now', ?)" if days else ""
+                params = ([f"-{days} days"] if days else []) + [limit]
+                cursor.execute(f"""
+                    SELECT a.* FROM (
+                        SELECT account_id, SUM(earnings) AS earned FROM account_statistics
+                        WHERE account_id > 0 {period}
+                        GROUP BY account_id
+                        ORDER BY earned DESC
+                        LIMIT ?
+                    ) t
+                    JOIN steam_accounts_extended a ON a.id = t.account_id
+                    ORDER BY t.earned DESC
+                """, params)
                 
                 accounts = []
                 for row in cursor.fetchall():
@@ -487,16 +686,17 @@ class AccountManager:
             return []
     
     def get_accounts_by_game(self, game_name: str) -> List[AccountInfo]:
-        """Получение аккаунтов по игре"""
+        """Получение аккаунтов по игре (точное совпадение названия без учета регистра)"""
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
-                    SELECT * FROM steam_accounts_extended 
-                    WHERE games LIKE ? AND status = 'available'
-                    ORDER BY price_per_hour ASC
-                """, (f'%{game_name}%',))
+                    SELECT a.* FROM account_games g
+                    JOIN steam_accounts_extended a ON a.id = g.account_id
+                    WHERE g.game_key = ? AND a.status = 'available'
+                    ORDER BY a.price_per_hour ASC
+                """, (normalize_game(game_name),))
                 
                 accounts = []
                 for row in cursor.fetchall():
@@ -552,71 +752,61 @@ class AccountManager:
             self.logger.error(f"Ошибка получения тегов: {e}")
             return []
     
-    def _add_account_tags(self, account_id: int, tags: List[str]):
-        """Добавление тегов к аккаунту"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                for tag_name in tags:
-                    # Получаем или создаем тег
-                    cursor.execute("SELECT id FROM account_tags WHERE name = ?", (tag_name,))
-                    tag_row = cursor.fetchone()
-                    
-                    if tag_row:
-                        tag_id = tag_row[0]
-                    else:
-                        cursor.execute("INSERT INTO account_tags (name) VALUES (?)", (tag_name,))
-                        tag_id = cursor.lastrowid
-                    
-                    # Связываем тег с аккаунтом
-                    cursor.execute("""
-                        INSERT OR IGNORE INTO account_tag_relations (account_id, tag_id) 
-                        VALUES (?, ?)
-                    """, (account_id, tag_id))
-                
-                conn.commit()
-                
-        except Exception as e:
-            self.logger.error(f"Ошибка добавления тегов к аккаунту: {e}")
+    def _add_account_tags(self, cursor: sqlite3.Cursor, account_id: int, tags: List[str]):
+        """Добавление тегов к аккаунту (в транзакции вызывающего)"""
+        names = list(dict.fromkeys(tag for tag in tags if tag))
+        if not names:
+            return
+
+        # Недостающие теги создаются одним executemany, связи - одним INSERT ... SELECT
+        cursor.executemany("INSERT OR IGNORE INTO account_tags (name) VALUES (?)", [(name,) for name in names])
+        placeholders = ', '.join('?' * len(names))
+        cursor.execute(f"""
+            INSERT OR IGNORE INTO account_tag_relations (account_id, tag_id)
+            SELECT ?, id FROM account_tags WHERE name IN ({placeholders})
+        """, (account_id, *names))
+
+    def _update_account_tags(self, cursor: sqlite3.Cursor, account_id: int, new_tags: List[str]):
+        """Замена тегов аккаунта (в транзакции вызывающего)"""
+        cursor.execute("DELETE FROM account_tag_relations WHERE account_id = ?", (account_id,))
+        self._add_account_tags(cursor, account_id, new_tags)
+
+    def _sync_account_games(self, cursor: sqlite3.Cursor, account_id: int, games: List[str]):
+        """Замена игр аккаунта в индексе account_games (в транзакции вызывающего)"""
+        cursor.execute("DELETE FROM account_games WHERE account_id = ?", (account_id,))
+        cursor.executemany(
+            "INSERT OR IGNORE INTO account_games (game_key, account_id, game) VALUES (?, ?, ?)",
+            [(normalize_game(game), account_id, str(game).strip()) for game in games or [] if str(game).strip()]
+        )
     
-    def _update_account_tags(self, account_id: int, new_tags: List[str]):
-        """Обновление тегов аккаунта"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Удаляем старые связи
-                cursor.execute("DELETE FROM account_tag_relations WHERE account_id = ?", (account_id,))
-                
-                # Добавляем новые теги
-                self._add_account_tags(account_id, new_tags)
-                
-        except Exception as e:
-            self.logger.error(f"Ошибка обновления тегов аккаунта: {e}")
+    def _backfill_account_games(self, cursor: sqlite3.Cursor):
+        """Заполнение индекса игр из JSON для аккаунтов, которых в нем еще нет"""
+        cursor.execute("""
+            SELECT id, games FROM steam_accounts_extended
+            WHERE games IS NOT NULL AND games != '[]'
+            AND id NOT IN (SELECT account_id FROM account_games)
+        """)
+        for account_id, games_json in cursor.fetchall():
+            try:
+                games = json.loads(games_json)
+            except ValueError:
+                continue
+            if isinstance(games, list):
+                self._sync_account_games(cursor, account_id, games)
     
-    def _log_account_action(self, account_id: int, action: str, old_value: Optional[str], 
-                           new_value: Optional[str], user_id: Optional[str] = None):
-        """Логирование действий с аккаунтом"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    INSERT INTO account_history (account_id, action, old_value, new_value, user_id)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (account_id, action, old_value, new_value, user_id))
-                
-                conn.commit()
-                
-        except Exception as e:
-            self.logger.error(f"Ошибка логирования действия: {e}")
+    def _log_account_action(self, cursor: sqlite3.Cursor, account_id: int, action: str,
+                            old_value: Optional[str], new_value: Optional[str], user_id: Optional[str] = None):
+        """Логирование действий с аккаунтом (в транзакции вызывающего)"""
+        cursor.execute("""
+            INSERT INTO account_history (account_id, action, old_value, new_value, user_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, (account_id, action, old_value, new_value, user_id))
     
     def _row_to_account_info(self, row: Tuple) -> AccountInfo:
         """Преобразование строки БД в объект AccountInfo"""
         try:
             games = json.loads(row[5]) if row[5] else []
-            tags = json.loads(row[16]) if row[16] else []
+            tags = json.loads(row[15]) if row[15] else []
             
             return AccountInfo(
                 id=row[0],
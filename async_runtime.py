@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⚙️ Асинхронная среда выполнения Steam Rental System
+Один event loop на процесс: Telegram бот и планировщик задач.
+Блокирующая работа (SQLite, requests к FunPay, Steam) выполняется в пуле потоков,
+планировщик спит до ближайшей задачи вместо опроса schedule.run_pending() раз в секунду,
+а запуски передает исполнителю задач (job_executor.py).
+"""
+
+import time
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, List, Optional
+from config import Config
+from metrics import Counter
+from job_executor import JobExecutor, Misfire, Priority
+
+SCHEDULER_WAKEUPS = Counter('steam_rental_scheduler_wakeups', 'Пробуждения планировщика задач')
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def executor() -> ThreadPoolExecutor:
+    """Общий пул потоков для блокирующих вызовов"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=Config.RUNTIME_WORKERS, thread_name_prefix='runtime')
+    return _executor
+
+
+async def offload(func: Callable, *args, **kwargs) -> Any:
+    """Выполнение блокирующей функции в пуле потоков, не останавливая event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor(), functools.partial(func, *args, **kwargs))
+
+
+def parse_time_of_day(value: str) -> tuple:
+    """'HH:MM' -> (часы, минуты)"""
+    hours, minutes = (int(part) for part in value.split(':'))
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Некорректное время: {value}")
+    return hours, minutes
+
+
+@dataclass
+class ScheduledJob:
+    """Задача планировщика: раз в interval секунд или ежедневно в at ('HH:MM', местное время)
+
+    timeout - секунды на запуск, misfire_grace - допустимое опоздание для Misfire.SKIP.
+    """
+    name: str
+    func: Callable
+    interval: Optional[float] = None
+    at: Optional[str] = None
+    priority: Priority = Priority.NORMAL
+    timeout: Optional[float] = None
+    misfire: Misfire = Misfire.SKIP
+    misfire_grace: Optional[float] = None
+    next_run: float = 0.0
+    runs: int = 0
+
+    def schedule_next(self, now: float):
+        """Следующий запуск после момента now"""
+        if self.interval is not None:
+            self.next_run = now + self.interval
+            return
+        hours, minutes = parse_time_of_day(self.at)
+        moment = datetime.fromtimestamp(now).replace(hour=hours, minute=minutes, second=0, microsecond=0)
+        if moment.timestamp() <= now:
+            moment += timedelta(days=1)
+        self.next_run = moment.timestamp()
+
+
+class AsyncScheduler:
+    """Планировщик задач в event loop
+
+    Цикл просыпается только к сроку ближайшей задачи (или при добавлении/остановке)
+    и передает запуск исполнителю: приоритеты, один экземпляр задачи, таймауты.
+    runner(func) - обертка запуска синхронных задач, gate() - разрешение запусков
+    (при False срок задачи переносится без запуска, например у ведомой реплики).
+    """
+
+    def __init__(self, runner: Optional[Callable[[Callable], Any]] = None,
+                 executor: Optional[JobExecutor] = None, gate: Optional[Callable[[], bool]] = None):
+        self.executor = executor or JobExecutor(runner=runner)
+        self.gate = gate
+        self.jobs: List[ScheduledJob] = []
+        self.wakeups = 0
+        self.logger = logging.getLogger(__name__)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running = False
+
+    def every(self, seconds: float, func: Callable, name: Optional[str] = None, **options) -> ScheduledJob:
+        """Задача раз в seconds секунд (первый запуск - через seconds)
+
+        options - priority, timeout, misfire, misfire_grace (см. ScheduledJob).
+        """
+        if seconds <= 0:
+            raise ValueError("Интервал должен быть положительным")
+        return self._add(ScheduledJob(name or func.__name__, func, interval=seconds, **options))
+
+    def daily(self, at: str, func: Callable, name: Optional[str] = None, **options) -> ScheduledJob:
+        """Задача раз в сутки в at ('HH:MM')"""
+        parse_time_of_day(at)
+        return self._add(ScheduledJob(name or func.__name__, func, at=at, **options))
+
+    def _add(self, job: ScheduledJob) -> ScheduledJob:
+        job.schedule_next(time.time())
+        self.jobs.append(job)
+        self._notify()
+        return job
+
+    def idle_seconds(self) -> Optional[float]:
+        """Время до ближайшей задачи (None - задач нет)"""
+        if not self.jobs:
+            return None
+        return max(0.0, min(job.next_run for job in self.jobs) - time.time())
+
+    async def run(self):
+        """Основной цикл планировщика (до stop())"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._running = True
+        await self.executor.start()
+        try:
+            while self._running:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.idle_seconds())
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                if not self._running:
+                    break
+
+                self.wakeups += 1
+                SCHEDULER_WAKEUPS.inc()
+                now = time.time()
+                allowed = self.gate is None or self.gate()
+                for job in self.jobs:
+                    if job.next_run <= now:
+                        scheduled_at = job.next_run
+                        job.schedule_next(now)
+                        if not allowed:
+                            continue
+                        job.runs += 1
+                        self.executor.submit(job, scheduled_at)
+        finally:
+            self._running = False
+            # Задачи в пуле потоков не прерываются - дожидаемся их завершения
+            await self.executor.stop()
+
+    def _notify(self):
+        """Пересчет времени сна (потокобезопасно)"""
+        if self._loop is not None and self._wakeup is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def stop(self):
+        """Остановка цикла планировщика (можно вызывать из любого потока)"""
+        self._running = False
+        self._notify()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+💾 Резервное копирование базы данных
+Онлайн-копия через sqlite3 backup API порциями страниц с паузами (писатели не блокируются),
+проверка PRAGMA integrity_check, сжатие gzip, хранение по часам и дням, восстановление.
+
+Запуск: python backup_manager.py backup | list | verify <файл> | restore <файл> [--target путь]
+"""
+
+import os
+import re
+import sys
+import gzip
+import time
+import shutil
+import logging
+import sqlite3
+import argparse
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from config import Config
+from metrics import Counter, Gauge
+
+BACKUP_DURATION_SECONDS = Gauge('steam_rental_backup_duration_seconds', 'Длительность последней резервной копии')
+BACKUP_SIZE_BYTES = Gauge('steam_rental_backup_size_bytes', 'Размер последней резервной копии (сжатой)')
+BACKUP_LAST_SUCCESS = Gauge('steam_rental_backup_last_success_timestamp_seconds', 'Время последней резервной копии')
+BACKUP_FAILURES = Counter('steam_rental_backup_failures', 'Неудачные резервные копии')
+
+TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
+
+
+class BackupError(Exception):
+    """Ошибка создания или проверки резервной копии"""
+
+
+class _BackupRestarted(Exception):
+    """Копирование порциями слишком часто начинается заново из-за записи в базу"""
+
+
+def integrity_check(db_path: str) -> str:
+    """Результат PRAGMA integrity_check ('ok' для целой базы)"""
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute('PRAGMA integrity_check').fetchall()
+    return '; '.join(row[0] for row in rows)
+
+
+class BackupManager:
+    """Создание, проверка, ротация и восстановление резервных копий"""
+
+    # Сколько раз копирование порциями может начаться заново из-за записи в базу,
+    # прежде чем оставшаяся часть будет скопирована за один шаг
+    MAX_RESTARTS = 3
+
+    def __init__(self, db_path: str = None, backup_dir: str = None, pages_per_step: int = None,
+                 step_sleep: float = None, keep_hourly: int = None, keep_daily: int = None):
+        self.db_path = db_path or Config.DATABASE_PATH
+        self.backup_dir = backup_dir or Config.BACKUP_DIR
+        self.pages_per_step = pages_per_step or Config.BACKUP_PAGES_PER_STEP
+        self.step_sleep = Config.BACKUP_STEP_SLEEP if step_sleep is None else step_sleep
+        self.keep_hourly = Config.BACKUP_KEEP_HOURLY if keep_hourly is None else keep_hourly
+        self.keep_daily = Config.BACKUP_KEEP_DAILY if keep_daily is None else keep_daily
+        self.prefix = os.path.splitext(os.path.basename(self.db_path))[0]
+        self._name_pattern = re.compile(rf'^{re.escape(self.prefix)}_(\d{{8}}_\d{{6}})\.db\.gz$')
+        self.logger = logging.getLogger(__name__)
+
+    def backup(self, now: Optional[datetime] = None) -> Dict:
+        """Онлайн-копия базы: копирование порциями, проверка, сжатие и ротация"""
+        started = time.perf_counter()
+        now = now or datetime.now()
+        os.makedirs(self.backup_dir, exist_ok=True)
+        target = os.path.join(self.backup_dir, f"{self.prefix}_{now.strftime(TIMESTAMP_FORMAT)}.db.gz")
+        fd, raw_copy = tempfile.mkstemp(suffix='.db', dir=self.backup_dir)
+        os.close(fd)
+
+        try:
+            steps = self._copy(raw_copy)
+
+            integrity = integrity_check(raw_copy)
+            if integrity != 'ok':
+                raise BackupError(f"Копия не прошла integrity_check: {integrity}")
+
+            partial = target + '.part'
+            with open(raw_copy, 'rb') as src, gzip.open(partial, 'wb', compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(partial, target)
+
+            result = {
+                'path': target,
+                'duration_seconds': round(time.perf_counter() - started, 3),
+                'size_bytes': os.path.getsize(target),
+                'database_bytes': os.path.getsize(raw_copy),
+                'steps': steps,
+                'integrity': integrity,
+                'removed': self.apply_retention(now)
+            }
+        except Exception:
+            BACKUP_FAILURES.inc()
+            raise
+        finally:
+            for path in (raw_copy, target + '.part'):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        BACKUP_DURATION_SECONDS.set(result['duration_seconds'])
+        BACKUP_SIZE_BYTES.set(result['size_bytes'])
+        BACKUP_LAST_SUCCESS.set(time.time())
+        self.logger.info(
+            f"💾 Резервная копия {target}: {result['size_bytes']} байт "
+            f"(база {result['database_bytes']} байт), {result['duration_seconds']} с, шагов {steps}"
+        )
+        return result
+
+    def _copy(self, destination: str) -> int:
+        """Копирование через backup API порциями pages_per_step с паузой step_sleep между ними
+
+        Запись в базу другим соединением заставляет SQLite начать копирование заново.
+        Если это повторяется больше MAX_RESTARTS раз, копия делается за один шаг
+        (короткая блокировка чтения вместо бесконечных повторов).
+        """
+        steps = 0
+        restarts = 0
+        last_remaining = None
+
+        def progress(status, remaining, total):
+            nonlocal steps, restarts, last_remaining
+            steps += 1
+            if last_remaining is not None and remaining > last_remaining:
+                restarts += 1
+                if restarts > self.MAX_RESTARTS:
+                    raise _BackupRestarted()
+            last_remaining = remaining
+            # Пауза между порциями отпускает блокировку чтения, писатели успевают закоммитить
+            if remaining and self.step_sleep:
+                time.sleep(self.step_sleep)
+
+        source = sqlite3.connect(self.db_path)
+        try:
+            target = sqlite3.connect(destination)
+            try:
+                source.backup(target, pages=self.pages_per_step, progress=progress, sleep=self.step_sleep)
+            except _BackupRestarted:
+                self.logger.warning(
+                    f"⚠️ Копирование начиналось заново {restarts} раз из-за записи, копируем за один шаг"
+                )
+                source.backup(target, pages=-1, sleep=self.step_sleep)
+                steps += 1
+            finally:
+                target.close()
+        finally:
+            source.close()
+        return steps
+
+    def list_backups(self) -> List[Tuple[datetime, str]]:
+        """Резервные копии, от новых к старым"""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        backups = []
+        for name in os.listdir(self.backup_dir):
+            match = self._name_pattern.match(name)
+            if match:
+                created = datetime.strptime(match.group(1), TIMESTAMP_FORMAT)
+                backups.append((created, os.path.join(self.backup_dir, name)))
+        return sorted(backups, reverse=True)
+
+    def apply_retention(self, now: Optional[datetime] = None) -> List[str]:
+        """Ротация: последняя копия в каждом из keep_hourly последних часов и keep_daily последних дней"""
+        now = now or datetime.now()
+        keep = set()
+        hours, days = set(), set()
+        for created, path in self.list_backups():
+            if created > now:
+                keep.add(path)
+                continue
+            hour = created.strftime('%Y%m%d%H')
+            day = created.strftime('%Y%m%d')
+            if hour not in hours and len(hours) < self.keep_hourly:
+                hours.add(hour)
+                keep.add(path)
+            if day not in days and len(days) < self.keep_daily:
+                days.add(day)
+                keep.add(path)
+
+        removed = []
+        for _, path in self.list_backups():
+            if path not in keep:
+                os.remove(path)
+                removed.append(path)
+        if removed:
+            self.logger.info(f"🧹 Удалено старых резервных копий: {len(removed)}")
+        return removed
+
+    def verify(self, backup_path: str) -> str:
+        """Проверка сжатой копии (распаковка во временный файл и integrity_check)"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            raw = self._decompress(backup_path, tmp_dir)
+            return integrity_check(raw)
+
+    def restore(self, backup_path: str, target_path: Optional[str] = None) -> Dict:
+        """Восстановление копии в target_path (по умолчанию - в рабочую базу)
+
+        Копия проверяется до восстановления, запись в целевую базу идет через
+        backup API, поэтому открытые соединения увидят согласованное состояние.
+        """
+        started = time.perf_counter()
+        target_path = target_path or self.db_path
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            raw = self._decompress(backup_path, tmp_dir)
+            integrity = integrity_check(raw)
+            if integrity != 'ok':
+                raise BackupError(f"Копия {backup_path} повреждена: {integrity}")
+
+            source = sqlite3.connect(raw)
+            target = sqlite3.connect(target_path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+
+        duration = round(time.perf_counter() - started, 3)
+        self.logger.info(f"♻️ База {target_path} восстановлена из {backup_path} за {duration} с")
+        return {'path': target_path, 'source': backup_path, 'duration_seconds': duration}
+
+    @staticmethod
+    def _decompress(backup_path: str, directory: str) -> str:
+        raw = os.path.join(directory, 'restore.db')
+        opener = gzip.open if backup_path.endswith('.gz') else open
+        with opener(backup_path, 'rb') as src, open(raw, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        return raw
+
+
+def main(argv=None):
+    """Командная строка резервного копирования"""
+    parser = argparse.ArgumentParser(description="Резервные копии базы данных")
+    parser.add_argument('--db', default=Config.DATABASE_PATH, help="Путь к базе")
+    parser.add_argument('--dir', default=Config.BACKUP_DIR, help="Каталог резервных копий")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('backup', help="Создать резервную копию")
+    subparsers.add_parser('list', help="Список резервных копий")
+    verify_parser = subparsers.add_parser('verify', help="Проверить копию")
+    verify_parser.add_argument('file')
+    restore_parser = subparsers.add_parser('restore', help="Восстановить копию")
+    restore_parser.add_argument('file')
+    restore_parser.add_argument('--target', help="Куда восстановить (по умолчанию --db)")
+    args = parser.parse_args(argv)
+
+    manager = BackupManager(args.db, args.dir)
+    try:
+        if args.command == 'backup':
+            result = manager.backup()
+            print(f"✅ {result['path']}: {result['size_bytes']} байт за {result['duration_seconds']} с")
+        elif args.command == 'list':
+            for created, path in manager.list_backups():
+                print(f"{created:%Y-%m-%d %H:%M:%S}  {os.path.getsize(path):>12}  {path}")
+        elif args.command == 'verify':
+            integrity = manager.verify(args.file)
+            print(f"{'✅' if integrity == 'ok' else '❌'} integrity_check: {integrity}")
+            return 0 if integrity == 'ok' else 1
+        elif args.command == 'restore':
+            result = manager.restore(args.file, args.target)
+            print(f"✅ Восстановлено в {result['path']} за {result['duration_seconds']} с")
+    except Exception as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
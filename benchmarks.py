@@ -0,0 +1,689 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏱️ Бенчмарки Steam Rental System
+Запуск: python benchmarks.py [имя_бенчмарка ...] [--save baseline.json] [--compare baseline.json]
+
+Бенчмарки жизненного цикла аренды работают на синтетических данных
+(generate_dataset), размер задается параметрами --accounts/--games/--rentals/--reviews.
+С --compare результаты сравниваются с сохраненным JSON, замедление больше
+--threshold считается регрессией (код возврата 1).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import sqlite3
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from funpay_stub_server import FunPayStubServer, StubSettings, generate_orders_html, generate_reviews_html
+
+# Игры для синтетических данных (названия как в extract_game_from_order)
+GAMES = (
+    'Counter-Strike 2', 'Dota 2', 'PUBG', 'Valorant', 'League of Legends', 'Fortnite', 'Minecraft',
+    'GTA V', 'FIFA 24', 'Call of Duty', 'Overwatch', 'Apex Legends'
+)
+
+@dataclass
+class DatasetSpec:
+    """Размер синтетического набора данных"""
+    accounts: int = 2_000
+    games: int = 12
+    rentals: int = 20_000
+    reviews: int = 2_000
+    rented_share: float = 0.2
+    seed: int = 42
+
+def _result(iterations: int, elapsed: float) -> Dict[str, float]:
+    return {
+        'iterations': iterations,
+        'total_seconds': elapsed,
+        'us_per_op': elapsed / iterations * 1_000_000 if iterations else 0.0,
+        'ops_per_second': iterations / elapsed if elapsed else 0.0
+    }
+
+def measure(func: Callable, iterations: int) -> Dict[str, float]:
+    """Замер времени выполнения функции"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return _result(iterations, time.perf_counter() - started)
+
+def measure_with_setup(func: Callable, setup: Callable, iterations: int) -> Dict[str, float]:
+    """Замер функции, подготовка перед каждым вызовом в замер не входит"""
+    elapsed = 0.0
+    for _ in range(iterations):
+        setup()
+        started = time.perf_counter()
+        func()
+        elapsed += time.perf_counter() - started
+    return _result(iterations, elapsed)
+
+def measure_async(coroutine_factory: Callable, iterations: int) -> Dict[str, float]:
+    """Замер асинхронной функции в одном event loop"""
+    async def run_many():
+        for _ in range(iterations):
+            await coroutine_factory()
+
+    started = time.perf_counter()
+    asyncio.run(run_many())
+    return _result(iterations, time.perf_counter() - started)
+
+@contextmanager
+def temporary_workdir():
+    """Временная рабочая директория (ключи и БД по умолчанию создаются в текущей)"""
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            yield tmp_dir
+        finally:
+            os.chdir(previous_cwd)
+
+def generate_dataset(db_path: str, spec: Optional[DatasetSpec] = None):
+    """Синтетические аккаунты, аренды, пользователи и бонусы за отзывы
+
+    Данные детерминированы (spec.seed). Возвращает Database для db_path.
+    """
+    from database import Database
+
+    spec = spec or DatasetSpec()
+    rng = random.Random(spec.seed)
+    db = Database(db_path)
+    games = [GAMES[i % len(GAMES)] + (f" #{i // len(GAMES)}" if i >= len(GAMES) else "")
+             for i in range(spec.games)]
+    now = datetime.now().replace(microsecond=0)
+    fmt = '%Y-%m-%d %H:%M:%S'
+    users = [f"user_{i}" for i in range(max(spec.rentals // 10, 1))]
+
+    accounts = []
+    active_rentals = []
+    rented_count = int(spec.accounts * spec.rented_share)
+    for account_id in range(1, spec.accounts + 1):
+        created = (now - timedelta(days=rng.randint(0, 365))).strftime(fmt)
+        if account_id <= rented_count:
+            renter = rng.choice(users)
+            start = now - timedelta(hours=rng.randint(0, 5))
+            duration = rng.choice((6, 12, 24))
+            end = start + timedelta(hours=duration)
+            rental_start, rental_end = start.strftime(fmt), end.strftime(fmt)
+            active_rentals.append((account_id, renter, rental_start, rental_end, duration, 'active', rental_start))
+        else:
+            renter = rental_start = rental_end = None
+        accounts.append((
+            account_id, f"steam_{account_id}", f"pass_{rng.getrandbits(48):x}", rng.choice(games),
+            rng.choice((50.0, 75.0, 100.0)), f"Аккаунт #{account_id}", renter is not None, renter,
+            rental_start, rental_end, created, created
+        ))
+
+    rentals = []
+    history = []
+    for _ in range(max(spec.rentals - len(active_rentals), 0)):
+        account_id = rng.randint(1, spec.accounts)
+        renter = rng.choice(users)
+        duration = rng.choice((1, 3, 6, 12, 24))
+        start = now - timedelta(days=rng.randint(1, 180), minutes=rng.randint(0, 1440))
+        end = start + timedelta(hours=duration)
+        rentals.append((account_id, renter, start.strftime(fmt), end.strftime(fmt), duration,
+                        'completed', start.strftime(fmt)))
+        history.append((renter, 'rental_start', f'Начата аренда аккаунта #{account_id} на {duration} часов',
+                        start.strftime(fmt)))
+    rentals.extend(active_rentals)
+
+    # Положительные отзывы дают бонусное время
+    bonuses = [(rng.choice(users), 30, "Положительный отзыв",
+                (now - timedelta(days=rng.randint(0, 180))).strftime(fmt))
+               for _ in range(spec.reviews) if rng.random() < 0.8]
+    user_rows = [(user, user, (now - timedelta(days=rng.randint(0, 365))).strftime(fmt)) for user in users]
+
+    with db.connect() as conn:
+        conn.executemany("""
+            INSERT INTO steam_accounts (id, username, password, game_name, price, description, is_rented,
+                                        current_renter_id, rental_start_time, rental_end_time, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, accounts)
+        conn.executemany("""
+            INSERT INTO rentals (account_id, renter_id, start_time, end_time, duration_hours, status, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rentals)
+        conn.executemany("""
+            INSERT INTO operation_history (user_id, operation_type, description, created_at)
+            VALUES (?, ?, ?, ?)
+        """, history)
+        conn.executemany("INSERT OR IGNORE INTO users (telegram_id, username, created_at) VALUES (?, ?, ?)",
+                         user_rows)
+        conn.executemany("INSERT INTO bonuses (user_id, bonus_minutes, reason, created_at) VALUES (?, ?, ?, ?)",
+                         bonuses)
+        conn.commit()
+
+    return db
+
+def benchmark_callback_router(iterations: int = 100_000) -> Dict[str, Dict[str, float]]:
+    """Маршрутизатор callback-запросов: кодирование, разбор и диспетчеризация"""
+    from callback_router import CallbackRouter
+
+    async def handler(update, context, *args):
+        return None
+
+    router = CallbackRouter()
+    for code in ("acc", "st", "hlp", "rnt", "as", "au", "aa", "aad", "ae", "ar", "al", "ad", "ab"):
+        router.register(code, handler, legacy=f"legacy_{code}")
+    router.register("ra", handler, (int,), name="rent_account", legacy="rent_account")
+    router.register("rt", handler, (int, int), name="rent_time", legacy="rent_time")
+    router.register("da", handler, (int,), name="delete_account", legacy="delete_account")
+
+    data = router.encode("rt", 12345, 24)
+
+    return {
+        'encode': measure(lambda: router.encode("rt", 12345, 24), iterations),
+        'decode': measure(lambda: router.decode(data), iterations),
+        'decode_legacy': measure(lambda: router.decode("rent_time_12345_24"), iterations),
+        'dispatch': measure_async(lambda: router.dispatch(data, None, None), iterations),
+    }
+
+def benchmark_settings_tokens(iterations: int = 100_000, uncached_iterations: int = 2_000) -> Dict[str, Dict[str, float]]:
+    """Чтение токенов SettingsManager: кэш с буферизацией счетчиков против чтения из БД"""
+    from settings_manager import SettingsManager
+
+    results = {}
+    # Ключ шифрования создается в текущей директории
+    with temporary_workdir() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench_settings.db")
+
+        cached = SettingsManager(db_path)
+        cached.set_token("funpay", "session", "token_value_" + "x" * 64)
+        results['get_token_cached'] = measure(lambda: cached.get_token("funpay", "session"), iterations)
+        cached.flush_token_usage()
+
+        # Прежнее поведение: без кэша, UPDATE usage_count на каждое чтение
+        uncached = SettingsManager(db_path, cache_ttl=0)
+        uncached.TOKEN_USAGE_FLUSH_SIZE = 1
+        results['get_token_uncached'] = measure(lambda: uncached.get_token("funpay", "session"), uncached_iterations)
+
+        results['get_setting_cached'] = measure(lambda: cached.get_setting("system", "log_level"), iterations)
+
+    return results
+
+def benchmark_rental_lifecycle(spec: Optional[DatasetSpec] = None, create_iterations: int = 300,
+                               expire_batch: int = 200, expire_iterations: int = 5,
+                               query_iterations: int = 20) -> Dict[str, Dict[str, float]]:
+    """Жизненный цикл аренды: создание, завершение истекших, статистика и списки"""
+    spec = spec or DatasetSpec()
+    results = {}
+    with temporary_workdir() as tmp_dir:
+        db = generate_dataset(os.path.join(tmp_dir, "bench_lifecycle.db"), spec)
+
+        results['get_available_accounts_list'] = measure(db.get_available_accounts_list, query_iterations)
+        results['get_detailed_stats'] = measure(db.get_detailed_stats, query_iterations)
+
+        available = [account['id'] for account in db.get_available_accounts_list()][:create_iterations]
+        pending = iter(available)
+        results['create_rental'] = measure(lambda: db.create_rental(next(pending), "bench_user", 24), len(available))
+
+        def expire_setup():
+            # Часть завершенных аренд снова активна, но уже истекла
+            with sqlite3.connect(db.db_path) as conn:
+                conn.execute("""
+                    UPDATE rentals SET status = 'active', end_time = '2000-01-01 00:00:00'
+                    WHERE id IN (SELECT id FROM rentals WHERE status = 'completed' LIMIT ?)
+                """, (expire_batch,))
+                conn.commit()
+
+        stats = measure_with_setup(db.end_expired_rentals, expire_setup, expire_iterations)
+        stats['batch'] = expire_batch
+        results['end_expired_rentals'] = stats
+
+    return results
+
+def benchmark_funpay_parsing(orders: int = 200, iterations: int = 20) -> Dict[str, Dict[str, float]]:
+    """Разбор страниц заказов и отзывов FunPay"""
+    from funpay_manager import parse_orders, parse_reviews
+
+    orders_html = generate_orders_html(orders)
+    reviews_html = generate_reviews_html(orders)
+
+    return {
+        'parse_orders': measure(lambda: parse_orders(orders_html), iterations),
+        'parse_reviews': measure(lambda: parse_reviews(reviews_html), iterations),
+    }
+
+def benchmark_funpay_stub(orders: int = 100, latency: float = 0.0, iterations: int = 20,
+                          messages: int = 100) -> Dict[str, Dict[str, float]]:
+    """Пропускная способность приема заказов и доставки сообщений через локальный двойник FunPay"""
+    from funpay_manager import FunPayManager
+
+    with FunPayStubServer(settings=StubSettings(orders=orders, latency=latency)) as stub:
+        manager = FunPayManager()
+        manager.base_url = stub.url
+        manager.login_to_funpay()
+
+        results = {
+            'get_orders': measure(manager.get_orders, iterations),
+            'check_new_orders': measure(manager.check_new_orders, iterations),
+        }
+        order_ids = iter(range(1, messages + 1))
+        results['send_message'] = measure(lambda: manager.send_message(str(next(order_ids)), "Данные аккаунта"),
+                                          messages)
+        manager.close()
+
+    return results
+
+class _FakeMessage:
+    async def reply_text(self, *args, **kwargs):
+        return None
+
+class _FakeQuery:
+    def __init__(self, data: str = ""):
+        self.data = data
+
+    async def answer(self, *args, **kwargs):
+        return None
+
+    async def edit_message_text(self, *args, **kwargs):
+        return None
+
+class _FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.first_name = "Bench"
+        self.username = "bench"
+
+class _FakeUpdate:
+    """Минимальный Update для вызова обработчиков без сети"""
+    def __init__(self, user_id, data: str = ""):
+        self.effective_user = _FakeUser(user_id)
+        self.message = _FakeMessage()
+        self.callback_query = _FakeQuery(data)
+
+def benchmark_bot_handlers(spec: Optional[DatasetSpec] = None, iterations: int = 50) -> Dict[str, Dict[str, float]]:
+    """Задержка обработчиков бота (без сети Telegram)"""
+    spec = spec or DatasetSpec()
+    with temporary_workdir() as tmp_dir:
+        db = generate_dataset(os.path.join(tmp_dir, "bench_bot.db"), spec)
+
+        from telegram_bot import SteamRentalBot
+        bot = SteamRentalBot()
+        bot.db = db
+        admin_id = int(bot.admin_id) if str(bot.admin_id).isdigit() else 0
+
+        accounts_update = _FakeUpdate(admin_id)
+        stats_data = bot.callback("as")
+        stats_update = _FakeUpdate(admin_id, stats_data)
+
+        return {
+            'accounts_command': measure_async(lambda: bot.accounts_command(accounts_update, None), iterations),
+            'admin_stats_callback': measure_async(
+                lambda: bot.router.dispatch(stats_data, stats_update, None), iterations
+            ),
+        }
+
+def benchmark_account_search(sizes=(10_000, 100_000), iterations: int = 200) -> Dict[str, Dict[str, float]]:
+    """Поиск аккаунтов: FTS5 (префиксы, bm25) против LIKE '%...%' на 10k и 100k аккаунтов"""
+    from database import Database
+    from search_index import ACCOUNT_SEARCH, fts5_available
+
+    rng = random.Random(42)
+    words = ('быстрый', 'прайм', 'ранг', 'скины', 'инвентарь', 'полный', 'доступ', 'бонус')
+    # Точные логины, префиксы логинов, общие слова и запрос без совпадений
+    queries = ('steam_4821', 'steam_12', 'dot', 'counter str', 'прайм ранг', 'скин', 'нет совпадений')
+    results = {}
+    with temporary_workdir() as tmp_dir:
+        for size in sizes:
+            db = Database(os.path.join(tmp_dir, f"bench_search_{size}.db"))
+            with db.connect() as conn:
+                conn.executemany(
+                    "INSERT INTO steam_accounts (username, password, game_name, description) VALUES (?, 'p', ?, ?)",
+                    [(f"steam_{i}", rng.choice(GAMES), ' '.join(rng.sample(words, 3))) for i in range(size)]
+                )
+                conn.commit()
+
+            label = f"{size // 1000}k"
+            for engine, use_fts in (('fts5', True), ('like', False)):
+                if use_fts and not fts5_available():
+                    continue
+                counter = iter(range(iterations))
+
+                def search():
+                    with db.connect() as conn:
+                        ACCOUNT_SEARCH.search(conn.cursor(), queries[next(counter) % len(queries)],
+                                              where="c.is_rented = FALSE", limit=20, use_fts=use_fts)
+
+                results[f"{engine}_{label}"] = measure(search, iterations)
+    return results
+
+def benchmark_account_records(rows: int = 100_000) -> Dict[str, Dict[str, float]]:
+    """Загрузка всего инвентаря: AccountInfo (dataclass) против AccountRecord (__slots__, ленивый разбор)
+
+    Время - на одну строку, peak_mb - пик памяти всей выборки (tracemalloc, отдельный проход).
+    """
+    from account_manager import AccountManager
+
+    rng = random.Random(42)
+    with temporary_workdir() as tmp_dir:
+        manager = AccountManager(os.path.join(tmp_dir, "bench_records.db"))
+        with sqlite3.connect(manager.db_path) as conn:
+            conn.executemany("""
+                INSERT INTO steam_accounts_extended (login, password, email, games, tags, price_per_hour,
+                                                     total_earnings, created_date, last_rental_date, notes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, datetime('2026-01-01', ?), datetime('2026-06-01', ?), ?)
+            """, [
+                (f"acc_{i}", f"pass_{rng.getrandbits(48):x}", f"acc_{i}@mail.test",
+                 json.dumps(rng.sample(GAMES, 2)), json.dumps(rng.choice(([], ['vip'], ['vip', 'new']))),
+                 rng.choice((10.0, 15.0, 20.0)), rng.random() * 1000,
+                 f"+{i} minutes", f"+{rng.randint(0, 10 ** 6)} seconds", f"Аккаунт #{i}")
+                for i in range(rows)
+            ])
+
+        cases = {
+            'dataclass': lambda: [(a.id, a.login) for a in manager.get_accounts(sort_by='id')],
+            'slots_id_login': lambda: [(a.id, a.login) for a in manager.get_accounts(sort_by='id', lazy=True)],
+            'slots_all_fields': lambda: [(a.games, a.tags, a.created_date, a.last_rental_date, a.status)
+                                         for a in manager.get_accounts(sort_by='id', lazy=True)],
+        }
+        results = {}
+        for case, load in cases.items():
+            started = time.perf_counter()
+            load()
+            results[case] = _result(rows, time.perf_counter() - started)
+
+            tracemalloc.start()
+            try:
+                accounts = manager.get_accounts(sort_by='id', lazy=case != 'dataclass')
+                if case == 'slots_all_fields':
+                    for account in accounts:
+                        account.games, account.tags, account.created_date, account.last_rental_date
+                results[case]['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                del accounts
+            finally:
+                tracemalloc.stop()
+        return results
+
+def benchmark_scheduler(window: float = 3.0) -> Dict[str, Dict[str, float]]:
+    """Планировщик: опрос раз в секунду (прежний schedule.run_pending() + sleep(1)) против AsyncScheduler
+
+    idle - window секунд простоя с задачами системы (интервалы от 5 минут): пробуждения и процессорное время.
+    blocking - частая задача (0.2 с) рядом с блокирующей (0.8 с раз в секунду): lateness_ms -
+    максимальное опоздание частой задачи. Время на операцию - процессорное время на пробуждение.
+    """
+    from async_runtime import AsyncScheduler
+
+    def polling_loop(jobs, seconds: float) -> int:
+        wakeups = 0
+        deadline = time.monotonic() + seconds
+        for job in jobs:
+            job[1] = time.monotonic() + job[0]
+        while time.monotonic() < deadline:
+            wakeups += 1
+            now = time.monotonic()
+            for job in jobs:
+                if job[1] <= now:
+                    job[1] = now + job[0]
+                    job[2]()
+            time.sleep(1)
+        return wakeups
+
+    def async_loop(jobs, seconds: float) -> int:
+        scheduler = AsyncScheduler()
+        for interval, _, func in jobs:
+            scheduler.every(interval, func)
+
+        async def run():
+            asyncio.get_running_loop().call_later(seconds, scheduler.stop)
+            await scheduler.run()
+        asyncio.run(run())
+        return scheduler.wakeups
+
+    def idle_jobs():
+        return [[minutes * 60, 0.0, lambda: None] for minutes in (5, 10, 15, 30, 60, 15, 24 * 60)]
+
+    def blocking_jobs(lateness):
+        expected = {'next': None}
+
+        def frequent():
+            now = time.monotonic()
+            if expected['next'] is not None:
+                lateness.append(max(0.0, now - expected['next']))
+            expected['next'] = now + 0.2
+        return [[0.2, 0.0, frequent], [1.0, 0.0, lambda: time.sleep(0.8)]]
+
+    results = {}
+    for name, loop in (('polling', polling_loop), ('async', async_loop)):
+        cpu_started = time.process_time()
+        wakeups = loop(idle_jobs(), window)
+        cpu = time.process_time() - cpu_started
+        results[f'{name}_idle'] = dict(_result(wakeups, cpu), wakeups=wakeups, cpu_ms=cpu * 1000)
+
+        lateness = []
+        cpu_started = time.process_time()
+        wakeups = loop(blocking_jobs(lateness), window)
+        cpu = time.process_time() - cpu_started
+        results[f'{name}_blocking'] = dict(_result(wakeups, cpu), wakeups=wakeups, cpu_ms=cpu * 1000,
+                                           lateness_ms=max(lateness, default=0.0) * 1000)
+    return results
+
+def benchmark_job_queue(jobs: int = 10_000, batch: int = 100, single: int = 1_000) -> Dict[str, Dict[str, float]]:
+    """Очередь delayed_jobs: постановка по одной и пачками, захват UPDATE ... RETURNING и подтверждение
+
+    Время - на одну задачу.
+    """
+    from job_queue import JobQueue
+
+    with temporary_workdir() as tmp_dir:
+        queue = JobQueue(os.path.join(tmp_dir, "bench_queue.db"), worker_id='bench')
+        results = {}
+
+        started = time.perf_counter()
+        for i in range(single):
+            queue.enqueue('rotate_password', {'account_id': i})
+        results['enqueue_single'] = _result(single, time.perf_counter() - started)
+        queue.complete(job.id for job in queue.claim(single))
+
+        payloads = [{'kind': 'review_reminder', 'payload': {'order_id': str(i), 'game_name': GAMES[i % len(GAMES)]}}
+                    for i in range(jobs)]
+        started = time.perf_counter()
+        for offset in range(0, jobs, batch):
+            queue.enqueue_many(payloads[offset:offset + batch])
+        results['enqueue_batch'] = _result(jobs, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        claimed = 0
+        while True:
+            taken = queue.claim(batch)
+            if not taken:
+                break
+            claimed += len(taken)
+            queue.complete(job.id for job in taken)
+        results['claim_complete'] = _result(claimed, time.perf_counter() - started)
+
+        queue.enqueue_many(payloads)
+        handlers = {'review_reminder': lambda payload: True}
+        started = time.perf_counter()
+        processed = 0
+        while True:
+            done = queue.process(handlers, limit=batch)['done']
+            if not done:
+                break
+            processed += done
+        results['process'] = _result(processed, time.perf_counter() - started)
+        return results
+
+def benchmark_repositories(accounts: int = 2_000, rentals: int = 500) -> Dict[str, Dict[str, float]]:
+    """Репозитории sqlite и memory на одном сценарии: добавление, выборка, аренда, бонус, завершение
+
+    Показывает, сколько времени в сценариях приходится на хранилище.
+    """
+    from event_bus import EventBus
+    from repositories import BACKENDS, create_repositories
+
+    results = {}
+    with temporary_workdir() as tmp_dir:
+        for backend in BACKENDS:
+            bus = EventBus()
+            repos = create_repositories(backend, db_path=os.path.join(tmp_dir, f"bench_repos_{backend}.db"),
+                                        events=bus)
+            numbers = iter(range(accounts))
+            results[f'{backend}.add_account'] = measure(
+                lambda: repos.accounts.add(f"acc_{next(numbers)}", "password", GAMES[0]), accounts
+            )
+            results[f'{backend}.list_available'] = measure(lambda: repos.accounts.list_available(GAMES[0]), 20)
+            pending = iter(account['id'] for account in repos.accounts.list_available()[:rentals])
+            results[f'{backend}.start_rental'] = measure(
+                lambda: repos.rentals.start(next(pending), "bench_user", 1), rentals
+            )
+            results[f'{backend}.grant_bonus'] = measure(
+                lambda: repos.bonuses.grant("bench_user", 30, "benchmark"), rentals
+            )
+            results[f'{backend}.expire_due'] = measure(repos.rentals.expire_due, 20)
+            bus.close()
+    return results
+
+def benchmark_messenger_waits(messages: int = 5, latency: float = 0.05) -> Dict[str, Dict[str, float]]:
+    """Действия FunPayMessenger на локальном двойнике: прежние паузы (fixed) против ожиданий по условиям
+
+    Нужен Chrome; без браузера бенчмарк пропускается.
+    """
+    from browser_waits import WAIT_STRATEGIES
+    from funpay_messenger import FunPayMessenger
+
+    results = {}
+    with FunPayStubServer(settings=StubSettings(latency=latency)) as stub:
+        for strategy in WAIT_STRATEGIES:
+            try:
+                messenger = FunPayMessenger(headless=True, wait_strategy=strategy)
+            except Exception as e:
+                print(f"⚠️ Chrome недоступен, бенчмарк ожиданий пропущен: {e}")
+                return {}
+            try:
+                messenger.base_url = stub.url
+                messenger.login_to_funpay("bench", "bench")
+                for order_id in range(1, messages + 1):
+                    messenger.send_message_to_order(str(order_id), "Данные аккаунта")
+                messenger.check_unread_messages()
+                messenger.create_rental_listing(GAMES[0], 50.0)
+            finally:
+                messenger.close()
+            for action, values in messenger.waits.timings.items():
+                results[f'{strategy}.{action}'] = _result(len(values), sum(values))
+    return results
+
+BENCHMARKS = {
+    'callback_router': benchmark_callback_router,
+    'settings_tokens': benchmark_settings_tokens,
+    'rental_lifecycle': benchmark_rental_lifecycle,
+    'funpay_parsing': benchmark_funpay_parsing,
+    'funpay_stub': benchmark_funpay_stub,
+    'bot_handlers': benchmark_bot_handlers,
+    'account_search': benchmark_account_search,
+    'account_records': benchmark_account_records,
+    'scheduler': benchmark_scheduler,
+    'job_queue': benchmark_job_queue,
+    'repositories': benchmark_repositories,
+    'messenger_waits': benchmark_messenger_waits,
+}
+
+# Бенчмарки, которым передается размер набора данных
+DATASET_BENCHMARKS = {'rental_lifecycle', 'bot_handlers'}
+
+def print_results(name: str, results: Dict[str, Dict[str, float]]):
+    """Вывод результатов бенчмарка"""
+    print(f"\n📊 {name}")
+    for case, stats in results.items():
+        memory = f"  {stats['peak_mb']:>8.1f} МБ" if 'peak_mb' in stats else ''
+        if 'wakeups' in stats:
+            memory += f"  {stats['wakeups']:>6} пробуждений  {stats['cpu_ms']:>8.1f} мс CPU"
+        if 'lateness_ms' in stats:
+            memory += f"  опоздание {stats['lateness_ms']:.0f} мс"
+        print(f"   {case:<28} {stats['us_per_op']:>12.2f} мкс/оп  {stats['ops_per_second']:>12.0f} оп/с{memory}")
+
+def environment_info(spec: DatasetSpec) -> Dict:
+    """Окружение запуска для сопоставимости результатов"""
+    return {
+        'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'dataset': asdict(spec)
+    }
+
+def save_results(path: str, results: Dict[str, Dict[str, Dict[str, float]]], spec: DatasetSpec):
+    """Сохранение результатов в JSON"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment_info(spec), 'results': results}, f, ensure_ascii=False, indent=2)
+
+def compare_results(baseline: Dict, results: Dict[str, Dict[str, Dict[str, float]]],
+                    threshold: float) -> List[Dict]:
+    """Сравнение с базовыми результатами; замедление больше threshold - регрессия"""
+    regressions = []
+    for name, cases in results.items():
+        for case, stats in cases.items():
+            base = baseline.get('results', {}).get(name, {}).get(case)
+            if not base or not base.get('us_per_op'):
+                continue
+            ratio = stats['us_per_op'] / base['us_per_op']
+            if ratio > 1 + threshold:
+                regressions.append({
+                    'benchmark': name,
+                    'case': case,
+                    'baseline_us': base['us_per_op'],
+                    'current_us': stats['us_per_op'],
+                    'ratio': ratio
+                })
+    return regressions
+
+def main(argv=None):
+    """Запуск выбранных бенчмарков"""
+    defaults = DatasetSpec()
+    parser = argparse.ArgumentParser(description="Бенчмарки Steam Rental System")
+    parser.add_argument('names', nargs='*', help=f"Бенчмарки ({', '.join(BENCHMARKS)}), по умолчанию все")
+    parser.add_argument('--save', help="Сохранить результаты в JSON")
+    parser.add_argument('--compare', help="Сравнить с сохраненными результатами")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Допустимое замедление (0.2 = 20%%)")
+    parser.add_argument('--accounts', type=int, default=defaults.accounts)
+    parser.add_argument('--games', type=int, default=defaults.games)
+    parser.add_argument('--rentals', type=int, default=defaults.rentals)
+    parser.add_argument('--reviews', type=int, default=defaults.reviews)
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    args = parser.parse_args(argv)
+
+    names = args.names or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"❌ Неизвестный бенчмарк: {name}. Доступные: {', '.join(BENCHMARKS)}")
+            return 1
+
+    spec = DatasetSpec(accounts=args.accounts, games=args.games, rentals=args.rentals,
+                       reviews=args.reviews, seed=args.seed)
+    results = {}
+    for name in names:
+        results[name] = BENCHMARKS[name](spec) if name in DATASET_BENCHMARKS else BENCHMARKS[name]()
+        print_results(name, results[name])
+
+    if args.save:
+        save_results(args.save, results, spec)
+        print(f"\n💾 Результаты сохранены: {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, args.threshold)
+        if regressions:
+            print(f"\n❌ Регрессии (замедление больше {args.threshold:.0%}):")
+            for item in regressions:
+                print(f"   {item['benchmark']}.{item['case']}: {item['baseline_us']:.2f} → "
+                      f"{item['current_us']:.2f} мкс/оп (×{item['ratio']:.2f})")
+            return 1
+        print(f"\n✅ Регрессий нет (порог {args.threshold:.0%})")
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
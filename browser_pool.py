@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🌐 Пул браузеров FunPayMessenger
+Chrome запускается и входит в FunPay один раз, после чего браузер выдается задачам
+в аренду (lease) и возвращается в пул. Перед выдачей браузер проверяется; после
+max_uses задач, при росте памяти страницы больше max_memory_mb или после ошибки
+WebDriver он пересоздается. Браузеры, простаивающие idle_timeout секунд, закрываются
+(около 300 МБ на каждый Chrome) и запускаются снова при следующем спросе.
+
+Массовая отправка (send_bulk) распределяет заказы по браузерам пула; в один чат
+пишется не чаще одного сообщения в CHAT_MESSAGE_INTERVAL секунд.
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+from config import Config
+from metrics import Counter, Gauge
+
+BROWSER_WORKERS = Gauge('steam_rental_browser_workers', 'Браузеры пула FunPayMessenger', ('state',))
+BROWSER_RECYCLED = Counter('steam_rental_browser_recycled', 'Закрытые браузеры пула', ('reason',))
+
+HEAP_SCRIPT = "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : 0"
+
+
+class ChatRateLimiter:
+    """Не чаще одного сообщения в interval секунд в каждый чат"""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = Config.CHAT_MESSAGE_INTERVAL if interval is None else interval
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+
+    def wait(self, chat_id: str) -> float:
+        """Ожидание очереди чата; возвращает время ожидания"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(chat_id, now))
+            self._next_slot[chat_id] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class BrowserWorker:
+    """Браузер пула: мессенджер и счетчики использования"""
+
+    def __init__(self, worker_id: int, messenger):
+        self.id = worker_id
+        self.messenger = messenger
+        self.uses = 0
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    def healthy(self) -> bool:
+        """Браузер отвечает на команды WebDriver"""
+        try:
+            return self.messenger.driver.execute_script("return document.readyState") is not None
+        except Exception:
+            return False
+
+    def memory_mb(self) -> float:
+        """Память JS-кучи открытой страницы (performance.memory, только Chrome)"""
+        try:
+            return (self.messenger.driver.execute_script(HEAP_SCRIPT) or 0) / 2 ** 20
+        except Exception:
+            return 0.0
+
+    def close(self):
+        try:
+            self.messenger.close()
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"⚠️ Ошибка закрытия браузера #{self.id}: {e}")
+
+
+def default_factory():
+    """Мессенджер с headless Chrome"""
+    from funpay_messenger import FunPayMessenger
+    return FunPayMessenger(headless=True)
+
+
+def default_login(messenger) -> bool:
+    """Вход по FUNPAY_LOGIN/FUNPAY_PASSWORD (без них браузер работает по cookies профиля)"""
+    if Config.FUNPAY_LOGIN and Config.FUNPAY_PASSWORD:
+        return messenger.login_to_funpay(Config.FUNPAY_LOGIN, Config.FUNPAY_PASSWORD)
+    return True
+
+
+class BrowserPool:
+    """Пул из не более чем size браузеров, запускаемых по мере спроса"""
+
+    def __init__(self, size: Optional[int] = None, factory: Callable = default_factory,
+                 login: Optional[Callable] = default_login, max_uses: Optional[int] = None,
+                 max_memory_mb: Optional[float] = None, idle_timeout: Optional[float] = None,
+                 limiter: Optional[ChatRateLimiter] = None):
+        self.size = size or Config.BROWSER_POOL_SIZE
+        self.factory = factory
+        self.login = login
+        self.max_uses = max_uses or Config.BROWSER_MAX_USES
+        self.max_memory_mb = max_memory_mb or Config.BROWSER_MAX_MEMORY_MB
+        self.idle_timeout = Config.BROWSER_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self.limiter = limiter or ChatRateLimiter()
+        self.logger = logging.getLogger(__name__)
+        self._cond = threading.Condition()
+        # LIFO: занятыми остаются недавно использованные браузеры, лишние простаивают и закрываются
+        self._idle: List[BrowserWorker] = []
+        self._total = 0
+        self._ids = 0
+        self._closed = False
+        self._stop = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+        self.counters = {'created': 0, 'recycled': 0, 'evicted': 0}
+
+    def _create(self) -> BrowserWorker:
+        with self._cond:
+            self._ids += 1
+            worker_id = self._ids
+        messenger = self.factory()
+        worker = BrowserWorker(worker_id, messenger)
+        if self.login and not self.login(messenger):
+            worker.close()
+            raise RuntimeError(f"Браузер #{worker_id}: вход в FunPay не выполнен")
+        with self._cond:
+            self.counters['created'] += 1
+        self.logger.info(f"🌐 Запущен браузер #{worker_id}")
+        self._start_reaper()
+        return worker
+
+    def _checkout(self, timeout: Optional[float]) -> BrowserWorker:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Пул браузеров закрыт")
+                    if self._idle:
+                        worker = self._idle.pop()
+                        break
+                    if self._total < self.size:
+                        self._total += 1
+                        worker = None
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"Нет свободного браузера за {timeout} с")
+                    self._cond.wait(remaining)
+                self._update_gauges()
+
+            if worker is None:
+                try:
+                    return self._create()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                        self._update_gauges()
+                    raise
+            if worker.healthy():
+                return worker
+            self._discard(worker, 'unhealthy')
+
+    def _checkin(self, worker: BrowserWorker, failed: bool):
+        worker.uses += 1
+        worker.last_used = time.monotonic()
+        if failed:
+            reason = 'error'
+        elif worker.uses >= self.max_uses:
+            reason = 'uses'
+        elif worker.memory_mb() > self.max_memory_mb:
+            reason = 'memory'
+        else:
+            reason = None
+        with self._cond:
+            if reason is None and not self._closed:
+                self._idle.append(worker)
+                self._cond.notify()
+                self._update_gauges()
+                return
+        self._discard(worker, reason or 'closed')
+
+    def _discard(self, worker: BrowserWorker, reason: str):
+        """Закрытие браузера с освобождением места в пуле"""
+        worker.close()
+        with self._cond:
+            self._total -= 1
+            self.counters['recycled'] += 1
+            self._cond.notify()
+            self._update_gauges()
+        BROWSER_RECYCLED.labels(reason).inc()
+        self.logger.info(f"♻️ Браузер #{worker.id} закрыт ({reason}, задач: {worker.uses})")
+
+    def _update_gauges(self):
+        BROWSER_WORKERS.labels('idle').set(len(self._idle))
+        BROWSER_WORKERS.labels('busy').set(self._total - len(self._idle))
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator:
+        """Мессенджер в аренду на время блока with
+
+        Ошибка внутри блока закрывает браузер (следующая задача получит новый).
+        TimeoutError - все браузеры заняты дольше timeout.
+        """
+        worker = self._checkout(timeout)
+        failed = False
+        try:
+            yield worker.messenger
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._checkin(worker, failed)
+
+    def evict_idle(self) -> int:
+        """Закрытие браузеров, простаивающих idle_timeout секунд (0 - не закрывать)"""
+        if not self.idle_timeout:
+            return 0
+        now = time.monotonic()
+        with self._cond:
+            expired = [worker for worker in self._idle if now - worker.last_used >= self.idle_timeout]
+            if not expired:
+                return 0
+            self._idle = [worker for worker in self._idle if worker not in expired]
+            self.counters['evicted'] += len(expired)
+        for worker in expired:
+            self._discard(worker, 'idle')
+        return len(expired)
+
+    def _start_reaper(self):
+        with self._cond:
+            if self._reaper is not None or not self.idle_timeout:
+                return
+            self._reaper = threading.Thread(target=self._reap, name="browser-pool-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap(self):
+        while not self._stop.wait(max(self.idle_timeout / 2, 0.05)):
+            try:
+                self.evict_idle()
+            except Exception as e:
+                self.logger.error(f"❌ Ошибка закрытия простаивающих браузеров: {e}")
+
+    def send_bulk(self, order_ids: List[str], message_template: str, **kwargs) -> Dict[str, bool]:
+        """Массовая отправка сообщений параллельно на браузерах пула"""
+        message = message_template.format(**kwargs) if kwargs else message_template
+
+        def send(order_id: str) -> bool:
+            try:
+                with self.lease() as messenger:
+                    # Очередь чата занимается уже с браузером: ожидание свободного браузера
+                    # не должно съедать интервал между сообщениями в один чат
+                    self.limiter.wait(order_id)
+                    return messenger.send_message_to_order(order_id, message)
+            except Exception as e:
+                self.logger.error(f"Ошибка массовой отправки к заказу {order_id}: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='browser-send') as executor:
+            return dict(zip(order_ids, executor.map(send, order_ids)))
+
+    def stats(self) -> Dict[str, int]:
+        """Браузеры пула: всего, свободных, занятых и счетчики запусков/закрытий"""
+        with self._cond:
+            return dict(self.counters, total=self._total, idle=len(self._idle),
+                        busy=self._total - len(self._idle))
+
+    def close(self):
+        """Закрытие всех свободных браузеров; занятые закроются при возврате"""
+        self._stop.set()
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for worker in idle:
+            self._discard(worker, 'closed')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
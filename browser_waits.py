@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+⏳ Стратегии ожидания браузера для FunPayMessenger
+Действия мессенджера ждут не фиксированные секунды, а условия с дедлайном:
+- page - загрузка страницы (document.readyState) и нужный элемент или затишье сети;
+- element - появление (или кликабельность) элемента;
+- after - результат действия (смена URL, отправка формы) или затишье сети.
+
+Каждый метод принимает delay - фиксированную паузу прежней реализации. Ее использует
+FixedDelayWaits (MESSENGER_WAIT_STRATEGY=fixed): старое поведение для сравнения и отката.
+Время действий пишется в гистограмму steam_rental_messenger_action_seconds и в report().
+"""
+
+import time
+import logging
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from config import Config
+from metrics import Histogram
+
+MESSENGER_ACTION_SECONDS = Histogram(
+    'steam_rental_messenger_action_seconds', 'Длительность действий FunPayMessenger', ('action', 'strategy')
+)
+
+Locator = Tuple[str, str]
+
+NETWORK_STATE_SCRIPT = """
+return [document.readyState,
+        performance.getEntriesByType('resource').length,
+        window.jQuery ? window.jQuery.active : 0];
+"""
+
+
+def page_loaded(driver) -> bool:
+    """Документ загружен полностью"""
+    return driver.execute_script("return document.readyState") == 'complete'
+
+
+class NetworkIdle:
+    """Условие затишья сети: страница загружена, нет активных AJAX-запросов jQuery
+    и число загруженных ресурсов не меняется idle_time секунд"""
+
+    def __init__(self, idle_time: Optional[float] = None):
+        self.idle_time = Config.MESSENGER_IDLE_TIME if idle_time is None else idle_time
+        self._resources: Optional[int] = None
+        self._since = 0.0
+
+    def __call__(self, driver) -> bool:
+        state, resources, active = driver.execute_script(NETWORK_STATE_SCRIPT)
+        now = time.monotonic()
+        if state != 'complete' or active or resources != self._resources:
+            self._resources, self._since = resources, now
+            return False
+        return now - self._since >= self.idle_time
+
+
+def form_submitted(element) -> Callable:
+    """Форма отправлена: поле ушло со страницы (переход) или очищено (отправка через AJAX)"""
+    def condition(driver) -> bool:
+        try:
+            return element.get_attribute('value') == ''
+        except StaleElementReferenceException:
+            return True
+    return condition
+
+
+class ConditionWaits:
+    """Ожидание по условиям с дедлайном timeout"""
+
+    name = 'conditions'
+
+    def __init__(self, driver, timeout: Optional[float] = None, poll: Optional[float] = None):
+        self.driver = driver
+        self.timeout = timeout or Config.MESSENGER_WAIT_TIMEOUT
+        self.poll = poll or Config.MESSENGER_WAIT_POLL
+        self.timings: Dict[str, List[float]] = {}
+        self.logger = logging.getLogger(__name__)
+
+    def _until(self, condition: Callable, timeout: Optional[float] = None, message: str = ""):
+        return WebDriverWait(self.driver, timeout or self.timeout, poll_frequency=self.poll).until(condition, message)
+
+    def page(self, url: str, locator: Optional[Locator] = None, delay: float = 3.0):
+        """Переход по url; возвращает элемент locator (если задан)
+
+        Без locator ждет затишья сети. TimeoutException - страница не готова к дедлайну.
+        """
+        self.driver.get(url)
+        self._until(page_loaded, message=f"страница {url} не загрузилась")
+        if locator:
+            return self.element(locator)
+        self._until(NetworkIdle(), message=f"сеть на {url} не затихла")
+        return None
+
+    def element(self, locator: Locator, clickable: bool = False, delay: float = 0.0):
+        """Элемент locator, когда он появился (clickable - и доступен для клика)"""
+        condition = EC.element_to_be_clickable(locator) if clickable else EC.presence_of_element_located(locator)
+        return self._until(condition, message=f"элемент {locator[1]} не найден")
+
+    def after(self, condition: Optional[Callable] = None, delay: float = 1.0,
+              timeout: Optional[float] = None) -> bool:
+        """Ожидание результата действия (по умолчанию - затишья сети); False - дедлайн истек"""
+        try:
+            self._until(condition or NetworkIdle(), timeout)
+            return True
+        except TimeoutException:
+            return False
+
+    @contextmanager
+    def action(self, name: str):
+        """Замер времени действия мессенджера"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.timings.setdefault(name, []).append(elapsed)
+            MESSENGER_ACTION_SECONDS.labels(name, self.name).observe(elapsed)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Время действий: число, среднее и максимум (мс)"""
+        return {
+            name: {'count': len(values), 'avg_ms': sum(values) / len(values) * 1000, 'max_ms': max(values) * 1000}
+            for name, values in self.timings.items()
+        }
+
+
+class FixedDelayWaits(ConditionWaits):
+    """Прежнее поведение: фиксированные паузы time.sleep(delay)"""
+
+    name = 'fixed'
+
+    def page(self, url, locator=None, delay=3.0):
+        self.driver.get(url)
+        time.sleep(delay)
+        return self.element(locator) if locator else None
+
+    def element(self, locator, clickable=False, delay=0.0):
+        time.sleep(delay)
+        return super().element(locator, clickable)
+
+    def after(self, condition=None, delay=1.0, timeout=None):
+        time.sleep(delay)
+        return True
+
+
+def timed_action(name: str):
+    """Декоратор метода мессенджера: замер времени через self.waits.action(name)"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.waits.action(name):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+WAIT_STRATEGIES = {strategy.name: strategy for strategy in (ConditionWaits, FixedDelayWaits)}
+
+
+def create_waits(driver, strategy: Optional[str] = None, **kwargs) -> ConditionWaits:
+    """Стратегия ожидания по имени (по умолчанию Config.MESSENGER_WAIT_STRATEGY)"""
+    strategy = strategy or Config.MESSENGER_WAIT_STRATEGY
+    if strategy not in WAIT_STRATEGIES:
+        raise ValueError(f"Неизвестная стратегия ожидания: {strategy}. Доступные: {', '.join(WAIT_STRATEGIES)}")
+    return WAIT_STRATEGIES[strategy](driver, **kwargs)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧭 Маршрутизатор callback-запросов Telegram бота
+Компактное версионированное кодирование callback_data и диспетчеризация по таблице
+"""
+
+import time
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+# Версия формата callback_data: "1:<код маршрута>:<аргумент>:<аргумент>..."
+CALLBACK_VERSION = "1"
+CALLBACK_SEPARATOR = ":"
+# Ограничение Telegram на длину callback_data (в байтах)
+CALLBACK_MAX_LENGTH = 64
+
+
+class CallbackDataError(ValueError):
+    """Некорректные или устаревшие данные callback-запроса"""
+
+
+@dataclass
+class Route:
+    """Описание маршрута"""
+    code: str
+    name: str
+    handler: Callable[..., Awaitable[Any]]
+    arg_types: Tuple[Callable[[str], Any], ...] = ()
+
+
+@dataclass
+class RouteStats:
+    """Счетчики маршрута"""
+    calls: int = 0
+    errors: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_time': self.total_time,
+            'avg_time': self.total_time / self.calls if self.calls else 0.0,
+            'max_time': self.max_time
+        }
+
+
+class CallbackRouter:
+    """Таблица маршрутов callback-запросов: код → обработчик"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._routes: Dict[str, Route] = {}
+        self._legacy: Dict[str, Route] = {}
+        self._stats: Dict[str, RouteStats] = {}
+        self._invalid = 0
+
+    def register(self, code: str, handler: Callable[..., Awaitable[Any]],
+                 arg_types: Sequence[Callable[[str], Any]] = (), name: Optional[str] = None,
+                 legacy: Optional[str] = None) -> Route:
+        """Регистрация маршрута
+
+        legacy - префикс старого формата ("rent_time" для "rent_time_5_3"),
+        чтобы кнопки из уже отправленных сообщений продолжали работать.
+        """
+        if CALLBACK_SEPARATOR in code:
+            raise ValueError(f"Код маршрута не может содержать '{CALLBACK_SEPARATOR}': {code}")
+        if code in self._routes:
+            raise ValueError(f"Маршрут {code} уже зарегистрирован")
+
+        route = Route(code=code, name=name or code, handler=handler, arg_types=tuple(arg_types))
+        self._routes[code] = route
+        self._stats[route.name] = RouteStats()
+        if legacy:
+            self._legacy[legacy] = route
+        return route
+
+    def encode(self, code: str, *args: Any) -> str:
+        """Формирование callback_data для маршрута"""
+        route = self._routes.get(code)
+        if route is None:
+            raise CallbackDataError(f"Неизвестный маршрут: {code}")
+        if len(args) != len(route.arg_types):
+            raise CallbackDataError(
+                f"Маршрут {route.name} ожидает {len(route.arg_types)} аргументов, получено {len(args)}"
+            )
+
+        data = CALLBACK_SEPARATOR.join((CALLBACK_VERSION, code) + tuple(str(arg) for arg in args))
+        if len(data.encode('utf-8')) > CALLBACK_MAX_LENGTH:
+            raise CallbackDataError(f"callback_data длиннее {CALLBACK_MAX_LENGTH} байт: {data}")
+        return data
+
+    def decode(self, data: str) -> Tuple[Route, tuple]:
+        """Разбор и валидация callback_data (один раз, до вызова обработчика)"""
+        if not data:
+            raise CallbackDataError("Пустые данные callback-запроса")
+
+        parts = data.split(CALLBACK_SEPARATOR)
+        if len(parts) >= 2 and parts[0] == CALLBACK_VERSION:
+            route = self._routes.get(parts[1])
+            raw_args = parts[2:]
+        else:
+            route, raw_args = self._decode_legacy(data)
+
+        if route is None:
+            raise CallbackDataError(f"Неизвестный маршрут: {data}")
+        if len(raw_args) != len(route.arg_types):
+            raise CallbackDataError(f"Неверное число аргументов для {route.name}: {data}")
+
+        try:
+            args = tuple(convert(raw) for convert, raw in zip(route.arg_types, raw_args))
+        except (TypeError, ValueError) as e:
+            raise CallbackDataError(f"Некорректные аргументы для {route.name}: {data} ({e})")
+
+        return route, args
+
+    def _decode_legacy(self, data: str) -> Tuple[Optional[Route], list]:
+        """Разбор старого формата вида 'show_accounts' или 'rent_time_5_3'"""
+        route = self._legacy.get(data)
+        if route is not None:
+            return route, []
+
+        parts = data.split("_")
+        route = self._legacy.get("_".join(parts[:2]))
+        return route, parts[2:]
+
+    async def dispatch(self, data: str, *handler_args: Any) -> bool:
+        """Вызов обработчика для callback_data
+
+        handler_args передаются перед аргументами из callback_data
+        (обычно update и context).
+        """
+        try:
+            route, args = self.decode(data)
+        except CallbackDataError as e:
+            self._invalid += 1
+            self.logger.warning(f"Отклонен callback-запрос: {e}")
+            return False
+
+        stats = self._stats[route.name]
+        started = time.perf_counter()
+        try:
+            await route.handler(*handler_args, *args)
+            return True
+        except Exception as e:
+            stats.errors += 1
+            self.logger.exception(f"Ошибка обработчика {route.name}: {e}")
+            return False
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.calls += 1
+            stats.total_time += elapsed
+            if elapsed > stats.max_time:
+                stats.max_time = elapsed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Счетчики вызовов, ошибок и задержек по маршрутам"""
+        return {
+            'routes': {name: stats.as_dict() for name, stats in self._stats.items()},
+            'invalid': self._invalid
+        }
+
+    def reset_stats(self):
+        """Сброс счетчиков"""
+        for name in self._stats:
+            self._stats[name] = RouteStats()
+        self._invalid = 0
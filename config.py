@@ -6,7 +6,21 @@ load_dotenv()
 class Config:
     # Настройки FunPay
     FUNPAY_TOKEN = os.getenv('FUNPAY_TOKEN', 'your_funpay_token_here')
-    FUNPAY_BASE_URL = 'https://funpay.com'
+    # Адрес FunPay (для тестов можно указать локальный двойник funpay_stub_server.py)
+    FUNPAY_BASE_URL = os.getenv('FUNPAY_BASE_URL', 'https://funpay.com').rstrip('/')
+    FUNPAY_TIMEOUT = float(os.getenv('FUNPAY_TIMEOUT', '15'))
+    # Ожидания браузера FunPayMessenger: conditions (по условиям) или fixed (прежние паузы)
+    MESSENGER_WAIT_STRATEGY = os.getenv('MESSENGER_WAIT_STRATEGY', 'conditions')
+    MESSENGER_WAIT_TIMEOUT = float(os.getenv('MESSENGER_WAIT_TIMEOUT', '10'))
+    MESSENGER_WAIT_POLL = float(os.getenv('MESSENGER_WAIT_POLL', '0.1'))
+    MESSENGER_IDLE_TIME = float(os.getenv('MESSENGER_IDLE_TIME', '0.5'))
+    # Пул браузеров (browser_pool.py): размер, пересоздание после задач или роста памяти (МБ), простой (секунды)
+    BROWSER_POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', '2'))
+    BROWSER_MAX_USES = int(os.getenv('BROWSER_MAX_USES', '50'))
+    BROWSER_MAX_MEMORY_MB = float(os.getenv('BROWSER_MAX_MEMORY_MB', '300'))
+    BROWSER_IDLE_TIMEOUT = float(os.getenv('BROWSER_IDLE_TIMEOUT', '300'))
+    # Минимальный интервал между сообщениями в один чат (секунды)
+    CHAT_MESSAGE_INTERVAL = float(os.getenv('CHAT_MESSAGE_INTERVAL', '3'))
     
     # Устаревшие настройки (для совместимости)
     FUNPAY_LOGIN = os.getenv('FUNPAY_LOGIN', '')
@@ -16,16 +30,59 @@ class Config:
     TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN', '8200815840:AAFUEvg-sNOvNctvqQ2yBrrpKBvJxlwKg5g')
     TELEGRAM_ADMIN_ID = os.getenv('TELEGRAM_ADMIN_ID', '7890395437')
     
+    # Отладка конфигурации при запуске (выводит начало токенов)
+    DEBUG_CONFIG = os.getenv('DEBUG_CONFIG', 'False').lower() == 'true'
+    
     # Проверка и логирование конфигурации
-    print(f"🔧 Config: TELEGRAM_TOKEN = {TELEGRAM_TOKEN[:20] if TELEGRAM_TOKEN else 'НЕ НАЙДЕН'}...")
-    print(f"🔧 Config: TELEGRAM_ADMIN_ID = {TELEGRAM_ADMIN_ID}")
-    print(f"🔧 Config: FUNPAY_TOKEN = {FUNPAY_TOKEN[:20] if FUNPAY_TOKEN else 'НЕ НАЙДЕН'}...")
+    if DEBUG_CONFIG:
+        print(f"🔧 Config: TELEGRAM_TOKEN = {TELEGRAM_TOKEN[:20] if TELEGRAM_TOKEN else 'НЕ НАЙДЕН'}...")
+        print(f"🔧 Config: TELEGRAM_ADMIN_ID = {TELEGRAM_ADMIN_ID}")
+        print(f"🔧 Config: FUNPAY_TOKEN = {FUNPAY_TOKEN[:20] if FUNPAY_TOKEN else 'НЕ НАЙДЕН'}...")
     
     # Настройки Steam
     STEAM_API_KEY = os.getenv('STEAM_API_KEY', 'your_steam_api_key_here')
     
     # Настройки базы данных
-    DATABASE_PATH = 'steam_rental.db'
+    DATABASE_PATH = os.getenv('DATABASE_PATH', 'steam_rental.db')
+    # Хранилище аккаунтов, аренд и бонусов: sqlite (рабочий режим) или memory (тесты, бенчмарки)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'sqlite')
+    
+    # Резервное копирование (порции страниц с паузой, чтобы не блокировать запись)
+    BACKUP_DIR = os.getenv('BACKUP_DIR', 'backups')
+    BACKUP_INTERVAL_MINUTES = int(os.getenv('BACKUP_INTERVAL_MINUTES', '60'))
+    BACKUP_PAGES_PER_STEP = int(os.getenv('BACKUP_PAGES_PER_STEP', '256'))
+    BACKUP_STEP_SLEEP = float(os.getenv('BACKUP_STEP_SLEEP', '0.01'))
+    BACKUP_KEEP_HOURLY = int(os.getenv('BACKUP_KEEP_HOURLY', '24'))
+    BACKUP_KEEP_DAILY = int(os.getenv('BACKUP_KEEP_DAILY', '7'))
+    
+    # Хранение истории (старые строки переносятся в архивную базу, см. retention_manager.py)
+    ARCHIVE_DATABASE_PATH = os.getenv('ARCHIVE_DATABASE_PATH', 'steam_rental_archive.db')
+    RETENTION_POLICIES = os.getenv('RETENTION_POLICIES', '')
+    RETENTION_TIME = os.getenv('RETENTION_TIME', '04:00')
+    RETENTION_BATCH_SIZE = int(os.getenv('RETENTION_BATCH_SIZE', '1000'))
+    RETENTION_BATCH_PAUSE = float(os.getenv('RETENTION_BATCH_PAUSE', '0.05'))
+    RETENTION_VACUUM_PAGES = int(os.getenv('RETENTION_VACUUM_PAGES', '10000'))
+    
+    # Дневные сводки аренд (statistics_rollup.py)
+    STATISTICS_ROLLUP_MINUTES = int(os.getenv('STATISTICS_ROLLUP_MINUTES', '15'))
+    
+    # Шина событий: размер очереди каждого подписчика (event_bus.py)
+    EVENT_QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', '1000'))
+    
+    # Пул потоков для блокирующих задач event loop (async_runtime.py)
+    RUNTIME_WORKERS = int(os.getenv('RUNTIME_WORKERS', '4'))
+    
+    # Одновременно выполняемые задачи планировщика (job_executor.py)
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '3'))
+    
+    # Аренда лидерства: задачи выполняет один процесс из нескольких (leader_lease.py)
+    LEASE_TTL = float(os.getenv('LEASE_TTL', '30'))
+    INSTANCE_ID = os.getenv('INSTANCE_ID', '')
+    
+    # Очередь отложенных задач (job_queue.py)
+    JOB_QUEUE_POLL_SECONDS = float(os.getenv('JOB_QUEUE_POLL_SECONDS', '30'))
+    JOB_QUEUE_VISIBILITY_TIMEOUT = float(os.getenv('JOB_QUEUE_VISIBILITY_TIMEOUT', '300'))
+    JOB_QUEUE_MAX_ATTEMPTS = int(os.getenv('JOB_QUEUE_MAX_ATTEMPTS', '5'))
     
     # Настройки браузера
     BROWSER_HEADLESS = os.getenv('BROWSER_HEADLESS', 'True').lower() == 'true'
@@ -34,6 +91,7 @@ class Config:
     # Настройки аренды
     DEFAULT_RENTAL_DURATION = 24  # часы
     PASSWORD_CHANGE_DELAY = 5  # минуты после окончания аренды
+    REVIEW_REMINDER_DELAY = 30  # минуты после окончания аренды
     
     # Часто задаваемые вопросы
     FAQ = {
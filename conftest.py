@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧪 Общие настройки pytest
+Тесты, создающие Database() без пути, работают с временной базой, а не с рабочей steam_rental.db.
+"""
+
+import os
+import atexit
+import shutil
+import tempfile
+
+# До импорта config: Config читает DATABASE_PATH при загрузке модуля
+_TEST_DIR = tempfile.mkdtemp(prefix="steam_rental_test_")
+os.environ['DATABASE_PATH'] = os.path.join(_TEST_DIR, "steam_rental.db")
+atexit.register(shutil.rmtree, _TEST_DIR, ignore_errors=True)
@@ -1,16 +1,36 @@
 import sqlite3
-import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from config import Config
+from metrics import Counter, Histogram, instrument_methods
+from search_index import ACCOUNT_SEARCH
+from event_bus import (EventBus, default_bus, AccountAdded, AccountDeleted, BonusGranted,
+                       RentalExpired, RentalStarted)
+import query_profiler
 
+DB_OPERATION_SECONDS = Histogram(
+    'steam_rental_db_operation_seconds', 'Длительность методов Database', ('method',),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+DB_OPERATION_ERRORS = Counter(
+    'steam_rental_db_operation_errors', 'Исключения в методах Database', ('method',)
+)
+
+@instrument_methods(DB_OPERATION_SECONDS, DB_OPERATION_ERRORS, exclude=('connect',))
 class Database:
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, events: Optional[EventBus] = None):
         self.db_path = db_path or Config.DATABASE_PATH
+        # События публикуются после commit
+        self.events = events if events is not None else default_bus
         self.init_database()
     
+    def connect(self) -> sqlite3.Connection:
+        """Соединение с базой (с профилированием запросов при QUERY_PROFILING=true)"""
+        return query_profiler.connect(self.db_path)
+    
     def init_database(self):
         """Инициализация базы данных и создание таблиц"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             
             # Таблица аккаунтов Steam
@@ -106,22 +126,108 @@ class Database:
                 )
             ''')
             
+            # Журнал выручки (только добавление) и нарастающие итоги по дням и играм
+            ledger_exists = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'revenue_ledger'"
+            ).fetchone()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS revenue_ledger (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    entry_type TEXT NOT NULL,  -- rental | bonus
+                    rental_id INTEGER,
+                    order_id TEXT,
+                    user_id TEXT,
+                    account_id INTEGER,
+                    game_name TEXT NOT NULL DEFAULT '',
+                    amount REAL NOT NULL DEFAULT 0,
+                    duration_minutes INTEGER NOT NULL DEFAULT 0,
+                    starts_at DATETIME,
+                    ends_at DATETIME,
+                    created_at DATETIME NOT NULL
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_revenue_ledger_rental ON revenue_ledger (rental_id)')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS revenue_daily (
+                    day DATE NOT NULL,
+                    game_name TEXT NOT NULL,
+                    revenue REAL NOT NULL DEFAULT 0,
+                    rentals INTEGER NOT NULL DEFAULT 0,
+                    rental_minutes INTEGER NOT NULL DEFAULT 0,
+                    bonus_minutes INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, game_name)
+                ) WITHOUT ROWID
+            ''')
+            # game_name = '*' - итог по всем играм
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS revenue_totals (
+                    game_name TEXT PRIMARY KEY,
+                    revenue REAL NOT NULL DEFAULT 0,
+                    rentals INTEGER NOT NULL DEFAULT 0,
+                    rental_minutes INTEGER NOT NULL DEFAULT 0,
+                    bonus_minutes INTEGER NOT NULL DEFAULT 0
+                ) WITHOUT ROWID
+            ''')
+            totals_update = '''
+                revenue = revenue + excluded.revenue,
+                rentals = rentals + excluded.rentals,
+                rental_minutes = rental_minutes + excluded.rental_minutes,
+                bonus_minutes = bonus_minutes + excluded.bonus_minutes
+            '''
+            totals_values = '''
+                new.amount, new.entry_type = 'rental',
+                CASE WHEN new.entry_type = 'rental' THEN new.duration_minutes ELSE 0 END,
+                CASE WHEN new.entry_type = 'bonus' THEN new.duration_minutes ELSE 0 END
+            '''
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS revenue_ledger_ai AFTER INSERT ON revenue_ledger
+                BEGIN
+                    INSERT INTO revenue_daily (day, game_name, revenue, rentals, rental_minutes, bonus_minutes)
+                    VALUES (DATE(new.created_at), new.game_name, {totals_values})
+                    ON CONFLICT (day, game_name) DO UPDATE SET {totals_update};
+                    INSERT INTO revenue_totals (game_name, revenue, rentals, rental_minutes, bonus_minutes)
+                    VALUES (new.game_name, {totals_values}), ('*', {totals_values})
+                    ON CONFLICT (game_name) DO UPDATE SET {totals_update};
+                END
+            ''')
+            for operation in ('UPDATE', 'DELETE'):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS revenue_ledger_no_{operation.lower()}
+                    BEFORE {operation} ON revenue_ledger
+                    BEGIN SELECT RAISE(ABORT, 'revenue_ledger is append-only'); END
+                ''')
+            if not ledger_exists:
+                # Аренды до появления журнала: сумма по цене аккаунта
+                cursor.execute('''
+                    INSERT INTO revenue_ledger (entry_type, rental_id, user_id, account_id, game_name, amount,
+                                                duration_minutes, starts_at, ends_at, created_at)
+                    SELECT 'rental', r.id, r.renter_id, r.account_id, COALESCE(sa.game_name, ''),
+                           r.duration_hours * COALESCE(sa.price, 0), r.duration_hours * 60,
+                           r.start_time, r.end_time, COALESCE(r.start_time, r.created_at)
+                    FROM rentals r LEFT JOIN steam_accounts sa ON sa.id = r.account_id
+                    ORDER BY r.id
+                ''')
+
+            # Полнотекстовый индекс аккаунтов (без FTS5 поиск идет через LIKE)
+            ACCOUNT_SEARCH.create(cursor)
+            
             conn.commit()
     
     def add_steam_account(self, username: str, password: str, game_name: str) -> int:
         """Добавление нового аккаунта Steam"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO steam_accounts (username, password, game_name)
                 VALUES (?, ?, ?)
             ''', (username, password, game_name))
             conn.commit()
-            return cursor.lastrowid
+        self.events.publish(AccountAdded(cursor.lastrowid, username, game_name))
+        return cursor.lastrowid
     
     def get_available_accounts(self, game_name: str = None) -> List[Dict]:
         """Получение доступных аккаунтов"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             if game_name:
                 cursor.execute('''
@@ -137,14 +243,15 @@ class Database:
             columns = [description[0] for description in cursor.description]
             return [dict(zip(columns, row)) for row in cursor.fetchall()]
     
-    def rent_account(self, account_id: int, renter_id: str, duration_hours: int) -> bool:
-        """Аренда аккаунта"""
-        with sqlite3.connect(self.db_path) as conn:
+    def rent_account(self, account_id: int, renter_id: str, duration_hours: int,
+                     price: Optional[float] = None, order_id: Optional[str] = None) -> bool:
+        """Аренда аккаунта (price - сумма заказа, по умолчанию цена аккаунта за час * часы)"""
+        with self.connect() as conn:
             cursor = conn.cursor()
             
             # Проверяем, доступен ли аккаунт
             cursor.execute('''
-                SELECT is_rented FROM steam_accounts WHERE id = ?
+                SELECT is_rented, price, game_name FROM steam_accounts WHERE id = ?
             ''', (account_id,))
             
             result = cursor.fetchone()
@@ -152,7 +259,7 @@ class Database:
                 return False
             
             start_time = datetime.now()
-            end_time = start_time + datetime.timedelta(hours=duration_hours)
+            end_time = start_time + timedelta(hours=duration_hours)
             
             # Обновляем статус аккаунта
             cursor.execute('''
@@ -167,6 +274,13 @@ class Database:
                 INSERT INTO rentals (account_id, renter_id, start_time, end_time, duration_hours)
                 VALUES (?, ?, ?, ?, ?)
             ''', (account_id, renter_id, start_time, end_time, duration_hours))
+            rental_id = cursor.lastrowid
+            
+            # Выручка в журнал
+            self._record_revenue(cursor, 'rental', rental_id=rental_id, order_id=order_id,
+                                 user_id=renter_id, account_id=account_id, game_name=result[2],
+                                 amount=price if price is not None else (result[1] or 0) * duration_hours,
+                                 duration_minutes=duration_hours * 60, starts_at=start_time, ends_at=end_time)
             
             # Добавляем в историю операций
             cursor.execute('''
@@ -175,11 +289,13 @@ class Database:
             ''', (renter_id, 'rental_start', f'Начата аренда аккаунта на {duration_hours} часов'))
             
             conn.commit()
-            return True
+        self.events.publish(RentalStarted(rental_id, account_id, renter_id, result[2],
+                                          duration_hours, end_time.isoformat(sep=' ')))
+        return True
     
     def get_rental_info(self, renter_id: str) -> Optional[Dict]:
         """Получение информации об аренде пользователя"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT sa.username, sa.game_name, r.start_time, r.end_time, r.duration_hours
@@ -222,7 +338,7 @@ class Database:
     def end_expired_rentals(self) -> int:
         """Завершение истекших аренд"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connect() as conn:
                 cursor = conn.cursor()
                 
                 # Находим истекшие аренды
@@ -260,21 +376,24 @@ class Database:
                     ''', (renter_id, 'rental_end', f'Завершена аренда аккаунта #{account_id}'))
                 
                 conn.commit()
-                return expired_count
+            for rental_id, account_id, renter_id in expired_rentals:
+                self.events.publish(RentalExpired(rental_id, account_id, renter_id))
+            return expired_count
                 
         except Exception as e:
             print(f"Ошибка завершения истекших аренд: {e}")
             return 0
     
-    def create_rental(self, account_id: int, user_id: str, duration_hours: int) -> bool:
-        """Создание новой аренды"""
+    def create_rental(self, account_id: int, user_id: str, duration_hours: int,
+                      price: Optional[float] = None, order_id: Optional[str] = None) -> bool:
+        """Создание новой аренды (price - сумма заказа, по умолчанию цена аккаунта за час * часы)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connect() as conn:
                 cursor = conn.cursor()
                 
                 # Проверяем, доступен ли аккаунт
                 cursor.execute('''
-                    SELECT is_rented FROM steam_accounts WHERE id = ?
+                    SELECT is_rented, price, game_name FROM steam_accounts WHERE id = ?
                 ''', (account_id,))
                 
                 result = cursor.fetchone()
@@ -282,7 +401,7 @@ class Database:
                     return False
                 
                 start_time = datetime.now()
-                end_time = start_time + datetime.timedelta(hours=duration_hours)
+                end_time = start_time + timedelta(hours=duration_hours)
                 
                 # Обновляем статус аккаунта
                 cursor.execute('''
@@ -297,6 +416,13 @@ class Database:
                     INSERT INTO rentals (account_id, renter_id, start_time, end_time, duration_hours, status)
                     VALUES (?, ?, ?, ?, ?, 'active')
                 ''', (account_id, user_id, start_time, end_time, duration_hours))
+                rental_id = cursor.lastrowid
+                
+                # Выручка в журнал
+                self._record_revenue(cursor, 'rental', rental_id=rental_id, order_id=order_id,
+                                     user_id=user_id, account_id=account_id, game_name=result[2],
+                                     amount=price if price is not None else (result[1] or 0) * duration_hours,
+                                     duration_minutes=duration_hours * 60, starts_at=start_time, ends_at=end_time)
                 
                 # Добавляем в историю операций
                 cursor.execute('''
@@ -305,7 +431,9 @@ class Database:
                 ''', (user_id, 'rental_start', f'Начата аренда аккаунта #{account_id} на {duration_hours} часов'))
                 
                 conn.commit()
-                return True
+            self.events.publish(RentalStarted(rental_id, account_id, user_id, result[2],
+                                              duration_hours, end_time.isoformat(sep=' ')))
+            return True
                 
         except Exception as e:
             print(f"Ошибка создания аренды: {e}")
@@ -314,7 +442,7 @@ class Database:
     def get_user_rentals(self, user_id: str) -> List[Dict]:
         """Получение аренд пользователя"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT r.id, r.account_id, sa.game_name, r.start_time, r.end_time, r.duration_hours, r.status
@@ -345,7 +473,7 @@ class Database:
     def add_bonus_time(self, user_id: str, bonus_minutes: int, reason: str) -> bool:
         """Добавление бонусного времени"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connect() as conn:
                 cursor = conn.cursor()
                 
                 # Добавляем бонус
@@ -356,19 +484,26 @@ class Database:
                 
                 # Находим активную аренду пользователя
                 cursor.execute('''
-                    SELECT r.id, r.end_time
+                    SELECT r.id, r.end_time, r.account_id, sa.game_name
                     FROM rentals r
+                    LEFT JOIN steam_accounts sa ON sa.id = r.account_id
                     WHERE r.renter_id = ? AND r.status = 'active'
                     ORDER BY r.end_time DESC
                     LIMIT 1
                 ''', (user_id,))
                 
                 result = cursor.fetchone()
+                
+                # Бонусное время в журнал (без выручки)
+                self._record_revenue(cursor, 'bonus', rental_id=result[0] if result else None, user_id=user_id,
+                                     account_id=result[2] if result else None,
+                                     game_name=result[3] if result else None, duration_minutes=bonus_minutes)
+                
                 if result:
-                    rental_id, current_end_time = result
+                    rental_id, current_end_time = result[0], result[1]
                     
                     # Увеличиваем время аренды
-                    new_end_time = datetime.fromisoformat(current_end_time) + datetime.timedelta(minutes=bonus_minutes)
+                    new_end_time = datetime.fromisoformat(current_end_time) + timedelta(minutes=bonus_minutes)
                     
                     cursor.execute('''
                         UPDATE rentals 
@@ -384,16 +519,55 @@ class Database:
                     ''', (new_end_time, user_id))
                 
                 conn.commit()
-                return True
+            self.events.publish(BonusGranted(user_id, bonus_minutes, reason, result[0] if result else None))
+            return True
                 
         except Exception as e:
             print(f"Ошибка добавления бонусного времени: {e}")
             return False
     
+    def _record_revenue(self, cursor: sqlite3.Cursor, entry_type: str, rental_id: Optional[int] = None,
+                        order_id: Optional[str] = None, user_id: Optional[str] = None,
+                        account_id: Optional[int] = None, game_name: Optional[str] = None,
+                        amount: float = 0.0, duration_minutes: int = 0,
+                        starts_at: Optional[datetime] = None, ends_at: Optional[datetime] = None):
+        """Запись в журнал выручки (итоги обновляет триггер в той же транзакции)"""
+        cursor.execute('''
+            INSERT INTO revenue_ledger (entry_type, rental_id, order_id, user_id, account_id, game_name,
+                                        amount, duration_minutes, starts_at, ends_at, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (entry_type, rental_id, order_id, user_id, account_id, game_name or '', amount,
+              duration_minutes, starts_at, ends_at, datetime.now()))
+    
+    def get_revenue_total(self, game_name: Optional[str] = None) -> Dict:
+        """Нарастающий итог выручки (по всем играм или по одной)"""
+        with self.connect() as conn:
+            row = conn.execute('''
+                SELECT revenue, rentals, rental_minutes, bonus_minutes FROM revenue_totals WHERE game_name = ?
+            ''', (game_name or '*',)).fetchone() or (0.0, 0, 0, 0)
+            return {'revenue': row[0], 'rentals': row[1], 'rental_minutes': row[2], 'bonus_minutes': row[3]}
+    
+    def get_revenue_report(self, start_day: str, end_day: str, by_game: bool = True) -> List[Dict]:
+        """Выручка по дням (и играм) за период [start_day, end_day], даты в формате YYYY-MM-DD"""
+        group = "day, game_name" if by_game else "day"
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT {group}, SUM(revenue) AS revenue, SUM(rentals) AS rentals,
+                       SUM(rental_minutes) AS rental_minutes, SUM(bonus_minutes) AS bonus_minutes
+                FROM revenue_daily
+                WHERE day BETWEEN ? AND ?
+                GROUP BY {group}
+                ORDER BY {group}
+            ''', (start_day, end_day))
+            
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
     def get_user_bonuses(self, user_id: str) -> List[Dict]:
         """Получение бонусов пользователя"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT bonus_minutes, reason, created_at, is_used
@@ -419,7 +593,7 @@ class Database:
     
     def get_accounts_count_by_game(self, game_name: str) -> int:
         """Получение количества доступных аккаунтов для конкретной игры"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT COUNT(*) FROM steam_accounts 
@@ -429,7 +603,7 @@ class Database:
     
     def get_all_games(self) -> List[str]:
         """Получение списка всех игр"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT DISTINCT game_name FROM steam_accounts
@@ -438,7 +612,7 @@ class Database:
     
     def add_user(self, telegram_id: str, username: str = None, first_name: str = None, last_name: str = None):
         """Добавление нового пользователя"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT OR IGNORE INTO users (telegram_id, username, first_name, last_name)
@@ -450,7 +624,7 @@ class Database:
     
     def get_total_bonus_time(self, user_id: str) -> int:
         """Получение общего количества бонусного времени пользователя"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT SUM(bonus_minutes) FROM bonuses 
@@ -462,7 +636,7 @@ class Database:
     
     def add_notification(self, user_id: str, message: str, notification_type: str = "info"):
         """Добавление уведомления пользователю"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO notifications (user_id, message, type)
@@ -472,7 +646,7 @@ class Database:
     
     def get_user_notifications(self, user_id: str, unread_only: bool = True) -> List[Dict]:
         """Получение уведомлений пользователя"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             if unread_only:
                 cursor.execute('''
@@ -493,7 +667,7 @@ class Database:
     
     def mark_notification_read(self, notification_id: int):
         """Отметить уведомление как прочитанное"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE notifications SET is_read = TRUE WHERE id = ?
@@ -502,7 +676,7 @@ class Database:
     
     def get_operation_history(self, user_id: str, limit: int = 20) -> List[Dict]:
         """Получение истории операций пользователя"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT operation_type, description, created_at
@@ -517,7 +691,7 @@ class Database:
     
     def get_statistics(self) -> Dict:
         """Получение общей статистики системы"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             
             # Общее количество аккаунтов
@@ -551,7 +725,7 @@ class Database:
     
     def get_user_statistics(self, user_id: str) -> Dict:
         """Получение статистики конкретного пользователя"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             
             # Количество аренд
@@ -588,21 +762,20 @@ class Database:
                 'favorite_games': favorite_games
             }
     
-    def search_accounts(self, query: str) -> List[Dict]:
-        """Поиск аккаунтов по названию игры"""
-        with sqlite3.connect(self.db_path) as conn:
+    def search_accounts(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Поиск свободных аккаунтов по игре, логину и описанию (префиксы слов, лучшие первыми)"""
+        with self.connect() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT * FROM steam_accounts 
-                WHERE game_name LIKE ? AND is_rented = FALSE
-            ''', (f'%{query}%',))
+            rows = ACCOUNT_SEARCH.search(cursor, query, where="c.is_rented = FALSE", limit=limit)
+            if not rows:
+                return []
             
             columns = [description[0] for description in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            return [dict(zip(columns, row)) for row in rows]
     
     def get_recent_activity(self, limit: int = 10) -> List[Dict]:
         """Получение последней активности в системе"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT user_id, operation_type, description, created_at
@@ -617,28 +790,28 @@ class Database:
     # Методы для Telegram бота
     def get_total_accounts(self) -> int:
         """Получение общего количества аккаунтов"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT COUNT(*) FROM steam_accounts')
             return cursor.fetchone()[0]
     
     def get_available_accounts(self) -> int:
         """Получение количества доступных аккаунтов"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT COUNT(*) FROM steam_accounts WHERE is_rented = FALSE')
             return cursor.fetchone()[0]
     
     def get_active_rentals(self) -> int:
         """Получение количества активных аренд"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT COUNT(*) FROM rentals WHERE status = "active"')
             return cursor.fetchone()[0]
     
     def get_available_accounts_list(self) -> List[Dict]:
         """Получение списка доступных аккаунтов"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, username, game_name, created_at
@@ -660,7 +833,7 @@ class Database:
     
     def get_user_rentals(self, user_id: str) -> List[Dict]:
         """Получение аренд пользователя"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT r.id, r.account_id, r.start_time, r.end_time, r.duration_hours, r.status,
@@ -676,7 +849,7 @@ class Database:
     
     def get_total_users(self) -> int:
         """Получение общего количества пользователей"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT COUNT(*) FROM users')
             return cursor.fetchone()[0]
@@ -684,7 +857,7 @@ class Database:
     def get_account(self, account_id: int) -> Optional[Dict]:
         """Получение аккаунта по ID"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT id, username, password, game_name, is_rented, created_at, price, description
@@ -711,7 +884,7 @@ class Database:
     def get_detailed_stats(self) -> Dict:
         """Получение детальной статистики для админа"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connect() as conn:
                 cursor = conn.cursor()
                 
                 # Общая статистика аккаунтов
@@ -731,9 +904,10 @@ class Database:
                 cursor.execute('SELECT COUNT(*) FROM rentals WHERE DATE(end_time) = DATE("now") AND status = "completed"')
                 completed_today = cursor.fetchone()[0]
                 
-                # Общий доход (примерный расчет)
-                cursor.execute('SELECT SUM(duration_hours * 50) FROM rentals WHERE status = "completed"')
-                total_revenue = cursor.fetchone()[0] or 0
+                # Общий доход - нарастающий итог журнала выручки
+                cursor.execute("SELECT revenue FROM revenue_totals WHERE game_name = '*'")
+                row = cursor.fetchone()
+                total_revenue = row[0] if row else 0
                 
                 # Статистика пользователей
                 cursor.execute('SELECT COUNT(*) FROM users')
@@ -776,7 +950,7 @@ class Database:
     def get_users_list(self) -> List[Dict]:
         """Получение списка пользователей для админа"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT u.telegram_id, u.created_at, COUNT(r.id) as rentals_count
@@ -803,7 +977,7 @@ class Database:
     def delete_account(self, account_id: int) -> bool:
         """Удаление аккаунта"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connect() as conn:
                 cursor = conn.cursor()
                 
                 # Проверяем, что аккаунт существует
@@ -824,7 +998,8 @@ class Database:
                 cursor.execute('DELETE FROM rentals WHERE account_id = ?', (account_id,))
                 
                 conn.commit()
-                return True
+            self.events.publish(AccountDeleted(account_id))
+            return True
                 
         except Exception as e:
             print(f"Ошибка удаления аккаунта: {e}")
@@ -833,7 +1008,7 @@ class Database:
     def get_all_accounts(self) -> List[Dict]:
         """Получение всех аккаунтов для админа"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT id, username, game_name, is_rented, created_at, price, description
@@ -862,7 +1037,7 @@ class Database:
     def add_account(self, username: str, password: str, game_name: str, price: float, description: str = "") -> bool:
         """Добавление нового аккаунта"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connect() as conn:
                 cursor = conn.cursor()
                 
                 # Проверяем, что аккаунт с таким логином не существует
@@ -877,7 +1052,8 @@ class Database:
                 ''', (username, password, game_name, price, description))
                 
                 conn.commit()
-                return True
+            self.events.publish(AccountAdded(cursor.lastrowid, username, game_name))
+            return True
                 
         except Exception as e:
             print(f"Ошибка добавления аккаунта: {e}")
@@ -886,7 +1062,7 @@ class Database:
     def save_token(self, token_type: str, token_value: str) -> bool:
         """Сохранение токена в базу данных"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connect() as conn:
                 cursor = conn.cursor()
                 
                 # Создаем таблицу токенов, если её нет
@@ -916,7 +1092,7 @@ class Database:
     def get_token(self, token_type: str) -> Optional[str]:
         """Получение токена из базы данных"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connect() as conn:
                 cursor = conn.cursor()
                 
                 # Создаем таблицу токенов, если её нет
@@ -942,7 +1118,7 @@ class Database:
     def delete_token(self, token_type: str) -> bool:
         """Удаление токена из базы данных"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM api_tokens WHERE token_type = ?', (token_type,))
                 conn.commit()
@@ -955,7 +1131,7 @@ class Database:
     def get_all_tokens(self) -> Dict[str, str]:
         """Получение всех токенов"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connect() as conn:
                 cursor = conn.cursor()
                 
                 # Создаем таблицу токенов, если её нет
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📣 Шина доменных событий Steam Rental System
+Database и SteamRentalSystem публикуют события после фиксации транзакции,
+подписчики (кэши, метрики, уведомления) получают их в своем потоке из ограниченной очереди
+вместо повторных запросов к базе.
+"""
+
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple, Type
+from config import Config
+from metrics import Counter
+
+EVENTS_PUBLISHED = Counter('steam_rental_events_published', 'Опубликованные события', ('event',))
+EVENTS_DROPPED = Counter('steam_rental_events_dropped', 'События, не поместившиеся в очередь подписчика', ('subscriber',))
+EVENT_HANDLER_ERRORS = Counter('steam_rental_event_handler_errors', 'Исключения в обработчиках событий', ('subscriber',))
+
+# Сигнал остановки потока подписчика
+_STOP = object()
+
+
+@dataclass(frozen=True)
+class Event:
+    """Базовое событие"""
+    occurred_at: float = field(default_factory=time.time, kw_only=True)
+
+    @property
+    def name(self) -> str:
+        return type(self).__name__
+
+
+@dataclass(frozen=True)
+class RentalStarted(Event):
+    """Аккаунт выдан в аренду"""
+    rental_id: int
+    account_id: int
+    user_id: str
+    game_name: str
+    duration_hours: int
+    ends_at: str
+
+
+@dataclass(frozen=True)
+class RentalExpired(Event):
+    """Аренда завершена по времени, аккаунт освобожден"""
+    rental_id: int
+    account_id: int
+    user_id: str
+
+
+@dataclass(frozen=True)
+class BonusGranted(Event):
+    """Начислено бонусное время (rental_id - продленная аренда, если есть)"""
+    user_id: str
+    minutes: int
+    reason: str
+    rental_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class AccountAdded(Event):
+    """Добавлен аккаунт"""
+    account_id: int
+    username: str
+    game_name: str
+
+
+@dataclass(frozen=True)
+class AccountDeleted(Event):
+    """Удален аккаунт"""
+    account_id: int
+
+
+@dataclass(frozen=True)
+class PasswordRotated(Event):
+    """Пароль аккаунта изменен"""
+    account_id: int
+
+
+class Subscription:
+    """Подписчик: обработчик, его очередь и поток доставки"""
+
+    def __init__(self, bus: 'EventBus', name: str, handler: Callable[[Event], None],
+                 event_types: Tuple[Type[Event], ...], maxsize: int):
+        self.bus = bus
+        self.name = name
+        self.handler = handler
+        self.event_types = event_types
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name=f"events-{name}", daemon=True)
+        self._thread.start()
+
+    def accepts(self, event: Event) -> bool:
+        return isinstance(event, self.event_types)
+
+    def offer(self, event: Event) -> bool:
+        """Постановка в очередь без ожидания; при переполнении событие отбрасывается"""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            EVENTS_DROPPED.labels(self.name).inc()
+            self.bus.logger.warning(f"⚠️ Очередь подписчика {self.name} переполнена, {event.name} пропущено")
+            return False
+
+    def _run(self):
+        while True:
+            event = self.queue.get()
+            try:
+                if event is _STOP:
+                    return
+                self.handler(event)
+                self.delivered += 1
+            except Exception as e:
+                self.errors += 1
+                EVENT_HANDLER_ERRORS.labels(self.name).inc()
+                self.bus.logger.error(f"❌ Ошибка подписчика {self.name} на {event.name}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Остановка после доставки уже поставленных событий"""
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    @property
+    def pending(self) -> int:
+        return self.queue.unfinished_tasks
+
+    def as_dict(self) -> Dict[str, int]:
+        return {'pending': self.pending, 'delivered': self.delivered, 'dropped': self.dropped, 'errors': self.errors}
+
+
+class EventBus:
+    """Публикация/подписка в пределах процесса"""
+
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._subscriptions: List[Subscription] = []
+
+    def subscribe(self, handler: Callable[[Event], None], *event_types: Type[Event],
+                  name: Optional[str] = None, maxsize: Optional[int] = None) -> Subscription:
+        """Подписка на события указанных типов (без типов - на все)
+
+        Обработчик вызывается в отдельном потоке подписчика, по одному событию в порядке публикации.
+        """
+        subscription = Subscription(
+            self, name or getattr(handler, '__qualname__', repr(handler)), handler,
+            tuple(event_types) or (Event,), maxsize or self.maxsize
+        )
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription, timeout: Optional[float] = 5.0):
+        """Отписка; уже поставленные в очередь события доставляются"""
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+        subscription.stop(timeout)
+
+    def publish(self, event: Event) -> int:
+        """Рассылка события подписчикам (не блокирует издателя), возвращает число принявших очередей"""
+        EVENTS_PUBLISHED.labels(event.name).inc()
+        return sum(1 for subscription in self._subscriptions
+                   if subscription.accepts(event) and subscription.offer(event))
+
+    def wait_idle(self, timeout: float = 5.0) -> bool:
+        """Ожидание обработки всех поставленных событий"""
+        deadline = time.monotonic() + timeout
+        while any(subscription.pending for subscription in self._subscriptions):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Отписка всех подписчиков"""
+        for subscription in list(self._subscriptions):
+            self.unsubscribe(subscription, timeout)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {subscription.name: subscription.as_dict() for subscription in self._subscriptions}
+
+
+# Шина процесса по умолчанию
+default_bus = EventBus(maxsize=Config.EVENT_QUEUE_SIZE)
@@ -1,16 +1,102 @@
+import re
 import time
 import random
 import requests
+from typing import Optional
+from urllib.parse import urljoin, urlsplit
 from bs4 import BeautifulSoup
 from config import Config
+from metrics import Histogram
 import logging
 
+FUNPAY_REQUEST_SECONDS = Histogram(
+    'steam_rental_funpay_request_seconds', 'Длительность запросов к FunPay',
+    ('method', 'endpoint', 'status')
+)
+
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+def normalize_endpoint(url: str) -> str:
+    """Путь запроса без идентификаторов (/account/orders/123/chat -> /account/orders/:id/chat)"""
+    return _ID_SEGMENT.sub('/:id', urlsplit(url).path) or '/'
+
+def instrument_session(session: requests.Session) -> requests.Session:
+    """Замер всех запросов сессии, включая сетевые ошибки"""
+    request = session.request
+
+    def timed_request(method, url, *args, **kwargs):
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            response = request(method, url, *args, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            FUNPAY_REQUEST_SECONDS.labels(method.upper(), normalize_endpoint(url), status).observe(
+                time.perf_counter() - started
+            )
+
+    session.request = timed_request
+    return session
+
+def parse_orders(html) -> list:
+    """Разбор страницы заказов"""
+    soup = BeautifulSoup(html, 'html.parser')
+    orders = []
+    
+    for order_elem in soup.find_all('div', {'class': 'order-item'}):
+        try:
+            orders.append({
+                'id': order_elem.get('data-order-id', ''),
+                'title': order_elem.find('div', {'class': 'order-title'}).text.strip(),
+                'status': order_elem.find('div', {'class': 'order-status'}).text.strip(),
+                'price': order_elem.find('div', {'class': 'order-price'}).text.strip(),
+                'date': order_elem.find('div', {'class': 'order-date'}).text.strip()
+            })
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"⚠️ Ошибка парсинга заказа: {e}")
+    
+    return orders
+
+def parse_price(text) -> Optional[float]:
+    """Сумма заказа из текста цены ('1 250,50 ₽' -> 1250.5), None если разобрать не удалось"""
+    match = re.search(r"\d[\d\s\u00a0]*(?:[.,]\d+)?", str(text or ''))
+    if not match:
+        return None
+    return float(re.sub(r"[\s\u00a0]", "", match.group(0)).replace(',', '.'))
+
+def parse_reviews(html) -> list:
+    """Разбор страницы отзывов"""
+    soup = BeautifulSoup(html, 'html.parser')
+    reviews = []
+    
+    for review_elem in soup.find_all('div', {'class': 'review-item'}):
+        try:
+            reviews.append({
+                'id': review_elem.get('data-review-id', ''),
+                'order_id': review_elem.get('data-order-id', ''),
+                'rating': int(review_elem.find('div', {'class': 'rating'}).get('data-rating', 0)),
+                'comment': review_elem.find('div', {'class': 'comment'}).text.strip(),
+                'date': review_elem.find('div', {'class': 'review-date'}).text.strip()
+            })
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"⚠️ Ошибка парсинга отзыва: {e}")
+    
+    return reviews
+
 class FunPayManager:
+    # Повторы запросов при сетевых ошибках и ответах 429/5xx
+    REQUEST_RETRIES = 3
+    RETRY_BACKOFF = 0.5
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    # POST повторяется, только если сервер точно не выполнил запрос
+    RETRY_STATUSES_UNSAFE = (429, 503)
+    
     def __init__(self):
         self.base_url = Config.FUNPAY_BASE_URL
         self.login = Config.FUNPAY_LOGIN
         self.password = Config.FUNPAY_PASSWORD
-        self.session = requests.Session()
+        self.session = instrument_session(requests.Session())
         self.is_logged_in = False
     
         # Настройка логирования
@@ -26,13 +112,50 @@ class FunPayManager:
             'Upgrade-Insecure-Requests': '1',
         })
     
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """HTTP-запрос с таймаутом и повторами (экспоненциальная пауза)
+
+        Относительные адреса (action форм) дополняются base_url. POST повторяется
+        только при ошибке соединения и ответах 429/503, чтобы не отправить дважды.
+        Ответ 419 означает устаревший CSRF токен: cookies сессии очищаются,
+        следующая операция выполнит вход заново.
+        """
+        url = urljoin(self.base_url + '/', url)
+        kwargs.setdefault('timeout', Config.FUNPAY_TIMEOUT)
+        idempotent = method.upper() in ('GET', 'HEAD')
+        retry_statuses = self.RETRY_STATUSES if idempotent else self.RETRY_STATUSES_UNSAFE
+        retry_errors = (requests.ConnectionError, requests.Timeout) if idempotent else requests.ConnectTimeout
+        
+        for attempt in range(self.REQUEST_RETRIES + 1):
+            last_attempt = attempt == self.REQUEST_RETRIES
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except retry_errors as e:
+                if last_attempt:
+                    raise
+                self.logger.warning(f"⚠️ {method} {url}: {e}, повтор {attempt + 1}/{self.REQUEST_RETRIES}")
+            else:
+                if response.status_code == 419:
+                    self.logger.warning("⚠️ CSRF токен устарел, требуется повторный вход")
+                    # Устаревшие cookies не должны попасть в повторный вход
+                    self.session.cookies.clear()
+                    self.is_logged_in = False
+                    return response
+                if response.status_code not in retry_statuses or last_attempt:
+                    return response
+                self.logger.warning(
+                    f"⚠️ {method} {url}: {response.status_code}, повтор {attempt + 1}/{self.REQUEST_RETRIES}"
+                )
+            
+            time.sleep(self.RETRY_BACKOFF * 2 ** attempt)
+    
     def login_to_funpay(self):
         """Вход в аккаунт FunPay через API"""
         try:
             self.logger.info("🔐 Попытка входа в FunPay...")
             
             # Получаем страницу входа для получения CSRF токена
-            login_page = self.session.get(f"{self.base_url}/account/login")
+            login_page = self._request('GET', f"{self.base_url}/account/login")
             soup = BeautifulSoup(login_page.content, 'html.parser')
             
             # Ищем CSRF токен
@@ -54,7 +177,7 @@ class FunPayManager:
                 login_data['_token'] = csrf_token
             
             # Выполняем вход
-            response = self.session.post(
+            response = self._request('POST',
                 f"{self.base_url}/account/login",
                 data=login_data,
                 allow_redirects=True
@@ -91,30 +214,13 @@ class FunPayManager:
             
             self.logger.info("📋 Получение списка заказов...")
             
-            response = self.session.get(f"{self.base_url}/account/orders")
+            response = self._request('GET', f"{self.base_url}/account/orders")
             if response.status_code != 200:
                 self.logger.error(f"❌ Ошибка получения заказов: {response.status_code}")
                 return []
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            orders = []
-            
             # Парсим заказы
-            order_elements = soup.find_all('div', {'class': 'order-item'})
-            
-            for order_elem in order_elements:
-                try:
-                    order = {
-                        'id': order_elem.get('data-order-id', ''),
-                        'title': order_elem.find('div', {'class': 'order-title'}).text.strip(),
-                        'status': order_elem.find('div', {'class': 'order-status'}).text.strip(),
-                        'price': order_elem.find('div', {'class': 'order-price'}).text.strip(),
-                        'date': order_elem.find('div', {'class': 'order-date'}).text.strip()
-                    }
-                    orders.append(order)
-                except Exception as e:
-                    self.logger.warning(f"⚠️ Ошибка парсинга заказа: {e}")
-                    continue
+            orders = parse_orders(response.content)
             
             self.logger.info(f"✅ Получено {len(orders)} заказов")
             return orders
@@ -132,30 +238,13 @@ class FunPayManager:
             
             self.logger.info("⭐ Получение списка отзывов...")
             
-            response = self.session.get(f"{self.base_url}/account/reviews")
+            response = self._request('GET', f"{self.base_url}/account/reviews")
             if response.status_code != 200:
                 self.logger.error(f"❌ Ошибка получения отзывов: {response.status_code}")
                 return []
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            reviews = []
-            
             # Парсим отзывы
-            review_elements = soup.find_all('div', {'class': 'review-item'})
-            
-            for review_elem in review_elements:
-                try:
-                    review = {
-                        'id': review_elem.get('data-review-id', ''),
-                        'order_id': review_elem.get('data-order-id', ''),
-                        'rating': int(review_elem.find('div', {'class': 'rating'}).get('data-rating', 0)),
-                        'comment': review_elem.find('div', {'class': 'comment'}).text.strip(),
-                        'date': review_elem.find('div', {'class': 'review-date'}).text.strip()
-                    }
-                    reviews.append(review)
-                except Exception as e:
-                    self.logger.warning(f"⚠️ Ошибка парсинга отзыва: {e}")
-                    continue
+            reviews = parse_reviews(response.content)
             
             self.logger.info(f"✅ Получено {len(reviews)} отзывов")
             return reviews
@@ -174,7 +263,7 @@ class FunPayManager:
             self.logger.info(f"📤 Отправка сообщения для заказа {order_id}")
             
             # Получаем страницу чата заказа
-            response = self.session.get(f"{self.base_url}/account/orders/{order_id}/chat")
+            response = self._request('GET', f"{self.base_url}/account/orders/{order_id}/chat")
             if response.status_code != 200:
                 self.logger.error(f"❌ Ошибка получения чата: {response.status_code}")
                 return False
@@ -203,7 +292,7 @@ class FunPayManager:
                 send_data['_token'] = csrf_token
             
             # Отправляем сообщение
-            response = self.session.post(
+            response = self._request('POST',
                 form.get('action'),
                 data=send_data,
                 allow_redirects=True
@@ -230,7 +319,7 @@ class FunPayManager:
             self.logger.info(f"📝 Обновление объявления {listing_id}")
             
             # Получаем страницу редактирования объявления
-            response = self.session.get(f"{self.base_url}/account/listings/{listing_id}/edit")
+            response = self._request('GET', f"{self.base_url}/account/listings/{listing_id}/edit")
             if response.status_code != 200:
                 self.logger.error(f"❌ Ошибка получения страницы редактирования: {response.status_code}")
                 return False
@@ -255,7 +344,7 @@ class FunPayManager:
                 update_data['_token'] = csrf_token
             
             # Отправляем обновление
-            response = self.session.post(
+            response = self._request('POST',
                 form.get('action'),
                 data=update_data,
                 allow_redirects=True
@@ -282,7 +371,7 @@ class FunPayManager:
             self.logger.info(f"🗑️ Удаление объявления {listing_id}")
             
             # Получаем страницу удаления
-            response = self.session.get(f"{self.base_url}/account/sells/delete/{listing_id}")
+            response = self._request('GET', f"{self.base_url}/account/sells/delete/{listing_id}")
             if response.status_code != 200:
                 self.logger.error(f"❌ Ошибка получения страницы удаления: {response.status_code}")
                 return False
@@ -301,7 +390,7 @@ class FunPayManager:
                 delete_data['_token'] = csrf_token
             
             # Удаляем объявление
-            response = self.session.post(
+            response = self._request('POST',
                 f"{self.base_url}/account/sells/delete/{listing_id}",
                 data=delete_data,
                 allow_redirects=True
@@ -401,7 +490,7 @@ class FunPayManager:
         """Обработка заказа - отправка данных аккаунта"""
         try:
             self.logger.info(f"📤 Отправка данных аккаунта для заказа {order_id}")
-            response = self.session.get(f"{self.base_url}/account/orders/{order_id}")
+            response = self._request('GET', f"{self.base_url}/account/orders/{order_id}")
             if response.status_code != 200:
                 self.logger.error(f"❌ Ошибка получения страницы заказа: {response.status_code}")
                 return False
@@ -439,7 +528,7 @@ class FunPayManager:
             }
             if csrf_token:
                 send_data['_token'] = csrf_token
-            response = self.session.post(
+            response = self._request('POST',
                 form.get('action'),
                 data=send_data,
                 allow_redirects=True
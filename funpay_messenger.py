@@ -5,30 +5,43 @@
 Отправка сообщений, инструкций по Steam Guard, бонусная система
 """
 
-import time
-import random
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import logging
+from functools import lru_cache
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
+from config import Config
+from browser_waits import create_waits, form_submitted, timed_action
+from browser_pool import ChatRateLimiter
+
+# Поле сообщения в чате заказа
+MESSAGE_FIELD = (By.CSS_SELECTOR, "textarea[placeholder*='сообщение']")
+
+@lru_cache(maxsize=1)
+def chromedriver_path() -> str:
+    """Путь к chromedriver (поиск и загрузка один раз на процесс)"""
+    return ChromeDriverManager().install()
 
 class FunPayMessenger:
     """Автоматический мессенджер для FunPay"""
     
-    def __init__(self, headless: bool = False):
+    def __init__(self, headless: bool = False, wait_strategy: Optional[str] = None):
         self.driver = None
         self.headless = headless
+        self.base_url = Config.FUNPAY_BASE_URL
         self.logger = logging.getLogger(__name__)
         self.message_templates = self._load_message_templates()
         self.setup_driver()
+        # Ожидания страниц и элементов (по умолчанию Config.MESSENGER_WAIT_STRATEGY)
+        self.waits = create_waits(self.driver, wait_strategy)
+        self.chat_limiter = ChatRateLimiter()
     
     def setup_driver(self):
         """Настройка Chrome драйвера"""
@@ -51,7 +64,7 @@ class FunPayMessenger:
             }
             chrome_options.add_experimental_option("prefs", prefs)
             
-            service = Service(ChromeDriverManager().install())
+            service = Service(chromedriver_path())
             self.driver = webdriver.Chrome(service=service, options=chrome_options)
             
             self.logger.info("Chrome драйвер успешно настроен")
@@ -60,6 +73,7 @@ class FunPayMessenger:
             self.logger.error(f"Ошибка настройки Chrome драйвера: {e}")
             raise
     
+    @timed_action('create_listing')
     def create_rental_listing(self, game_name: str, price_per_hour: float, account_id: str = None):
         """
         Автоматически создает объявление на FunPay для аренды аккаунта
@@ -69,28 +83,17 @@ class FunPayMessenger:
                 self.logger.error("Драйвер не инициализирован")
                 return None
             
-            # Переходим на страницу создания объявления
-            self.driver.get("https://funpay.com/account/sells/add")
-            time.sleep(3)
-            
-            # Выбираем категорию "Аккаунты"
-            category_dropdown = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "[data-testid='category-select']"))
-            )
+            # Переходим на страницу создания объявления и выбираем категорию "Аккаунты"
+            add_url = f"{self.base_url}/account/sells/add"
+            category_dropdown = self.waits.page(add_url, (By.CSS_SELECTOR, "[data-testid='category-select']"), delay=3)
             category_dropdown.click()
-            time.sleep(1)
             
             # Выбираем "Steam"
-            steam_option = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//div[contains(text(), 'Steam')]"))
-            )
+            steam_option = self.waits.element((By.XPATH, "//div[contains(text(), 'Steam')]"), clickable=True, delay=1)
             steam_option.click()
-            time.sleep(1)
             
             # Заполняем название
-            title_input = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "[data-testid='title-input']"))
-            )
+            title_input = self.waits.element((By.CSS_SELECTOR, "[data-testid='title-input']"), delay=1)
             title_input.clear()
             title_input.send_keys(f"Аренда Steam аккаунта | {game_name} | Почасовая оплата")
             
@@ -110,11 +113,8 @@ class FunPayMessenger:
             # Выбираем валюту (рубли)
             currency_dropdown = self.driver.find_element(By.CSS_SELECTOR, "[data-testid='currency-select']")
             currency_dropdown.click()
-            time.sleep(1)
             
-            rub_option = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//div[contains(text(), '₽')]"))
-            )
+            rub_option = self.waits.element((By.XPATH, "//div[contains(text(), '₽')]"), clickable=True, delay=1)
             rub_option.click()
             
             # Устанавливаем время доставки
@@ -125,19 +125,18 @@ class FunPayMessenger:
             # Выбираем единицу времени (минуты)
             delivery_unit = self.driver.find_element(By.CSS_SELECTOR, "[data-testid='delivery-unit-select']")
             delivery_unit.click()
-            time.sleep(1)
             
-            minutes_option = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//div[contains(text(), 'минут')]"))
-            )
+            minutes_option = self.waits.element((By.XPATH, "//div[contains(text(), 'минут')]"), clickable=True, delay=1)
             minutes_option.click()
             
             # Нажимаем "Создать"
             create_button = self.driver.find_element(By.CSS_SELECTOR, "[data-testid='create-button']")
             create_button.click()
             
-            # Ждем подтверждения
-            time.sleep(5)
+            # Ждем перехода на страницу объявления
+            if not self.waits.after(EC.url_changes(add_url), delay=5):
+                self.logger.error(f"Объявление для игры {game_name} не создано: страница не сменилась")
+                return None
             
             # Получаем ID созданного объявления
             listing_url = self.driver.current_url
@@ -402,20 +401,17 @@ Email: {email}
 🎯 **Следите за обновлениями!**"""
         }
     
+    @timed_action('login')
     def login_to_funpay(self, username: str, password: str) -> bool:
         """Вход в FunPay"""
         try:
             self.logger.info("Вход в FunPay...")
             
-            # Открываем страницу входа
-            self.driver.get("https://funpay.com/account/login")
-            time.sleep(3)
-            
-            # Ждем появления формы входа
-            wait = WebDriverWait(self.driver, 10)
+            # Открываем страницу входа и ждем появления формы
+            login_url = f"{self.base_url}/account/login"
+            login_field = self.waits.page(login_url, (By.NAME, "login"), delay=3)
             
             # Вводим логин
-            login_field = wait.until(EC.presence_of_element_located((By.NAME, "login")))
             login_field.clear()
             login_field.send_keys(username)
             
@@ -428,8 +424,8 @@ Email: {email}
             login_button = self.driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
             login_button.click()
             
-            # Ждем входа
-            time.sleep(5)
+            # Ждем ухода со страницы входа
+            self.waits.after(EC.url_changes(login_url), delay=5)
             
             # Проверяем успешность входа
             if "account" in self.driver.current_url or "profile" in self.driver.current_url:
@@ -443,19 +439,15 @@ Email: {email}
             self.logger.error(f"Ошибка входа в FunPay: {e}")
             return False
     
+    @timed_action('send_message')
     def send_message_to_order(self, order_id: str, message: str) -> bool:
         """Отправка сообщения к заказу"""
         try:
             self.logger.info(f"Отправка сообщения к заказу {order_id}")
             
             # Переходим к заказу
-            order_url = f"https://funpay.com/orders/{order_id}"
-            self.driver.get(order_url)
-            time.sleep(3)
-            
-            # Ищем поле для сообщения
-            wait = WebDriverWait(self.driver, 10)
-            message_field = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "textarea[placeholder*='сообщение']")))
+            order_url = f"{self.base_url}/orders/{order_id}"
+            message_field = self.waits.page(order_url, MESSAGE_FIELD, delay=3)
             
             # Очищаем поле и вводим сообщение
             message_field.clear()
@@ -465,7 +457,9 @@ Email: {email}
             send_button = self.driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
             send_button.click()
             
-            time.sleep(2)
+            if not self.waits.after(form_submitted(message_field), delay=2):
+                self.logger.error(f"Сообщение к заказу {order_id} не отправлено: форма не ответила")
+                return False
             self.logger.info(f"Сообщение к заказу {order_id} отправлено")
             return True
             
@@ -622,8 +616,16 @@ Email: {email}
             return False
     
     def send_bulk_messages(self, order_ids: List[str], message_template: str, 
-                          **kwargs) -> Dict[str, bool]:
-        """Массовая отправка сообщений"""
+                          pool=None, **kwargs) -> Dict[str, bool]:
+        """Массовая отправка сообщений
+
+        С pool (browser_pool.BrowserPool) заказы распределяются по браузерам пула,
+        без него отправляются по очереди этим браузером. В один чат - не чаще
+        CHAT_MESSAGE_INTERVAL секунд.
+        """
+        if pool is not None:
+            return pool.send_bulk(order_ids, message_template, **kwargs)
+        
         results = {}
         
         for order_id in order_ids:
@@ -634,27 +636,25 @@ Email: {email}
                 else:
                     message = message_template
                 
-                # Отправляем сообщение
+                # Отправляем сообщение (с паузой, если в этот чат уже писали)
+                self.chat_limiter.wait(order_id)
                 success = self.send_message_to_order(order_id, message)
                 results[order_id] = success
                 
-                # Пауза между отправками
-                time.sleep(random.uniform(2, 5))
-                
             except Exception as e:
                 self.logger.error(f"Ошибка массовой отправки к заказу {order_id}: {e}")
                 results[order_id] = False
         
         return results
     
+    @timed_action('check_unread')
     def check_unread_messages(self) -> List[Dict]:
         """Проверка непрочитанных сообщений"""
         try:
             unread_messages = []
             
             # Переходим в раздел сообщений
-            self.driver.get("https://funpay.com/chat")
-            time.sleep(3)
+            self.waits.page(f"{self.base_url}/chat", delay=3)
             
             # Ищем непрочитанные сообщения
             unread_elements = self.driver.find_elements(By.CSS_SELECTOR, ".chat-item.unread")
@@ -683,6 +683,7 @@ Email: {email}
             self.logger.error(f"Ошибка проверки непрочитанных сообщений: {e}")
             return []
     
+    @timed_action('auto_reply')
     def auto_reply_to_messages(self, auto_replies: Dict[str, str]) -> Dict[str, bool]:
         """Автоматические ответы на сообщения"""
         results = {}
@@ -700,18 +701,16 @@ Email: {email}
                         try:
                             # Открываем чат с отправителем
                             message['element'].click()
-                            time.sleep(2)
                             
                             # Отправляем ответ
-                            message_field = self.driver.find_element(By.CSS_SELECTOR, "textarea[placeholder*='сообщение']")
+                            message_field = self.waits.element(MESSAGE_FIELD, delay=2)
                             message_field.clear()
                             message_field.send_keys(reply)
                             
                             send_button = self.driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
                             send_button.click()
                             
-                            results[sender] = True
-                            time.sleep(2)
+                            results[sender] = self.waits.after(form_submitted(message_field), delay=2)
                             
                         except Exception as e:
                             self.logger.error(f"Ошибка автоматического ответа {sender}: {e}")
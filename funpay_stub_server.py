@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧪 Локальный двойник FunPay для офлайн-тестов и замеров пропускной способности
+Запуск: python funpay_stub_server.py --port 8081 --orders 200 --latency 0.05 --error-rate 0.1
+Затем: FUNPAY_BASE_URL=http://127.0.0.1:8081 python main.py
+
+Страницы: вход, заказы, отзывы, чат заказа, редактирование и удаление объявления,
+а также страницы, которые открывает FunPayMessenger. HTML генерируется нужного
+размера или берется из каталога записанных страниц (--fixtures: orders.html, reviews.html).
+Задержка, ошибки и отказы CSRF (419) настраиваются при запуске и на лету
+через POST /__stub__/config; счетчики - GET /__stub__/stats.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import socket
+import secrets
+import argparse
+import threading
+from dataclasses import dataclass, asdict, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+ORDER_TITLES = ('CS2 Prime', 'Dota 2 аккаунт', 'PUBG аренда', 'Valorant', 'GTA V онлайн', 'Apex Legends')
+
+CONTROL_PREFIX = '/__stub__/'
+
+
+def generate_orders_html(count: int, seed: int = 42) -> str:
+    """Страница заказов FunPay с count заказами"""
+    rng = random.Random(seed)
+    items = []
+    for order_id in range(1, count + 1):
+        items.append(
+            f'<div class="order-item" data-order-id="{order_id}">'
+            f'<div class="order-title">{rng.choice(ORDER_TITLES)}</div>'
+            f'<div class="order-status">{rng.choice(("Новый", "Закрыт", "pending"))}</div>'
+            f'<div class="order-price">{rng.choice((50, 100, 150))} ₽</div>'
+            f'<div class="order-date">{rng.randint(1, 28)}.10.2026</div></div>'
+        )
+    return f'<html><body><div class="orders">{"".join(items)}</div></body></html>'
+
+
+def generate_reviews_html(count: int, seed: int = 42) -> str:
+    """Страница отзывов FunPay с count отзывами"""
+    rng = random.Random(seed)
+    items = []
+    for review_id in range(1, count + 1):
+        items.append(
+            f'<div class="review-item" data-review-id="{review_id}" data-order-id="{rng.randint(1, 10_000)}">'
+            f'<div class="rating" data-rating="{rng.randint(1, 5)}"></div>'
+            f'<div class="comment">Все отлично, спасибо!</div>'
+            f'<div class="review-date">{rng.randint(1, 28)}.10.2026</div></div>'
+        )
+    return f'<html><body>{"".join(items)}</body></html>'
+
+
+def _page(body: str) -> str:
+    return f'<!DOCTYPE html><html><head><meta charset="utf-8"></head><body>{body}</body></html>'
+
+
+def _form(action: str, token: str, fields: str = "") -> str:
+    return (f'<form method="post" action="{action}"><input type="hidden" name="_token" value="{token}">'
+            f'{fields}<button type="submit">OK</button></form>')
+
+
+@dataclass
+class StubSettings:
+    """Поведение двойника (можно менять на лету)"""
+    orders: int = 50
+    reviews: int = 20
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    csrf_fail_rate: float = 0.0
+    seed: int = 42
+    fixtures_dir: Optional[str] = None
+
+
+@dataclass
+class StubState:
+    """Что двойник получил от клиентов"""
+    requests: Dict[str, int] = field(default_factory=dict)
+    injected_errors: int = 0
+    csrf_failures: int = 0
+    logins: int = 0
+    messages: List[Dict] = field(default_factory=list)
+    updated_listings: Dict[str, Dict] = field(default_factory=dict)
+    deleted_listings: List[str] = field(default_factory=list)
+    created_listings: int = 0
+
+
+class FunPayStubServer:
+    """HTTP-сервер, имитирующий FunPay"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, settings: Optional[StubSettings] = None):
+        self.settings = settings or StubSettings()
+        self.state = StubState()
+        self.csrf_token = secrets.token_hex(16)
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.settings.seed)
+        self._scripted: List[Tuple[str, int]] = []
+        self._pages: Dict[str, str] = {}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FunPayStubServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="funpay-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def configure(self, **changes):
+        """Изменение поведения (orders, latency, error_rate, csrf_fail_rate, ...)"""
+        with self._lock:
+            for key, value in changes.items():
+                if not hasattr(self.settings, key):
+                    raise ValueError(f"Неизвестный параметр двойника: {key}")
+                current = getattr(self.settings, key)
+                setattr(self.settings, key, value if current is None or value is None else type(current)(value))
+            if 'seed' in changes:
+                self._rng = random.Random(self.settings.seed)
+            self._pages.clear()
+
+    def fail_next(self, path_prefix: str, status: int, count: int = 1):
+        """Следующие count запросов к path_prefix получат status (419 - отказ CSRF)"""
+        with self._lock:
+            self._scripted.extend([(path_prefix, status)] * count)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'requests': dict(self.state.requests),
+                'injected_errors': self.state.injected_errors,
+                'csrf_failures': self.state.csrf_failures,
+                'logins': self.state.logins,
+                'messages': len(self.state.messages),
+                'updated_listings': len(self.state.updated_listings),
+                'deleted_listings': len(self.state.deleted_listings),
+                'created_listings': self.state.created_listings,
+            }
+
+    def _fixture(self, name: str, count: int, generator) -> str:
+        """Записанная страница из fixtures_dir или сгенерированная нужного размера"""
+        key = f"{name}:{count}"
+        page = self._pages.get(key)
+        if page is None:
+            path = os.path.join(self.settings.fixtures_dir or '', f"{name}.html")
+            if self.settings.fixtures_dir and os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    page = f.read()
+            else:
+                page = generator(count, self.settings.seed)
+            self._pages[key] = page
+        return page
+
+    def _before_request(self, method: str, path: str) -> Optional[int]:
+        """Учет запроса, задержка и внедренная ошибка (код ответа или None)"""
+        with self._lock:
+            route = re.sub(r'/\d+(?=/|$)', '/:id', path)
+            key = f"{method} {route}"
+            self.state.requests[key] = self.state.requests.get(key, 0) + 1
+
+            delay = self.settings.latency
+            if self.settings.latency_jitter:
+                delay += self._rng.uniform(0, self.settings.latency_jitter)
+
+            status = None
+            for index, (prefix, scripted_status) in enumerate(self._scripted):
+                if path.startswith(prefix):
+                    status = scripted_status
+                    del self._scripted[index]
+                    break
+            if status is None and self.settings.error_rate and self._rng.random() < self.settings.error_rate:
+                status = self.settings.error_status
+            if status is None and method == 'POST' and self.settings.csrf_fail_rate \
+                    and self._rng.random() < self.settings.csrf_fail_rate:
+                status = 419
+
+            if status == 419:
+                self.state.csrf_failures += 1
+            elif status is not None:
+                self.state.injected_errors += 1
+
+        if delay:
+            time.sleep(delay)
+        return status
+
+    def _handle(self, method: str, path: str, form: Dict[str, str]) -> Tuple[int, str, Dict[str, str]]:
+        """Маршрутизация запросов FunPay: (код, тело, заголовки)"""
+        token = self.csrf_token
+        parts = [part for part in path.split('/') if part]
+
+        if path == '/account/login':
+            if method == 'GET':
+                fields = ('<input type="text" name="login"><input type="password" name="password">')
+                return 200, _page(_form('/account/login', token, fields)), {}
+            if form.get('_token') != token:
+                with self._lock:
+                    self.state.csrf_failures += 1
+                return 419, _page('Page Expired'), {}
+            with self._lock:
+                self.state.logins += 1
+            return 302, '', {'Location': '/account/profile', 'Set-Cookie': 'golden_key=stub; Path=/'}
+
+        if path == '/account/profile':
+            return 200, _page('<div class="user-link-name">stub</div>'), {}
+
+        if path == '/account/orders':
+            return 200, self._fixture('orders', self.settings.orders, generate_orders_html), {}
+
+        if path == '/account/reviews':
+            return 200, self._fixture('reviews', self.settings.reviews, generate_reviews_html), {}
+
+        # /account/orders/<id>, /account/orders/<id>/chat, /orders/<id> - форма сообщения
+        if method == 'GET' and (
+            (len(parts) in (3, 4) and parts[:2] == ['account', 'orders'] and parts[-1] in (parts[2], 'chat'))
+            or (len(parts) == 2 and parts[0] == 'orders')
+        ):
+            order_id = parts[2] if parts[0] == 'account' else parts[1]
+            fields = '<textarea name="message" placeholder="Введите сообщение"></textarea>'
+            return 200, _page(_form(f'/account/orders/{order_id}/send', token, fields)), {}
+
+        if method == 'POST' and len(parts) == 4 and parts[:2] == ['account', 'orders'] and parts[3] == 'send':
+            if form.get('_token') != token:
+                return 419, _page('Page Expired'), {}
+            with self._lock:
+                self.state.messages.append({'order_id': parts[2], 'message': form.get('message', '')})
+            return 200, _page('<div class="chat-message">ok</div>'), {}
+
+        if len(parts) == 4 and parts[:2] == ['account', 'listings']:
+            listing_id = parts[2]
+            if method == 'GET' and parts[3] == 'edit':
+                fields = '<input name="price"><textarea name="description"></textarea>'
+                return 200, _page(_form(f'/account/listings/{listing_id}/update', token, fields)), {}
+            if method == 'POST' and parts[3] == 'update':
+                if form.get('_token') != token:
+                    return 419, _page('Page Expired'), {}
+                with self._lock:
+                    self.state.updated_listings[listing_id] = {k: v for k, v in form.items() if k != '_token'}
+                return 200, _page('updated'), {}
+
+        if len(parts) == 4 and parts[:3] == ['account', 'sells', 'delete']:
+            if method == 'GET':
+                return 200, _page(_form(path, token)), {}
+            if form.get('_token') != token:
+                return 419, _page('Page Expired'), {}
+            with self._lock:
+                self.state.deleted_listings.append(parts[3])
+            return 200, _page('deleted'), {}
+
+        if path == '/chat':
+            items = ''.join(
+                f'<div class="chat-item unread"><span class="chat-item__name">buyer_{i}</span>'
+                f'<span class="chat-item__message">Здравствуйте, как войти?</span>'
+                f'<span class="chat-item__time">12:0{i}</span></div>'
+                for i in range(3)
+            )
+            return 200, _page(items), {}
+
+        if path == '/account/sells/add' and method == 'POST':
+            if form.get('_token') != token:
+                return 419, _page('Page Expired'), {}
+            with self._lock:
+                self.state.created_listings += 1
+                listing_id = 1000 + self.state.created_listings
+            return 302, '', {'Location': f'/account/sells/{listing_id}'}
+
+        if method == 'GET' and len(parts) == 3 and parts[:2] == ['account', 'sells'] and parts[2].isdigit():
+            return 200, _page(f'<div class="listing">{parts[2]}</div>'), {}
+
+        if path == '/account/sells/add':
+            body = ''.join(f'<div data-testid="{name}"></div>' for name in (
+                'category-select', 'currency-select', 'delivery-unit-select'
+            ))
+            body += ''.join(f'<input data-testid="{name}">' for name in (
+                'title-input', 'price-input', 'delivery-time-input'
+            ))
+            body += ('<textarea data-testid="description-input"></textarea><div>Steam</div><div>₽</div>'
+                     '<div>минут</div>'
+                     f'<form method="post" action="/account/sells/add"><input type="hidden" name="_token" value="{token}">'
+                     '<button type="submit" data-testid="create-button">Создать</button></form>')
+            return 200, _page(body), {}
+
+        return 404, _page('Not Found'), {}
+
+    def _control(self, method: str, path: str, body: bytes) -> Tuple[int, str]:
+        """Управление двойником: /__stub__/config, /__stub__/fail, /__stub__/stats, /__stub__/reset"""
+        command = path[len(CONTROL_PREFIX):]
+        try:
+            payload = json.loads(body or b'{}')
+            if command == 'stats':
+                return 200, json.dumps(self.stats(), ensure_ascii=False)
+            if command == 'config' and method == 'POST':
+                self.configure(**payload)
+                return 200, json.dumps(asdict(self.settings), ensure_ascii=False)
+            if command == 'config':
+                return 200, json.dumps(asdict(self.settings), ensure_ascii=False)
+            if command == 'fail' and method == 'POST':
+                self.fail_next(payload['path'], int(payload.get('status', 503)), int(payload.get('count', 1)))
+                return 200, '{}'
+            if command == 'reset' and method == 'POST':
+                with self._lock:
+                    self.state = StubState()
+                    self._scripted.clear()
+                return 200, '{}'
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, json.dumps({'error': str(e)}, ensure_ascii=False)
+        return 404, '{}'
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                return None
+
+            def setup(self):
+                super().setup()
+                # Заголовки и тело пишутся раздельно: без TCP_NODELAY каждый ответ ждет delayed ACK
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _respond(self, status: int, body: str, headers: Dict[str, str], content_type: str):
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _dispatch(self, method: str):
+                path = urlsplit(self.path).path
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+
+                if path.startswith(CONTROL_PREFIX):
+                    status, text = stub._control(method, path, body)
+                    self._respond(status, text, {}, 'application/json; charset=utf-8')
+                    return
+
+                injected = stub._before_request(method, path)
+                if injected is not None:
+                    self._respond(injected, _page(f'Stub error {injected}'), {}, 'text/html; charset=utf-8')
+                    return
+
+                form = {key: values[-1] for key, values in parse_qs(body.decode('utf-8')).items()}
+                status, text, headers = stub._handle(method, path, form)
+                self._respond(status, text, headers, 'text/html; charset=utf-8')
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+        return Handler
+
+
+def main(argv=None):
+    """Запуск двойника из командной строки"""
+    defaults = StubSettings()
+    parser = argparse.ArgumentParser(description="Локальный двойник FunPay")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--orders', type=int, default=defaults.orders, help="Заказов на странице")
+    parser.add_argument('--reviews', type=int, default=defaults.reviews, help="Отзывов на странице")
+    parser.add_argument('--latency', type=float, default=defaults.latency, help="Задержка ответа, с")
+    parser.add_argument('--latency-jitter', type=float, default=defaults.latency_jitter)
+    parser.add_argument('--error-rate', type=float, default=defaults.error_rate, help="Доля ответов с ошибкой")
+    parser.add_argument('--error-status', type=int, default=defaults.error_status)
+    parser.add_argument('--csrf-fail-rate', type=float, default=defaults.csrf_fail_rate, help="Доля POST с 419")
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    parser.add_argument('--fixtures', help="Каталог записанных страниц (orders.html, reviews.html)")
+    args = parser.parse_args(argv)
+
+    settings = StubSettings(
+        orders=args.orders, reviews=args.reviews, latency=args.latency, latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate, error_status=args.error_status, csrf_fail_rate=args.csrf_fail_rate,
+        seed=args.seed, fixtures_dir=args.fixtures
+    )
+    server = FunPayStubServer(args.host, args.port, settings)
+    print(f"🧪 Двойник FunPay: {server.url} (FUNPAY_BASE_URL={server.url})")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️ Остановка двойника")
+    finally:
+        server._httpd.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
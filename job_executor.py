@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🧵 Исполнитель задач планировщика
+Задачи выполняются в пуле из Config.JOB_WORKERS слотов в порядке приоритета,
+не более одного экземпляра каждой задачи одновременно, с таймаутом и политикой пропуска.
+
+Политики (Misfire):
+- SKIP - запуск, пришедшийся на еще выполняющийся экземпляр или опоздавший больше
+  misfire_grace секунд, пропускается;
+- COALESCE - такие запуски сворачиваются в один, который выполняется сразу после текущего.
+"""
+
+import time
+import asyncio
+import logging
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum, IntEnum
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+from config import Config
+from metrics import Counter, Gauge, Histogram
+
+JOB_DURATION_SECONDS = Histogram(
+    'steam_rental_job_duration_seconds', 'Длительность задач планировщика', ('job',)
+)
+JOB_LAG_SECONDS = Histogram(
+    'steam_rental_job_lag_seconds', 'Задержка запуска задачи относительно расписания', ('job',)
+)
+JOB_RUNS = Counter('steam_rental_job_runs', 'Запуски задач планировщика', ('job', 'status'))
+JOB_LAST_SUCCESS = Gauge(
+    'steam_rental_job_last_success_timestamp_seconds', 'Время последнего успешного запуска задачи', ('job',)
+)
+
+
+class Priority(IntEnum):
+    """Приоритет задачи (меньше - раньше)"""
+    CRITICAL = 0  # завершение аренд
+    HIGH = 1      # выдача заказов
+    NORMAL = 2
+    LOW = 3       # статистика, синхронизация, обслуживание
+
+
+class Misfire(str, Enum):
+    """Что делать с запуском, который нельзя выполнить вовремя"""
+    SKIP = 'skip'
+    COALESCE = 'coalesce'
+
+
+class JobExecutor:
+    """Пул исполнения задач с приоритетами
+
+    Задача - объект с полями name, func, priority, timeout, misfire, misfire_grace
+    (см. async_runtime.ScheduledJob). Синхронные функции выполняются в потоках
+    (через runner, если задан), корутины - в event loop. Поток задачи, превысившей таймаут,
+    прервать нельзя: слот освобождается, а следующий запуск ждет фактического завершения.
+    """
+
+    HISTORY_SIZE = 200
+
+    def __init__(self, workers: Optional[int] = None, runner: Optional[Callable[[Callable], Any]] = None):
+        self.workers = workers or Config.JOB_WORKERS
+        self.runner = runner
+        self.logger = logging.getLogger(__name__)
+        # Запас потоков для задач, продолжающих работу после таймаута
+        self._pool = ThreadPoolExecutor(max_workers=self.workers * 2, thread_name_prefix='job')
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._sequence = itertools.count()
+        self._queued: Set[str] = set()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._coalesced: Dict[str, Any] = {}
+        self.history: Deque[Dict] = deque(maxlen=self.HISTORY_SIZE)
+
+    async def start(self):
+        """Запуск обработчиков очереди в текущем event loop"""
+        if self._worker_tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._worker_tasks = [asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+                              for i in range(self.workers)]
+
+    def submit(self, job, scheduled_at: Optional[float] = None) -> bool:
+        """Постановка запуска в очередь; False - запуск пропущен или свернут"""
+        scheduled_at = scheduled_at or time.time()
+        if job.name in self._queued or job.name in self._in_flight:
+            if job.misfire == Misfire.COALESCE:
+                self._coalesced[job.name] = job
+                self._record(job, 'coalesced', scheduled_at)
+            else:
+                self._record(job, 'skipped', scheduled_at)
+            return False
+
+        self._queued.add(job.name)
+        self._queue.put_nowait((int(job.priority), scheduled_at, next(self._sequence), job))
+        return True
+
+    async def _worker(self):
+        while True:
+            _, scheduled_at, _, job = await self._queue.get()
+            self._queued.discard(job.name)
+            try:
+                await self._run(job, scheduled_at)
+            except Exception as e:
+                self.logger.error(f"❌ Ошибка исполнителя задачи {job.name}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job, scheduled_at: float):
+        started = time.time()
+        lag = max(0.0, started - scheduled_at)
+        if job.misfire == Misfire.SKIP and job.misfire_grace is not None and lag > job.misfire_grace:
+            self.logger.warning(f"⚠️ Задача {job.name} опоздала на {lag:.1f} с и пропущена")
+            self._record(job, 'skipped', scheduled_at)
+            return
+        JOB_LAG_SECONDS.labels(job.name).observe(lag)
+
+        loop = asyncio.get_running_loop()
+        if asyncio.iscoroutinefunction(job.func):
+            future = asyncio.ensure_future(job.func())
+        elif self.runner:
+            future = loop.run_in_executor(self._pool, self.runner, job.func)
+        else:
+            future = loop.run_in_executor(self._pool, job.func)
+        self._in_flight[job.name] = future
+        run = {'job': job.name, 'priority': int(job.priority), 'scheduled_at': scheduled_at,
+               'started_at': started, 'lag': lag, 'timed_out': False}
+        future.add_done_callback(lambda done: self._finished(job, run, done))
+
+        try:
+            # shield: поток не прерывается, корутина отменяется явно
+            await asyncio.wait_for(asyncio.shield(future), timeout=job.timeout)
+        except asyncio.TimeoutError:
+            run['timed_out'] = True
+            self.logger.error(f"❌ Задача {job.name} превысила таймаут {job.timeout} с")
+            if asyncio.iscoroutinefunction(job.func):
+                future.cancel()
+        except Exception:
+            # Ошибка учитывается в _finished
+            pass
+
+    def _finished(self, job, run: Dict, future: asyncio.Future):
+        """Учет завершенного запуска и свернутый повтор"""
+        self._in_flight.pop(job.name, None)
+        duration = time.time() - run['started_at']
+        if run['timed_out']:
+            status = 'timeout'
+        elif future.cancelled() or future.exception() is not None:
+            status = 'error'
+            if not future.cancelled():
+                self.logger.error(f"❌ Ошибка задачи {job.name}: {future.exception()}")
+        else:
+            status = 'ok'
+            JOB_LAST_SUCCESS.labels(job.name).set(time.time())
+        JOB_DURATION_SECONDS.labels(job.name).observe(duration)
+        JOB_RUNS.labels(job.name, status).inc()
+        self.history.append(dict(run, status=status, duration=duration))
+
+        coalesced = self._coalesced.pop(job.name, None)
+        if coalesced is not None and self._queue is not None:
+            self.submit(coalesced)
+
+    def _record(self, job, status: str, scheduled_at: float):
+        JOB_RUNS.labels(job.name, status).inc()
+        self.history.append({'job': job.name, 'priority': int(job.priority), 'scheduled_at': scheduled_at,
+                             'status': status})
+
+    def running(self) -> List[str]:
+        """Задачи, выполняющиеся сейчас"""
+        return list(self._in_flight)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Сводка по задачам: число запусков по статусам, последняя длительность и задержка"""
+        summary: Dict[str, Dict] = {}
+        for run in self.history:
+            item = summary.setdefault(run['job'], {'runs': {}, 'last_duration': None, 'last_lag': None})
+            item['runs'][run['status']] = item['runs'].get(run['status'], 0) + 1
+            if 'duration' in run:
+                item['last_duration'] = run['duration']
+                item['last_lag'] = run['lag']
+        return summary
+
+    async def stop(self, timeout: Optional[float] = None):
+        """Остановка обработчиков; выполняющиеся задачи дожидаются завершения"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._coalesced.clear()
+        self._queued.clear()
+        if self._in_flight:
+            await asyncio.wait(list(self._in_flight.values()), timeout=timeout)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📬 Очередь отложенных задач в SQLite
+Разовые действия с выполнением в заданное время (смена пароля после аренды, повторная
+отправка данных, напоминание об отзыве) хранятся в таблице delayed_jobs и переживают перезапуск.
+
+Обработчик забирает порцию одним UPDATE ... RETURNING: задачи блокируются на
+visibility_timeout секунд, и если обработчик упал, их заберет следующий. Ошибка
+откладывает задачу с экспоненциальной паузой, после max_attempts попыток задача
+переходит в status = 'dead' (dead letter) и ждет разбора.
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from config import Config
+from metrics import Counter
+
+QUEUE_JOBS = Counter('steam_rental_delayed_jobs', 'Обработанные отложенные задачи', ('kind', 'status'))
+
+
+@dataclass
+class QueuedJob:
+    """Задача, полученная обработчиком"""
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+
+
+class JobQueue:
+    """Очередь delayed_jobs"""
+
+    def __init__(self, db_path: str, visibility_timeout: Optional[float] = None,
+                 max_attempts: Optional[int] = None, retry_delay: float = 30.0, worker_id: Optional[str] = None):
+        self.db_path = db_path
+        self.visibility_timeout = visibility_timeout or Config.JOB_QUEUE_VISIBILITY_TIMEOUT
+        self.max_attempts = max_attempts or Config.JOB_QUEUE_MAX_ATTEMPTS
+        self.retry_delay = retry_delay
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.logger = logging.getLogger(__name__)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS delayed_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL DEFAULT '{}',
+                    dedupe_key TEXT,
+                    status TEXT NOT NULL DEFAULT 'queued',  -- queued | dead
+                    run_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    locked_by TEXT,
+                    locked_until REAL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_delayed_jobs_due ON delayed_jobs (run_at) "
+                         "WHERE status = 'queued'")
+            # Одна ожидающая задача на ключ (например, смена пароля одного аккаунта)
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_delayed_jobs_dedupe ON delayed_jobs (dedupe_key) "
+                         "WHERE status = 'queued' AND dedupe_key IS NOT NULL")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def enqueue(self, kind: str, payload: Optional[Dict] = None, delay: float = 0.0,
+                run_at: Optional[float] = None, dedupe_key: Optional[str] = None,
+                max_attempts: Optional[int] = None) -> Optional[int]:
+        """Постановка задачи; None - задача с таким dedupe_key уже ждет выполнения"""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute("""
+                INSERT OR IGNORE INTO delayed_jobs (kind, payload, dedupe_key, run_at, max_attempts, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (kind, json.dumps(payload or {}, ensure_ascii=False), dedupe_key,
+                  run_at if run_at is not None else now + delay, max_attempts or self.max_attempts, now))
+            return cursor.lastrowid if cursor.rowcount else None
+
+    def enqueue_many(self, jobs: Iterable[Dict]) -> int:
+        """Постановка пачки задач одной транзакцией (ключи как у enqueue)"""
+        now = time.time()
+        rows = [
+            (job['kind'], json.dumps(job.get('payload') or {}, ensure_ascii=False), job.get('dedupe_key'),
+             job['run_at'] if job.get('run_at') is not None else now + job.get('delay', 0.0),
+             job.get('max_attempts') or self.max_attempts, now)
+            for job in jobs
+        ]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("""
+                INSERT OR IGNORE INTO delayed_jobs (kind, payload, dedupe_key, run_at, max_attempts, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            return conn.total_changes
+
+    def claim(self, limit: int = 50) -> List[QueuedJob]:
+        """Захват до limit готовых задач одним UPDATE ... RETURNING"""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute("""
+                UPDATE delayed_jobs
+                SET locked_by = ?, locked_until = ?, attempts = attempts + 1
+                WHERE id IN (
+                    SELECT id FROM delayed_jobs
+                    WHERE status = 'queued' AND run_at <= ? AND (locked_until IS NULL OR locked_until <= ?)
+                    ORDER BY run_at, id
+                    LIMIT ?
+                )
+                RETURNING id, kind, payload, attempts, max_attempts
+            """, (self.worker_id, now + self.visibility_timeout, now, now, limit)).fetchall()
+        jobs = [QueuedJob(row[0], row[1], json.loads(row[2]), row[3], row[4]) for row in rows]
+        jobs.sort(key=lambda job: job.id)
+        return jobs
+
+    def complete(self, job_ids: Iterable[int]) -> int:
+        """Подтверждение выполнения (задачи удаляются, если их еще держит этот обработчик)"""
+        ids = list(job_ids)
+        if not ids:
+            return 0
+        placeholders = ', '.join('?' * len(ids))
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(f"DELETE FROM delayed_jobs WHERE locked_by = ? AND id IN ({placeholders})",
+                                (self.worker_id, *ids)).rowcount
+
+    def fail(self, job: QueuedJob, error: str) -> str:
+        """Ошибка задачи: повтор с паузой или dead letter; возвращает новый статус"""
+        dead = job.attempts >= job.max_attempts
+        status = 'dead' if dead else 'queued'
+        run_at = time.time() + self.retry_delay * 2 ** (job.attempts - 1)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                UPDATE delayed_jobs
+                SET status = ?, run_at = ?, locked_by = NULL, locked_until = NULL, last_error = ?
+                WHERE id = ? AND locked_by = ?
+            """, (status, run_at, str(error)[:1000], job.id, self.worker_id))
+        return status
+
+    def process(self, handlers: Dict[str, Callable[[Dict], Any]], limit: int = 50) -> Dict[str, int]:
+        """Захват порции и выполнение обработчиками по kind
+
+        Обработчик, вернувший False или бросивший исключение, считается неудачным.
+        """
+        counts = {'done': 0, 'retry': 0, 'dead': 0}
+        jobs = self.claim(limit)
+        done = []
+        for job in jobs:
+            handler = handlers.get(job.kind)
+            try:
+                if handler is None:
+                    raise LookupError(f"нет обработчика для {job.kind}")
+                if handler(job.payload) is False:
+                    raise RuntimeError("обработчик вернул False")
+                done.append(job.id)
+                QUEUE_JOBS.labels(job.kind, 'done').inc()
+                counts['done'] += 1
+            except Exception as e:
+                status = self.fail(job, e)
+                key = 'dead' if status == 'dead' else 'retry'
+                QUEUE_JOBS.labels(job.kind, key).inc()
+                counts[key] += 1
+                if status == 'dead':
+                    self.logger.error(f"❌ Задача {job.kind} #{job.id} отправлена в dead letter: {e}")
+                else:
+                    self.logger.warning(f"⚠️ Задача {job.kind} #{job.id} будет повторена "
+                                        f"(попытка {job.attempts}/{job.max_attempts}): {e}")
+        self.complete(done)
+        return counts
+
+    def dead_letters(self, limit: int = 50) -> List[Dict]:
+        """Задачи, исчерпавшие попытки"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("""
+                SELECT id, kind, payload, attempts, last_error, created_at FROM delayed_jobs
+                WHERE status = 'dead' ORDER BY id DESC LIMIT ?
+            """, (limit,)).fetchall()
+        return [{'id': row[0], 'kind': row[1], 'payload': json.loads(row[2]), 'attempts': row[3],
+                 'last_error': row[4], 'created_at': row[5]} for row in rows]
+
+    def requeue_dead(self, job_id: int) -> bool:
+        """Возврат задачи из dead letter в очередь с обнулением попыток"""
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("""
+                UPDATE OR IGNORE delayed_jobs SET status = 'queued', attempts = 0, run_at = ?, last_error = NULL
+                WHERE id = ? AND status = 'dead'
+            """, (time.time(), job_id)).rowcount > 0
+
+    def stats(self) -> Dict[str, int]:
+        """Число задач: готовых, отложенных, выполняющихся и в dead letter"""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            row = conn.execute("""
+                SELECT
+                    SUM(status = 'queued' AND run_at <= ? AND (locked_until IS NULL OR locked_until <= ?)),
+                    SUM(status = 'queued' AND run_at > ? AND (locked_until IS NULL OR locked_until <= ?)),
+                    SUM(status = 'queued' AND locked_until > ?),
+                    SUM(status = 'dead')
+                FROM delayed_jobs
+            """, (now, now, now, now, now)).fetchone()
+        return {'ready': row[0] or 0, 'delayed': row[1] or 0, 'in_flight': row[2] or 0, 'dead': row[3] or 0}
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+👑 Аренда лидерства в SQLite
+Несколько процессов (воркеры gunicorn, реплики) делят одну базу, задачи планировщика
+выполняет только держатель аренды. Аренда - строка таблицы leases: держатель, срок и
+fencing token, который растет при каждой смене держателя. Захват и продление - один
+атомарный UPSERT ... RETURNING, поэтому два процесса не могут получить аренду одновременно.
+
+Держатель продлевает аренду каждые ttl/3 секунд; если он перестал это делать, аренда
+истекает через ttl, и ее забирает следующий процесс. Сроки сравниваются по часам процессов,
+поэтому реплики должны работать на одном хосте или с синхронизированным временем.
+"""
+
+import os
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+from contextlib import closing
+from typing import Dict, Optional
+from config import Config
+from metrics import Counter, Gauge
+
+LEASE_IS_LEADER = Gauge('steam_rental_lease_is_leader', 'Процесс держит аренду (1 - лидер)', ('lease',))
+LEASE_TRANSITIONS = Counter('steam_rental_lease_transitions', 'Смены статуса лидера', ('lease', 'state'))
+
+
+class LeaseLostError(RuntimeError):
+    """Аренда утрачена: другой процесс стал лидером или срок истек"""
+
+
+def default_holder() -> str:
+    """Идентификатор процесса: хост, pid и случайный суффикс"""
+    return Config.INSTANCE_ID or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaderLease:
+    """Аренда name для процесса holder"""
+
+    def __init__(self, db_path: str, name: str = 'scheduler', ttl: Optional[float] = None,
+                 holder: Optional[str] = None):
+        self.db_path = db_path
+        self.name = name
+        self.ttl = ttl or Config.LEASE_TTL
+        self.holder = holder or default_holder()
+        self.token: Optional[int] = None
+        self.valid_until = 0.0
+        self.logger = logging.getLogger(__name__)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    name TEXT PRIMARY KEY,
+                    holder TEXT NOT NULL,
+                    token INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    acquired_at REAL NOT NULL,
+                    renewed_at REAL NOT NULL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @property
+    def is_leader(self) -> bool:
+        """Аренда у этого процесса и не истекла по локальным часам"""
+        return self.token is not None and time.time() < self.valid_until
+
+    def acquire(self) -> Optional[int]:
+        """Захват или продление аренды; возвращает fencing token или None, если лидер другой"""
+        started = time.time()
+        expires_at = started + self.ttl
+        try:
+            with closing(self._connect()) as conn, conn:
+                row = conn.execute("""
+                    INSERT INTO leases (name, holder, token, expires_at, acquired_at, renewed_at)
+                    VALUES (?, ?, 1, ?, ?, ?)
+                    ON CONFLICT (name) DO UPDATE SET
+                        token = CASE WHEN leases.holder = excluded.holder AND leases.expires_at > excluded.renewed_at
+                                     THEN leases.token ELSE leases.token + 1 END,
+                        acquired_at = CASE WHEN leases.holder = excluded.holder AND leases.expires_at > excluded.renewed_at
+                                           THEN leases.acquired_at ELSE excluded.acquired_at END,
+                        holder = excluded.holder,
+                        expires_at = excluded.expires_at,
+                        renewed_at = excluded.renewed_at
+                    WHERE leases.holder = excluded.holder OR leases.expires_at <= excluded.renewed_at
+                    RETURNING token
+                """, (self.name, self.holder, expires_at, started, started)).fetchone()
+        except sqlite3.Error as e:
+            # Без подтверждения из базы лидерство не продлевается
+            self.logger.error(f"❌ Ошибка продления аренды {self.name}: {e}")
+            row = None
+
+        previous = self.token if self.is_leader else None
+        if row:
+            self.token, self.valid_until = row[0], expires_at
+        else:
+            self.token, self.valid_until = None, 0.0
+
+        if self.token != previous:
+            state = 'acquired' if self.token is not None else 'lost'
+            LEASE_TRANSITIONS.labels(self.name, state).inc()
+            if self.token is not None:
+                self.logger.info(f"👑 {self.holder} стал лидером {self.name} (token {self.token})")
+            elif previous is not None:
+                self.logger.warning(f"⚠️ {self.holder} утратил лидерство {self.name}")
+        LEASE_IS_LEADER.labels(self.name).set(1 if self.token is not None else 0)
+        return self.token
+
+    def verify(self, conn: Optional[sqlite3.Connection] = None):
+        """Проверка аренды по базе (fencing) перед работой лидера
+
+        С conn проверка выполняется в транзакции вызывающего: если после нее сделать изменения
+        в той же транзакции, новый лидер не сможет вмешаться до commit.
+        """
+        if not self.is_leader:
+            raise LeaseLostError(f"Аренда {self.name} не принадлежит {self.holder}")
+        query = "SELECT 1 FROM leases WHERE name = ? AND holder = ? AND token = ? AND expires_at > ?"
+        params = (self.name, self.holder, self.token, time.time())
+        if conn is not None:
+            row = conn.execute(query, params).fetchone()
+        else:
+            with closing(self._connect()) as own:
+                row = own.execute(query, params).fetchone()
+        if not row:
+            self.token, self.valid_until = None, 0.0
+            LEASE_IS_LEADER.labels(self.name).set(0)
+            raise LeaseLostError(f"Аренда {self.name} перешла к другому процессу")
+
+    def release(self):
+        """Освобождение аренды (следующий процесс забирает ее без ожидания ttl)"""
+        if self.token is None:
+            return
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute("UPDATE leases SET expires_at = 0 WHERE name = ? AND holder = ? AND token = ?",
+                             (self.name, self.holder, self.token))
+            self.logger.info(f"👋 {self.holder} освободил аренду {self.name}")
+        except sqlite3.Error as e:
+            self.logger.error(f"❌ Ошибка освобождения аренды {self.name}: {e}")
+        self.token, self.valid_until = None, 0.0
+        LEASE_IS_LEADER.labels(self.name).set(0)
+
+    def current(self) -> Optional[Dict]:
+        """Текущий держатель аренды"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT holder, token, expires_at, acquired_at, renewed_at FROM leases WHERE name = ?",
+                               (self.name,)).fetchone()
+        if not row:
+            return None
+        return {'holder': row[0], 'token': row[1], 'expires_at': row[2], 'acquired_at': row[3],
+                'renewed_at': row[4], 'expired': row[2] <= time.time()}
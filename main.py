@@ -5,10 +5,16 @@
 """
 
 import os
+import hmac
+import asyncio
 import logging
 import threading
-import time
-from flask import Flask, jsonify
+from readiness import readiness
+import metrics
+from async_runtime import offload
+
+with readiness.phase('import_flask'):
+    from flask import Flask, Response, jsonify, request
 
 # Настройка логирования
 logging.basicConfig(
@@ -24,6 +30,16 @@ app = Flask(__name__)
 bot = None
 system = None
 
+# Компоненты, о готовности которых сообщает /health
+COMPONENTS = ('database', 'system', 'bot')
+readiness.register(COMPONENTS)
+
+COMPONENT_READY = metrics.Gauge(
+    'steam_rental_component_ready', 'Готовность компонента (1 - готов)', ('component',)
+)
+for component in COMPONENTS:
+    COMPONENT_READY.labels(component).set_function(lambda name=component: readiness.is_ready(name))
+
 @app.route('/')
 def home():
     """Главная страница"""
@@ -37,12 +53,25 @@ def home():
 @app.route('/health')
 def health():
     """Проверка здоровья сервиса"""
+    snapshot = readiness.snapshot()
     return jsonify({
         "status": "healthy",
+        "ready": snapshot['ready'],
         "bot_running": bot is not None,
-        "system_running": system is not None
+        "system_running": system is not None,
+        "components": snapshot['components'],
+        "boot": snapshot['boot']
     })
 
+@app.route('/ready')
+def ready():
+    """Готовность всех компонентов (503, пока запуск не завершен)"""
+    snapshot = readiness.snapshot()
+    return jsonify({
+        "ready": snapshot['ready'],
+        "components": snapshot['components']
+    }), 200 if snapshot['ready'] else 503
+
 @app.route('/status')
 def status():
     """Статус системы"""
@@ -51,71 +80,117 @@ def status():
         "message": "Steam Rental System готов к работе"
     })
 
-def start_bot():
-    """Запуск Telegram бота в отдельном потоке"""
+@app.route('/metrics')
+def metrics_endpoint():
+    """Метрики в текстовом формате Prometheus"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+def admin_authorized() -> bool:
+    """Проверка токена администратора (заголовок X-Admin-Token)"""
+    token = os.getenv('ADMIN_API_TOKEN')
+    if not token:
+        return False
+    return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+
+@app.route('/admin/queries')
+def admin_queries():
+    """Самые тяжелые SQL-запросы (профилировщик QUERY_PROFILING)"""
+    if not admin_authorized():
+        return jsonify({"error": "forbidden"}), 403
+    
+    from query_profiler import profiler
+    try:
+        limit = int(request.args.get('limit', 20))
+        snapshot = profiler.snapshot(limit, request.args.get('sort', 'total_time'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if request.args.get('reset') == '1':
+        profiler.reset()
+    return jsonify(snapshot)
+
+async def start_bot():
+    """Запуск Telegram бота в общем event loop"""
     global bot
     try:
         # Импортируем здесь, чтобы избежать ошибок при деплое
-        from telegram_bot import SteamRentalBot
+        with readiness.phase('import_bot'):
+            from telegram_bot import SteamRentalBot
         
         # Создаем и настраиваем полного бота
-        bot = SteamRentalBot()
-        if bot.setup():
+        with readiness.phase('setup_bot'):
+            bot = SteamRentalBot()
+            configured = bot.setup()
+        
+        if configured:
             logger.info("Telegram бот настроен успешно")
+            await bot.start_async(on_ready=lambda: readiness.mark_ready('bot'))
             logger.info("Telegram бот запущен")
-            bot.run()
         else:
             logger.error("Не удалось настроить Telegram бота")
+            readiness.mark_failed('bot', "Не удалось настроить Telegram бота")
             
     except Exception as e:
         logger.error(f"Ошибка запуска бота: {e}")
+        readiness.mark_failed('bot', e)
         # Не останавливаем приложение при ошибке бота
 
-def start_system():
-    """Запуск основной системы в отдельном потоке"""
+async def start_system():
+    """Запуск основной системы в общем event loop"""
     global system
     try:
         # Импортируем здесь, чтобы избежать ошибок при деплое
-        from steam_rental_system import SteamRentalSystem
-        system = SteamRentalSystem()
+        with readiness.phase('import_system'):
+            from steam_rental_system import SteamRentalSystem
+        
+        # Конструктор открывает базу и HTTP-сессию - в пуле потоков
+        with readiness.phase('setup_system'):
+            system = await offload(SteamRentalSystem)
         logger.info("Основная система запущена")
-        system.start()
+        await system.run_async(on_ready=lambda: readiness.mark_ready('system'))
     except Exception as e:
         logger.error(f"Ошибка запуска системы: {e}")
+        readiness.mark_failed('system', e)
         # Не останавливаем приложение при ошибке системы
 
-if __name__ == '__main__':
-    logger.info("🚀 Запуск Steam Rental System...")
-    
-    # Отладка конфигурации
+async def boot():
+    """Фоновый запуск компонентов, пока веб-сервер уже принимает запросы"""
+    # Отладка конфигурации (выводит токены, поэтому только по DEBUG_CONFIG=true)
     try:
-        from debug_config import debug_config
-        debug_config()
+        from config import Config
+        if Config.DEBUG_CONFIG:
+            from debug_config import debug_config
+            debug_config()
     except Exception as e:
         logger.warning(f"Ошибка отладки конфигурации: {e}")
     
     # Инициализируем систему (добавляем тестовые аккаунты)
     try:
-        from init_system import init_system
-        init_system()
+        with readiness.phase('init_system'):
+            from init_system import init_system
+            await offload(init_system)
+        readiness.mark_ready('database')
     except Exception as e:
         logger.warning(f"Ошибка инициализации системы: {e}")
+        readiness.mark_failed('database', e)
     
-    # Запускаем основную систему в отдельном потоке
-    system_thread = threading.Thread(target=start_system, daemon=True)
-    system_thread.start()
+    # Система и бот не зависят друг от друга и запускаются параллельно в одном цикле
+    await asyncio.gather(start_system(), start_bot())
     
-    # Ждем немного для инициализации системы
-    time.sleep(3)
-    
-    # Запускаем бота в отдельном потоке
-    bot_thread = threading.Thread(target=start_bot, daemon=True)
-    bot_thread.start()
+    # Цикл продолжает обслуживать бота, даже если система остановилась
+    await asyncio.Event().wait()
+
+def run_runtime():
+    """Единый event loop для бота и планировщика задач"""
+    asyncio.run(boot())
+
+if __name__ == '__main__':
+    logger.info("🚀 Запуск Steam Rental System...")
     
-    # Ждем еще немного для инициализации бота
-    time.sleep(3)
+    # Компоненты запускаются в фоне, о готовности сообщают через readiness
+    threading.Thread(target=run_runtime, name="runtime", daemon=True).start()
     
-    # Запускаем Flask сервер
+    # Веб-сервер поднимается сразу, /health доступен с первых секунд
     port = int(os.environ.get('PORT', 5000))
     logger.info(f"Запуск веб-сервера на порту {port}")
     app.run(host='0.0.0.0', port=port, debug=False)
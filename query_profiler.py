@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🐢 Профилировщик SQL-запросов
+Включается переменной QUERY_PROFILING=true: каждый запрос Database замеряется,
+медленные пишутся в лог, агрегат по отпечаткам доступен на /admin/queries.
+
+Отчет: python query_profiler.py report [--file путь | --url адрес] [--top N] [--sort поле]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import logging
+import sqlite3
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# Поля, по которым можно сортировать отчет
+SORT_FIELDS = ('total_time', 'calls', 'avg_time', 'max_time', 'rows')
+
+
+def fingerprint(sql: str) -> str:
+    """Отпечаток запроса: литералы заменены на ?, пробелы схлопнуты"""
+    normalized = _STRING_LITERAL.sub("?", sql)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    return _IN_LIST.sub("(?+)", normalized)
+
+
+def _find_caller() -> str:
+    """Первый кадр стека за пределами профилировщика (метод Database и строка)"""
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    owner = frame.f_locals.get('self')
+    name = frame.f_code.co_name
+    if owner is not None:
+        name = f"{type(owner).__name__}.{name}"
+    return f"{name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})"
+
+
+class QueryStats:
+    """Агрегат по одному отпечатку запроса"""
+    __slots__ = ('calls', 'total_time', 'max_time', 'rows', 'callers')
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.callers: Dict[str, int] = {}
+
+    def as_dict(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'total_time': self.total_time,
+            'avg_time': self.total_time / self.calls if self.calls else 0.0,
+            'max_time': self.max_time,
+            'rows': self.rows,
+            'callers': dict(sorted(self.callers.items(), key=lambda item: -item[1]))
+        }
+
+
+class QueryProfiler:
+    """Сбор статистики запросов"""
+
+    def __init__(self, enabled: bool = False, slow_threshold_ms: float = 100.0,
+                 snapshot_path: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.enabled = enabled
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()
+        self._stats: Dict[str, QueryStats] = {}
+        self.started = time.time()
+        if snapshot_path:
+            atexit.register(self.save)
+
+    def record(self, sql: str, duration: float, rows: int = 0, caller: Optional[str] = None,
+               count_call: bool = True):
+        """Учет выполнения (или дочитывания результата) запроса"""
+        key = fingerprint(sql)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = QueryStats()
+            if count_call:
+                stats.calls += 1
+                if caller:
+                    stats.callers[caller] = stats.callers.get(caller, 0) + 1
+            stats.total_time += duration
+            if duration > stats.max_time:
+                stats.max_time = duration
+            stats.rows += max(rows, 0)
+
+    def log_if_slow(self, sql: str, duration: float, rows: int, caller: Optional[str]):
+        """Запись медленного запроса в лог"""
+        if duration >= self.slow_threshold:
+            self.logger.warning(
+                f"🐢 Медленный запрос {duration * 1000:.1f} мс, строк {rows}, {caller}: {fingerprint(sql)}"
+            )
+
+    def top(self, limit: int = 20, sort: str = 'total_time') -> List[Dict]:
+        """Самые тяжелые запросы"""
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Сортировка возможна по: {', '.join(SORT_FIELDS)}")
+        with self._lock:
+            items = [dict(stats.as_dict(), query=query) for query, stats in self._stats.items()]
+        items.sort(key=lambda item: item[sort], reverse=True)
+        return items[:limit]
+
+    def snapshot(self, limit: int = 20, sort: str = 'total_time') -> Dict:
+        """Агрегат для эндпоинта и файла"""
+        with self._lock:
+            total_time = sum(stats.total_time for stats in self._stats.values())
+            total_calls = sum(stats.calls for stats in self._stats.values())
+            distinct = len(self._stats)
+        return {
+            'enabled': self.enabled,
+            'since': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'slow_threshold_ms': self.slow_threshold * 1000,
+            'total_time': total_time,
+            'total_calls': total_calls,
+            'distinct_queries': distinct,
+            'queries': self.top(limit, sort)
+        }
+
+    def save(self, path: Optional[str] = None, limit: int = 100):
+        """Сохранение агрегата в файл"""
+        path = path or self.snapshot_path
+        if not path or not self._stats:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(limit), f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            self.logger.warning(f"Не удалось сохранить профиль запросов: {e}")
+
+    def reset(self):
+        """Сброс статистики"""
+        with self._lock:
+            self._stats.clear()
+            self.started = time.time()
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Курсор, замеряющий выполнение и чтение результатов"""
+
+    _sql = None
+    _caller = None
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def _timed(self, method, sql, parameters):
+        profiler = self.connection.profiler
+        caller = _find_caller()
+        started = time.perf_counter()
+        try:
+            return method(sql, parameters)
+        finally:
+            duration = time.perf_counter() - started
+            rows = self.rowcount if self.rowcount > 0 else 0
+            self._sql, self._caller = sql, caller
+            profiler.record(sql, duration, rows, caller)
+            profiler.log_if_slow(sql, duration, rows, caller)
+
+    def _fetched(self, started: float, rows: int):
+        if self._sql is not None:
+            self.connection.profiler.record(self._sql, time.perf_counter() - started, rows, count_call=False)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, 1 if row is not None else 0)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(size if size is not None else self.arraysize)
+        self._fetched(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows))
+        if self._sql is not None:
+            self.connection.profiler.log_if_slow(
+                self._sql, time.perf_counter() - started, len(rows), self._caller
+            )
+        return rows
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """Соединение, создающее профилирующие курсоры"""
+
+    profiler: QueryProfiler = None
+
+    def cursor(self, factory=ProfilingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+profiler = QueryProfiler(
+    enabled=os.getenv('QUERY_PROFILING', 'False').lower() == 'true',
+    slow_threshold_ms=float(os.getenv('SLOW_QUERY_MS', '100')),
+    snapshot_path=os.getenv('QUERY_PROFILE_FILE') or None
+)
+ProfilingConnection.profiler = profiler
+
+
+def connect(db_path: str, **kwargs) -> sqlite3.Connection:
+    """Соединение с SQLite (профилирующее, если профилировщик включен)"""
+    if profiler.enabled:
+        return sqlite3.connect(db_path, factory=ProfilingConnection, **kwargs)
+    return sqlite3.connect(db_path, **kwargs)
+
+
+def _load_report(args) -> Dict:
+    """Агрегат из файла или с эндпоинта /admin/queries"""
+    if args.url:
+        import requests
+        response = requests.get(
+            args.url,
+            params={'limit': args.top, 'sort': args.sort},
+            headers={'X-Admin-Token': os.getenv('ADMIN_API_TOKEN', '')},
+            timeout=10
+        )
+        response.raise_for_status()
+        return response.json()
+
+    with open(args.file, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def print_report(report: Dict, limit: int = 20, sort: str = 'total_time'):
+    """Вывод отчета в консоль"""
+    queries = sorted(report.get('queries', []), key=lambda item: item[sort], reverse=True)[:limit]
+    print(f"📊 Запросов: {report.get('total_calls', 0)}, уникальных: {report.get('distinct_queries', 0)}, "
+          f"время: {report.get('total_time', 0.0) * 1000:.1f} мс (с {report.get('since', '?')})")
+    print(f"{'всего мс':>10} {'вызовов':>8} {'сред мс':>9} {'макс мс':>9} {'строк':>8}  запрос")
+    for item in queries:
+        print(f"{item['total_time'] * 1000:>10.1f} {item['calls']:>8} {item['avg_time'] * 1000:>9.2f} "
+              f"{item['max_time'] * 1000:>9.2f} {item['rows']:>8}  {item['query'][:100]}")
+        for caller, count in list(item.get('callers', {}).items())[:3]:
+            print(f"{'':>49}↳ {caller} ×{count}")
+
+
+def main(argv=None):
+    """Командная строка профилировщика"""
+    parser = argparse.ArgumentParser(description="Отчет профилировщика SQL-запросов")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    report_parser = subparsers.add_parser('report', help="Самые тяжелые запросы")
+    source = report_parser.add_mutually_exclusive_group()
+    source.add_argument('--file', default=os.getenv('QUERY_PROFILE_FILE', 'query_profile.json'),
+                        help="Файл агрегата (QUERY_PROFILE_FILE)")
+    source.add_argument('--url', help="Адрес эндпоинта /admin/queries (токен из ADMIN_API_TOKEN)")
+    report_parser.add_argument('--top', type=int, default=20)
+    report_parser.add_argument('--sort', choices=SORT_FIELDS, default='total_time')
+    args = parser.parse_args(argv)
+
+    try:
+        report = _load_report(args)
+    except Exception as e:
+        print(f"❌ Не удалось получить профиль запросов: {e}")
+        return 1
+
+    print_report(report, args.top, args.sort)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🚦 Готовность компонентов и профиль запуска
+Компоненты сообщают о готовности событием, фазы запуска замеряются по времени
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+# Момент импорта модуля - начало отсчета холодного старта
+PROCESS_STARTED = time.perf_counter()
+
+STATUS_STARTING = "starting"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+
+class Readiness:
+    """Реестр готовности компонентов"""
+
+    def __init__(self, started: float = PROCESS_STARTED):
+        self.logger = logging.getLogger(__name__)
+        self.started = started
+        self.release = os.getenv('RELEASE_VERSION') or os.getenv('RAILWAY_GIT_COMMIT_SHA', 'dev')
+        self._lock = threading.Lock()
+        self._components: Dict[str, Dict] = {}
+        self._events: Dict[str, threading.Event] = {}
+        self._phases: Dict[str, float] = {}
+        self._ready_after: Optional[float] = None
+
+    def register(self, names: Iterable[str]):
+        """Регистрация компонентов, готовность которых ожидается"""
+        with self._lock:
+            for name in names:
+                self._components.setdefault(name, {'status': STATUS_STARTING, 'after_seconds': None, 'error': None})
+                self._events.setdefault(name, threading.Event())
+
+    def mark_ready(self, name: str):
+        """Компонент готов к работе"""
+        self._set_status(name, STATUS_READY)
+
+    def mark_failed(self, name: str, error):
+        """Компонент не смог запуститься"""
+        self._set_status(name, STATUS_FAILED, str(error))
+
+    def _set_status(self, name: str, status: str, error: Optional[str] = None):
+        elapsed = time.perf_counter() - self.started
+        with self._lock:
+            component = self._components.setdefault(name, {})
+            component.update({'status': status, 'after_seconds': round(elapsed, 3), 'error': error})
+            self._events.setdefault(name, threading.Event()).set()
+
+            all_done = all(c['status'] != STATUS_STARTING for c in self._components.values())
+            first_time = all_done and self._ready_after is None
+            if first_time:
+                self._ready_after = elapsed
+
+        self.logger.info(f"Компонент {name}: {status} через {elapsed:.2f} с")
+        if first_time:
+            self._report_boot_profile()
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Ожидание завершения запуска компонента"""
+        with self._lock:
+            event = self._events.setdefault(name, threading.Event())
+        return event.wait(timeout) and self._components[name]['status'] == STATUS_READY
+
+    def is_ready(self, name: Optional[str] = None) -> bool:
+        """Готов ли компонент (или все компоненты)"""
+        with self._lock:
+            if name is not None:
+                return self._components.get(name, {}).get('status') == STATUS_READY
+            return bool(self._components) and all(
+                c['status'] == STATUS_READY for c in self._components.values()
+            )
+
+    @contextmanager
+    def phase(self, name: str):
+        """Замер фазы запуска (импорт, инициализация)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._phases[name] = round(time.perf_counter() - started, 3)
+
+    def snapshot(self) -> Dict:
+        """Состояние компонентов и профиль запуска"""
+        with self._lock:
+            return {
+                'ready': bool(self._components) and all(
+                    c['status'] == STATUS_READY for c in self._components.values()
+                ),
+                'components': {name: dict(c) for name, c in self._components.items()},
+                'boot': {
+                    'release': self.release,
+                    'uptime_seconds': round(time.perf_counter() - self.started, 3),
+                    'cold_start_to_ready_seconds': (
+                        round(self._ready_after, 3) if self._ready_after is not None else None
+                    ),
+                    'phases': dict(self._phases)
+                }
+            }
+
+    def _report_boot_profile(self):
+        """Запись профиля запуска в лог (и в файл BOOT_PROFILE_LOG, если задан)"""
+        profile = self.snapshot()['boot']
+        self.logger.info(f"📈 Профиль запуска: {json.dumps(profile, ensure_ascii=False)}")
+
+        log_path = os.getenv('BOOT_PROFILE_LOG')
+        if not log_path:
+            return
+        try:
+            profile['recorded_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+            with open(log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(profile, ensure_ascii=False) + "\n")
+        except Exception as e:
+            self.logger.warning(f"Не удалось записать профиль запуска: {e}")
+
+
+readiness = Readiness()
@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗃️ Репозитории данных Steam Rental System
+Интерфейсы хранилищ аккаунтов, аренд, пользователей, бонусов и настроек с двумя реализациями:
+- sqlite - текущие Database и SettingsManager (рабочий режим);
+- memory - словари в памяти процесса (юнит-тесты, симуляции, бенчмарки).
+
+Реализация выбирается STORAGE_BACKEND, файл базы - DATABASE_PATH. Обе реализации возвращают
+одинаковые словари и публикуют одинаковые события шины (event_bus.py).
+"""
+
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from config import Config
+from event_bus import (EventBus, default_bus, AccountAdded, AccountDeleted, BonusGranted,
+                       PasswordRotated, RentalExpired, RentalStarted)
+
+BACKENDS = ('sqlite', 'memory')
+
+
+class AccountRepository(ABC):
+    """Аккаунты Steam: id, username, password, game_name, price, description, is_rented"""
+
+    @abstractmethod
+    def add(self, username: str, password: str, game_name: str, price: Optional[float] = None,
+            description: str = "") -> Optional[int]:
+        """Добавление; None - аккаунт с таким логином уже есть"""
+
+    @abstractmethod
+    def get(self, account_id: int) -> Optional[Dict]:
+        """Аккаунт по ID"""
+
+    @abstractmethod
+    def list_available(self, game_name: Optional[str] = None) -> List[Dict]:
+        """Свободные аккаунты (всех игр или одной)"""
+
+    @abstractmethod
+    def list_all(self) -> List[Dict]:
+        """Все аккаунты, новые первыми"""
+
+    @abstractmethod
+    def update_password(self, account_id: int, password: str) -> bool:
+        """Смена пароля"""
+
+    @abstractmethod
+    def delete(self, account_id: int) -> bool:
+        """Удаление свободного аккаунта"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Число аккаунтов"""
+
+
+class RentalRepository(ABC):
+    """Аренды: id, account_id, user_id, start_time, end_time, duration_hours, status, game_name"""
+
+    @abstractmethod
+    def start(self, account_id: int, user_id: str, duration_hours: int, price: Optional[float] = None,
+              order_id: Optional[str] = None) -> Optional[int]:
+        """Выдача аккаунта; ID аренды или None, если аккаунт занят или не найден"""
+
+    @abstractmethod
+    def list_active(self, user_id: str) -> List[Dict]:
+        """Активные аренды пользователя"""
+
+    @abstractmethod
+    def get_renter(self, rental_id: int) -> Optional[str]:
+        """Арендатор по ID аренды"""
+
+    @abstractmethod
+    def expire_due(self) -> int:
+        """Завершение истекших аренд с освобождением аккаунтов; число завершенных"""
+
+    @abstractmethod
+    def count_active(self) -> int:
+        """Число активных аренд"""
+
+
+class UserRepository(ABC):
+    """Пользователи Telegram: telegram_id, username, first_name, last_name"""
+
+    @abstractmethod
+    def add(self, telegram_id: str, username: Optional[str] = None, first_name: Optional[str] = None,
+            last_name: Optional[str] = None):
+        """Добавление (повторное добавление игнорируется)"""
+
+    @abstractmethod
+    def get(self, telegram_id: str) -> Optional[Dict]:
+        """Пользователь по Telegram ID"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Число пользователей"""
+
+
+class BonusRepository(ABC):
+    """Бонусное время: bonus_minutes, reason, created_at, is_used"""
+
+    @abstractmethod
+    def grant(self, user_id: str, minutes: int, reason: str) -> bool:
+        """Начисление бонуса с продлением активной аренды пользователя"""
+
+    @abstractmethod
+    def list(self, user_id: str) -> List[Dict]:
+        """Бонусы пользователя, новые первыми"""
+
+    @abstractmethod
+    def total_minutes(self, user_id: str) -> int:
+        """Неиспользованные бонусные минуты"""
+
+
+class SettingsRepository(ABC):
+    """Настройки по категориям"""
+
+    @abstractmethod
+    def get(self, category: str, key: str, default: str = "") -> str:
+        """Значение настройки"""
+
+    @abstractmethod
+    def set(self, category: str, key: str, value: str) -> bool:
+        """Сохранение настройки"""
+
+    @abstractmethod
+    def get_category(self, category: str) -> Dict[str, str]:
+        """Все настройки категории"""
+
+
+@dataclass
+class Repositories:
+    """Набор репозиториев одного хранилища"""
+    backend: str
+    accounts: AccountRepository
+    rentals: RentalRepository
+    users: UserRepository
+    bonuses: BonusRepository
+    settings: SettingsRepository
+
+
+def _account(row: Dict) -> Dict:
+    """Общий вид аккаунта"""
+    return {
+        'id': row['id'],
+        'username': row['username'],
+        'password': row['password'],
+        'game_name': row['game_name'],
+        'price': row['price'] if row['price'] is not None else 50.0,
+        'description': row['description'] or '',
+        'is_rented': bool(row['is_rented'])
+    }
+
+
+# ---------------------------------------------------------------- SQLite
+
+
+class SQLiteAccountRepository(AccountRepository):
+    def __init__(self, db):
+        self.db = db
+
+    def _select(self, where: str = "", params=()) -> List[Dict]:
+        with closing(self.db.connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(f"""
+                SELECT id, username, password, game_name, price, description, is_rented
+                FROM steam_accounts {where}
+            """, params).fetchall()
+        return [_account(dict(row)) for row in rows]
+
+    def add(self, username, password, game_name, price=None, description=""):
+        if not self.db.add_account(username, password, game_name, 50.0 if price is None else price, description):
+            return None
+        accounts = self._select("WHERE username = ? ORDER BY id DESC LIMIT 1", (username,))
+        return accounts[0]['id']
+
+    def get(self, account_id):
+        accounts = self._select("WHERE id = ?", (account_id,))
+        return accounts[0] if accounts else None
+
+    def list_available(self, game_name=None):
+        if game_name:
+            return self._select("WHERE is_rented = FALSE AND game_name = ? ORDER BY id", (game_name,))
+        return self._select("WHERE is_rented = FALSE ORDER BY id")
+
+    def list_all(self):
+        return self._select("ORDER BY id DESC")
+
+    def update_password(self, account_id, password):
+        with closing(self.db.connect()) as conn, conn:
+            updated = conn.execute("""
+                UPDATE steam_accounts SET password = ?, updated_at = datetime('now') WHERE id = ?
+            """, (password, account_id)).rowcount
+        if updated:
+            self.db.events.publish(PasswordRotated(account_id))
+        return bool(updated)
+
+    def delete(self, account_id):
+        return self.db.delete_account(account_id)
+
+    def count(self):
+        return self.db.get_total_accounts()
+
+
+class SQLiteRentalRepository(RentalRepository):
+    def __init__(self, db):
+        self.db = db
+
+    def start(self, account_id, user_id, duration_hours, price=None, order_id=None):
+        if not self.db.create_rental(account_id, user_id, duration_hours, price=price, order_id=order_id):
+            return None
+        with closing(self.db.connect()) as conn:
+            row = conn.execute("""
+                SELECT id FROM rentals WHERE account_id = ? AND status = 'active' ORDER BY id DESC LIMIT 1
+            """, (account_id,)).fetchone()
+        return row[0] if row else None
+
+    def list_active(self, user_id):
+        return [
+            {'id': rental['id'], 'account_id': rental['account_id'], 'user_id': user_id,
+             'start_time': str(rental['start_time']), 'end_time': str(rental['end_time']),
+             'duration_hours': rental['duration_hours'], 'status': rental['status'],
+             'game_name': rental['game_name']}
+            for rental in self.db.get_user_rentals(user_id)
+        ]
+
+    def get_renter(self, rental_id):
+        with closing(self.db.connect()) as conn:
+            row = conn.execute("SELECT renter_id FROM rentals WHERE id = ?", (rental_id,)).fetchone()
+        return row[0] if row else None
+
+    def expire_due(self):
+        return self.db.end_expired_rentals()
+
+    def count_active(self):
+        return self.db.get_active_rentals()
+
+
+class SQLiteUserRepository(UserRepository):
+    def __init__(self, db):
+        self.db = db
+
+    def add(self, telegram_id, username=None, first_name=None, last_name=None):
+        self.db.add_user(telegram_id, username, first_name, last_name)
+
+    def get(self, telegram_id):
+        with closing(self.db.connect()) as conn:
+            row = conn.execute("""
+                SELECT telegram_id, username, first_name, last_name FROM users WHERE telegram_id = ?
+            """, (telegram_id,)).fetchone()
+        if not row:
+            return None
+        return {'telegram_id': row[0], 'username': row[1], 'first_name': row[2], 'last_name': row[3]}
+
+    def count(self):
+        return self.db.get_total_users()
+
+
+class SQLiteBonusRepository(BonusRepository):
+    def __init__(self, db):
+        self.db = db
+
+    def grant(self, user_id, minutes, reason):
+        return self.db.add_bonus_time(user_id, minutes, reason)
+
+    def list(self, user_id):
+        return [dict(bonus, is_used=bool(bonus['is_used'])) for bonus in self.db.get_user_bonuses(user_id)]
+
+    def total_minutes(self, user_id):
+        return self.db.get_total_bonus_time(user_id)
+
+
+class SQLiteSettingsRepository(SettingsRepository):
+    """Настройки SettingsManager; менеджер (ключ шифрования, настройки по умолчанию)
+    создается при первом обращении, если не передан готовый"""
+
+    def __init__(self, db_path: str, settings_manager=None):
+        self.db_path = db_path
+        self._manager = settings_manager
+        self._lock = threading.Lock()
+
+    @property
+    def manager(self):
+        if self._manager is None:
+            with self._lock:
+                if self._manager is None:
+                    from settings_manager import SettingsManager
+                    self._manager = SettingsManager(self.db_path)
+        return self._manager
+
+    def get(self, category, key, default=""):
+        return self.manager.get_setting(category, key, default)
+
+    def set(self, category, key, value):
+        return self.manager.set_setting(category, key, value)
+
+    def get_category(self, category):
+        return self.manager.get_category_settings(category)
+
+
+# ---------------------------------------------------------------- В памяти
+
+
+class InMemoryStore:
+    """Общие данные репозиториев в памяти (аренда и бонусы меняют аккаунты)"""
+
+    def __init__(self, events: Optional[EventBus] = None):
+        self.events = events if events is not None else default_bus
+        self.lock = threading.RLock()
+        self.accounts: Dict[int, Dict] = {}
+        self.rentals: Dict[int, Dict] = {}
+        self.users: Dict[str, Dict] = {}
+        self.bonuses: List[Dict] = []
+        self.settings: Dict[str, Dict[str, str]] = {}
+        self._ids = {'accounts': 0, 'rentals': 0}
+
+    def next_id(self, table: str) -> int:
+        self._ids[table] += 1
+        return self._ids[table]
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.isoformat(sep=' ')
+
+
+class InMemoryAccountRepository(AccountRepository):
+    def __init__(self, store: InMemoryStore):
+        self.store = store
+
+    def add(self, username, password, game_name, price=None, description=""):
+        with self.store.lock:
+            if any(account['username'] == username for account in self.store.accounts.values()):
+                return None
+            account_id = self.store.next_id('accounts')
+            self.store.accounts[account_id] = {
+                'id': account_id, 'username': username, 'password': password, 'game_name': game_name,
+                'price': 50.0 if price is None else price, 'description': description, 'is_rented': False
+            }
+        self.store.events.publish(AccountAdded(account_id, username, game_name))
+        return account_id
+
+    def get(self, account_id):
+        account = self.store.accounts.get(account_id)
+        return dict(account) if account else None
+
+    def list_available(self, game_name=None):
+        with self.store.lock:
+            return [dict(account) for account in self.store.accounts.values()
+                    if not account['is_rented'] and (not game_name or account['game_name'] == game_name)]
+
+    def list_all(self):
+        with self.store.lock:
+            return [dict(account) for account in reversed(list(self.store.accounts.values()))]
+
+    def update_password(self, account_id, password):
+        with self.store.lock:
+            account = self.store.accounts.get(account_id)
+            if not account:
+                return False
+            account['password'] = password
+        self.store.events.publish(PasswordRotated(account_id))
+        return True
+
+    def delete(self, account_id):
+        with self.store.lock:
+            account = self.store.accounts.get(account_id)
+            if not account or account['is_rented']:
+                return False
+            del self.store.accounts[account_id]
+            # Как в SQLite: аренды аккаунта удаляются вместе с ним
+            for rental_id in [rid for rid, rental in self.store.rentals.items() if rental['account_id'] == account_id]:
+                del self.store.rentals[rental_id]
+        self.store.events.publish(AccountDeleted(account_id))
+        return True
+
+    def count(self):
+        return len(self.store.accounts)
+
+
+class InMemoryRentalRepository(RentalRepository):
+    def __init__(self, store: InMemoryStore):
+        self.store = store
+
+    def start(self, account_id, user_id, duration_hours, price=None, order_id=None):
+        with self.store.lock:
+            account = self.store.accounts.get(account_id)
+            if not account or account['is_rented']:
+                return None
+            start_time = datetime.now()
+            end_time = start_time + timedelta(hours=duration_hours)
+            rental_id = self.store.next_id('rentals')
+            self.store.rentals[rental_id] = {
+                'id': rental_id, 'account_id': account_id, 'user_id': user_id,
+                'start_time': start_time, 'end_time': end_time, 'duration_hours': duration_hours,
+                'status': 'active', 'order_id': order_id,
+                'price': price if price is not None else account['price'] * duration_hours
+            }
+            account['is_rented'] = True
+        self.store.events.publish(RentalStarted(rental_id, account_id, user_id, account['game_name'],
+                                                duration_hours, _timestamp(end_time)))
+        return rental_id
+
+    def _view(self, rental: Dict) -> Dict:
+        account = self.store.accounts.get(rental['account_id'])
+        return {'id': rental['id'], 'account_id': rental['account_id'], 'user_id': rental['user_id'],
+                'start_time': _timestamp(rental['start_time']), 'end_time': _timestamp(rental['end_time']),
+                'duration_hours': rental['duration_hours'], 'status': rental['status'],
+                'game_name': account['game_name'] if account else None}
+
+    def list_active(self, user_id):
+        with self.store.lock:
+            rentals = [rental for rental in self.store.rentals.values()
+                       if rental['user_id'] == user_id and rental['status'] == 'active']
+            rentals.sort(key=lambda rental: rental['end_time'], reverse=True)
+            return [self._view(rental) for rental in rentals]
+
+    def get_renter(self, rental_id):
+        rental = self.store.rentals.get(rental_id)
+        return rental['user_id'] if rental else None
+
+    def expire_due(self):
+        now = datetime.now()
+        with self.store.lock:
+            expired = [rental for rental in self.store.rentals.values()
+                       if rental['status'] == 'active' and rental['end_time'] < now]
+            for rental in expired:
+                rental['status'] = 'completed'
+                account = self.store.accounts.get(rental['account_id'])
+                if account:
+                    account['is_rented'] = False
+        for rental in expired:
+            self.store.events.publish(RentalExpired(rental['id'], rental['account_id'], rental['user_id']))
+        return len(expired)
+
+    def count_active(self):
+        with self.store.lock:
+            return sum(1 for rental in self.store.rentals.values() if rental['status'] == 'active')
+
+
+class InMemoryUserRepository(UserRepository):
+    def __init__(self, store: InMemoryStore):
+        self.store = store
+
+    def add(self, telegram_id, username=None, first_name=None, last_name=None):
+        with self.store.lock:
+            self.store.users.setdefault(telegram_id, {
+                'telegram_id': telegram_id, 'username': username, 'first_name': first_name, 'last_name': last_name
+            })
+
+    def get(self, telegram_id):
+        user = self.store.users.get(telegram_id)
+        return dict(user) if user else None
+
+    def count(self):
+        return len(self.store.users)
+
+
+class InMemoryBonusRepository(BonusRepository):
+    def __init__(self, store: InMemoryStore):
+        self.store = store
+
+    def grant(self, user_id, minutes, reason):
+        with self.store.lock:
+            self.store.bonuses.append({'user_id': user_id, 'bonus_minutes': minutes, 'reason': reason,
+                                       'created_at': _timestamp(datetime.now()), 'is_used': False})
+            active = [rental for rental in self.store.rentals.values()
+                      if rental['user_id'] == user_id and rental['status'] == 'active']
+            rental = max(active, key=lambda item: item['end_time'], default=None)
+            if rental:
+                rental['end_time'] += timedelta(minutes=minutes)
+        self.store.events.publish(BonusGranted(user_id, minutes, reason, rental['id'] if rental else None))
+        return True
+
+    def list(self, user_id):
+        with self.store.lock:
+            return [{key: bonus[key] for key in ('bonus_minutes', 'reason', 'created_at', 'is_used')}
+                    for bonus in reversed(self.store.bonuses) if bonus['user_id'] == user_id]
+
+    def total_minutes(self, user_id):
+        with self.store.lock:
+            return sum(bonus['bonus_minutes'] for bonus in self.store.bonuses
+                       if bonus['user_id'] == user_id and not bonus['is_used'])
+
+
+class InMemorySettingsRepository(SettingsRepository):
+    def __init__(self, store: InMemoryStore):
+        self.store = store
+
+    def get(self, category, key, default=""):
+        return self.store.settings.get(category, {}).get(key) or default
+
+    def set(self, category, key, value):
+        with self.store.lock:
+            self.store.settings.setdefault(category, {})[key] = value
+        return True
+
+    def get_category(self, category):
+        return dict(self.store.settings.get(category, {}))
+
+
+# ---------------------------------------------------------------- Фабрика
+
+
+def create_repositories(backend: Optional[str] = None, db_path: Optional[str] = None,
+                        events: Optional[EventBus] = None, database=None, settings_manager=None) -> Repositories:
+    """Репозитории выбранного хранилища (по умолчанию Config.STORAGE_BACKEND)
+
+    database - уже открытый Database для sqlite (иначе создается по db_path / DATABASE_PATH),
+    settings_manager - готовый SettingsManager (иначе создается при первом обращении к настройкам).
+    """
+    backend = (backend or Config.STORAGE_BACKEND).lower()
+    if backend == 'sqlite':
+        from database import Database
+        db = database or Database(db_path, events=events)
+        return Repositories(
+            backend=backend,
+            accounts=SQLiteAccountRepository(db),
+            rentals=SQLiteRentalRepository(db),
+            users=SQLiteUserRepository(db),
+            bonuses=SQLiteBonusRepository(db),
+            settings=SQLiteSettingsRepository(db.db_path, settings_manager)
+        )
+    if backend == 'memory':
+        store = InMemoryStore(events)
+        return Repositories(
+            backend=backend,
+            accounts=InMemoryAccountRepository(store),
+            rentals=InMemoryRentalRepository(store),
+            users=InMemoryUserRepository(store),
+            bonuses=InMemoryBonusRepository(store),
+            settings=InMemorySettingsRepository(store)
+        )
+    raise ValueError(f"Неизвестное хранилище: {backend}. Доступные: {', '.join(BACKENDS)}")
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🗄️ Хранение истории: архивирование старых строк и сжатие базы
+Строки старше заданного срока переносятся порциями в архивную базу (ATTACH),
+затем освободившиеся страницы возвращаются через PRAGMA incremental_vacuum.
+
+Сроки задаются политиками по таблицам; переопределение через
+RETENTION_POLICIES="operation_history=90,notifications=30" (0 - не трогать таблицу).
+Запуск: python retention_manager.py [--dry-run]
+"""
+
+import sys
+import time
+import logging
+import sqlite3
+import argparse
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional
+from config import Config
+from metrics import Counter
+
+RETENTION_ARCHIVED_ROWS = Counter(
+    'steam_rental_retention_archived_rows', 'Строки, перенесенные в архив', ('table',)
+)
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Политика хранения таблицы"""
+    table: str
+    timestamp_column: str
+    max_age_days: int
+    # Дополнительное условие (например, только прочитанные уведомления)
+    condition: Optional[str] = None
+    archive: bool = True
+
+
+DEFAULT_POLICIES = (
+    RetentionPolicy('operation_history', 'created_at', 90),
+    RetentionPolicy('notifications', 'created_at', 30, condition='is_read = TRUE'),
+    RetentionPolicy('account_history', 'timestamp', 180),
+    RetentionPolicy('settings_history', 'timestamp', 365),
+)
+
+
+def parse_overrides(value: str) -> Dict[str, int]:
+    """Разбор строки вида 'operation_history=90,notifications=30'"""
+    overrides = {}
+    for item in filter(None, (part.strip() for part in (value or '').split(','))):
+        table, _, days = item.partition('=')
+        overrides[table.strip()] = int(days)
+    return overrides
+
+
+def configured_policies() -> List[RetentionPolicy]:
+    """Политики по умолчанию с учетом RETENTION_POLICIES"""
+    overrides = parse_overrides(Config.RETENTION_POLICIES)
+    return [replace(policy, max_age_days=overrides.get(policy.table, policy.max_age_days))
+            for policy in DEFAULT_POLICIES]
+
+
+class RetentionManager:
+    """Перенос старых строк истории в архив и сжатие базы"""
+
+    def __init__(self, db_path: str = None, policies: Optional[List[RetentionPolicy]] = None,
+                 archive_path: str = None, batch_size: int = None, batch_pause: float = None,
+                 vacuum_pages: int = None):
+        self.db_path = db_path or Config.DATABASE_PATH
+        self.policies = list(policies) if policies is not None else configured_policies()
+        self.archive_path = archive_path or Config.ARCHIVE_DATABASE_PATH
+        self.batch_size = batch_size or Config.RETENTION_BATCH_SIZE
+        self.batch_pause = Config.RETENTION_BATCH_PAUSE if batch_pause is None else batch_pause
+        self.vacuum_pages = Config.RETENTION_VACUUM_PAGES if vacuum_pages is None else vacuum_pages
+        self.logger = logging.getLogger(__name__)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+        return conn
+
+    @staticmethod
+    def _table_exists(conn: sqlite3.Connection, table: str, schema: str = 'main') -> bool:
+        return conn.execute(
+            f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone() is not None
+
+    @staticmethod
+    def _predicate(policy: RetentionPolicy) -> str:
+        predicate = f"{policy.timestamp_column} < datetime('now', ?)"
+        if policy.condition:
+            predicate += f" AND ({policy.condition})"
+        return predicate
+
+    def eligible_rows(self) -> Dict[str, int]:
+        """Сколько строк попадает под политики (для --dry-run)"""
+        counts = {}
+        with sqlite3.connect(self.db_path) as conn:
+            for policy in self.policies:
+                if policy.max_age_days <= 0 or not self._table_exists(conn, policy.table):
+                    continue
+                counts[policy.table] = conn.execute(
+                    f"SELECT COUNT(*) FROM {policy.table} WHERE {self._predicate(policy)}",
+                    (f"-{policy.max_age_days} days",)
+                ).fetchone()[0]
+        return counts
+
+    def run(self) -> Dict:
+        """Применение всех политик и сжатие базы"""
+        started = time.perf_counter()
+        report = {'tables': {}, 'vacuumed_pages': 0, 'full_vacuum': False}
+
+        conn = self._connect()
+        try:
+            for policy in self.policies:
+                if policy.max_age_days <= 0 or not self._table_exists(conn, policy.table):
+                    continue
+                report['tables'][policy.table] = self._apply_policy(conn, policy)
+            report['full_vacuum'] = self._enable_incremental_vacuum(conn)
+            report['vacuumed_pages'] = self._incremental_vacuum(conn)
+        finally:
+            conn.close()
+
+        report['duration_seconds'] = round(time.perf_counter() - started, 3)
+        moved = sum(table['rows'] for table in report['tables'].values())
+        self.logger.info(
+            f"🗄️ Архивировано строк: {moved}, освобождено страниц: {report['vacuumed_pages']}, "
+            f"{report['duration_seconds']} с"
+        )
+        return report
+
+    def _apply_policy(self, conn: sqlite3.Connection, policy: RetentionPolicy) -> Dict:
+        """Перенос строк таблицы порциями по batch_size, каждая порция - отдельная транзакция"""
+        table = policy.table
+        predicate = self._predicate(policy)
+        age = f"-{policy.max_age_days} days"
+
+        # Индекс по времени: выборка порций и сортировка истории по дате без полного просмотра
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS main.idx_{table}_{policy.timestamp_column} "
+            f"ON {table} ({policy.timestamp_column})"
+        )
+        if policy.archive and not self._table_exists(conn, table, 'archive'):
+            conn.execute(f"CREATE TABLE archive.{table} AS SELECT * FROM main.{table} WHERE 0")
+        conn.commit()
+
+        rows = batches = 0
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                last_rowid = conn.execute(
+                    f"SELECT MAX(rowid) FROM (SELECT rowid FROM main.{table} WHERE {predicate} "
+                    f"ORDER BY rowid LIMIT ?)", (age, self.batch_size)
+                ).fetchone()[0]
+                if last_rowid is None:
+                    conn.rollback()
+                    break
+
+                batch = f"{predicate} AND rowid <= ?"
+                if policy.archive:
+                    conn.execute(f"INSERT INTO archive.{table} SELECT * FROM main.{table} WHERE {batch}",
+                                 (age, last_rowid))
+                moved = conn.execute(f"DELETE FROM main.{table} WHERE {batch}", (age, last_rowid)).rowcount
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            rows += moved
+            batches += 1
+            RETENTION_ARCHIVED_ROWS.labels(table).inc(moved)
+            if self.batch_pause:
+                time.sleep(self.batch_pause)
+
+        return {'rows': rows, 'batches': batches, 'max_age_days': policy.max_age_days}
+
+    def _enable_incremental_vacuum(self, conn: sqlite3.Connection) -> bool:
+        """Включение auto_vacuum=INCREMENTAL; для существующей базы - однократным полным VACUUM"""
+        if conn.execute("PRAGMA main.auto_vacuum").fetchone()[0] == 2:
+            return False
+        self.logger.info("🗜️ Включение auto_vacuum=INCREMENTAL (однократный VACUUM)")
+        conn.execute("PRAGMA main.auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM main")
+        return True
+
+    def _incremental_vacuum(self, conn: sqlite3.Connection) -> int:
+        """Возврат свободных страниц файлу (не больше vacuum_pages за запуск)"""
+        free_pages = conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+        pages = min(free_pages, self.vacuum_pages) if self.vacuum_pages else free_pages
+        if pages:
+            conn.execute(f"PRAGMA main.incremental_vacuum({pages})").fetchall()
+        return pages
+
+
+def main(argv=None):
+    """Командная строка хранения истории"""
+    parser = argparse.ArgumentParser(description="Архивирование старой истории")
+    parser.add_argument('--db', default=Config.DATABASE_PATH)
+    parser.add_argument('--archive', default=Config.ARCHIVE_DATABASE_PATH)
+    parser.add_argument('--dry-run', action='store_true', help="Только посчитать строки")
+    args = parser.parse_args(argv)
+
+    manager = RetentionManager(args.db, archive_path=args.archive)
+    if args.dry_run:
+        for table, count in manager.eligible_rows().items():
+            print(f"{table:<24} {count:>10}")
+        return 0
+
+    report = manager.run()
+    for table, stats in report['tables'].items():
+        print(f"{table:<24} {stats['rows']:>10} строк, порций {stats['batches']}")
+    print(f"Освобождено страниц: {report['vacuumed_pages']}, {report['duration_seconds']} с")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
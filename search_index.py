@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+🔎 Полнотекстовый поиск по аккаунтам (SQLite FTS5)
+Виртуальная таблица с внешним содержимым синхронизируется триггерами,
+запросы идут по префиксам слов с ранжированием bm25.
+Если SQLite собран без FTS5, поиск выполняется через LIKE.
+"""
+
+import re
+import sqlite3
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_fts5_supported: Optional[bool] = None
+
+
+def fts5_available() -> bool:
+    """Поддерживает ли установленный SQLite модуль FTS5"""
+    global _fts5_supported
+    if _fts5_supported is None:
+        try:
+            conn = sqlite3.connect(':memory:')
+            try:
+                conn.execute("CREATE VIRTUAL TABLE fts5_probe USING fts5(text)")
+                _fts5_supported = True
+            finally:
+                conn.close()
+        except sqlite3.OperationalError:
+            logging.getLogger(__name__).warning("⚠️ SQLite без FTS5, поиск будет выполняться через LIKE")
+            _fts5_supported = False
+    return _fts5_supported
+
+
+def match_query(text: str) -> str:
+    """Запрос MATCH: каждое слово - префикс, все слова обязательны"""
+    return ' '.join(f'"{token}"*' for token in _TOKEN.findall(text.lower()))
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    """Полнотекстовый индекс по текстовым колонкам таблицы (rowid = id)"""
+    table: str
+    content: str
+    columns: Tuple[str, ...]
+    # bm25 считается для каждого совпадения: при более общем запросе ранжирование пропускается
+    rank_limit: int = 1000
+
+    def create(self, cursor: sqlite3.Cursor) -> bool:
+        """Создание индекса и триггеров; при первом создании индекс заполняется из таблицы"""
+        if not fts5_available():
+            return False
+
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.table,)
+        ).fetchone()
+        columns = ', '.join(self.columns)
+        new_values = ', '.join(f"new.{column}" for column in self.columns)
+        old_values = ', '.join(f"old.{column}" for column in self.columns)
+        delete_old = (f"INSERT INTO {self.table} ({self.table}, rowid, {columns}) "
+                      f"VALUES ('delete', old.id, {old_values});")
+        insert_new = f"INSERT INTO {self.table} (rowid, {columns}) VALUES (new.id, {new_values});"
+
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5(
+                {columns}, content='{self.content}', content_rowid='id',
+                tokenize="unicode61 remove_diacritics 2 tokenchars '_'", prefix='2 3'
+            )
+        """)
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {self.table}_ai AFTER INSERT ON {self.content} "
+                       f"BEGIN {insert_new} END")
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {self.table}_ad AFTER DELETE ON {self.content} "
+                       f"BEGIN {delete_old} END")
+        # Только изменения индексируемых колонок (смена статуса аренды индекс не трогает)
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {self.table}_au AFTER UPDATE OF {columns} "
+                       f"ON {self.content} BEGIN {delete_old} {insert_new} END")
+
+        if not exists:
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('rebuild')")
+        return True
+
+    def search(self, cursor: sqlite3.Cursor, text: str, where: str = '', params: Sequence = (),
+               fallback_order: str = 'id', limit: Optional[int] = None,
+               use_fts: Optional[bool] = None) -> List[tuple]:
+        """Строки таблицы content, подходящие под запрос (лучшие совпадения первыми)
+
+        where - дополнительное условие над строками content (псевдоним c).
+        Если совпадений больше rank_limit, строки идут в порядке id без ранжирования.
+        Без FTS5 (или при use_fts=False) - подстрока LIKE по тем же колонкам.
+        """
+        if use_fts is None:
+            use_fts = fts5_available()
+        extra = f" AND ({where})" if where else ''
+        limit_clause = " LIMIT ?" if limit else ''
+        limit_params = (limit,) if limit else ()
+
+        if use_fts:
+            query = match_query(text)
+            if not query:
+                return []
+            matches = cursor.execute(
+                f"SELECT COUNT(*) FROM (SELECT rowid FROM {self.table} WHERE {self.table} MATCH ? LIMIT ?)",
+                (query, self.rank_limit + 1)
+            ).fetchone()[0]
+            order = "f.rank" if matches <= self.rank_limit else "f.rowid"
+            cursor.execute(f"""
+                SELECT c.* FROM {self.table} f
+                JOIN {self.content} c ON c.id = f.rowid
+                WHERE {self.table} MATCH ?{extra}
+                ORDER BY {order}{limit_clause}
+            """, (query, *params, *limit_params))
+        else:
+            text = text.strip()
+            if not text:
+                return []
+            conditions = ' OR '.join(f"c.{column} LIKE ?" for column in self.columns)
+            cursor.execute(f"""
+                SELECT c.* FROM {self.content} c
+                WHERE ({conditions}){extra}
+                ORDER BY {fallback_order}{limit_clause}
+            """, (*[f"%{text}%"] * len(self.columns), *params, *limit_params))
+        return cursor.fetchall()
+
+
+# Индексы по таблицам Database и AccountManager
+ACCOUNT_SEARCH = SearchIndex('steam_accounts_fts', 'steam_accounts', ('username', 'game_name', 'description'))
+EXTENDED_ACCOUNT_SEARCH = SearchIndex(
+    'steam_accounts_extended_fts', 'steam_accounts_extended', ('login', 'email', 'notes', 'games', 'tags')
+)
@@ -7,21 +7,58 @@
 
 import json
 import os
+import time
+import atexit
 import sqlite3
-from typing import Dict, List, Optional, Any
+import weakref
+import threading
+from typing import Callable, Dict, List, Optional, Any, Tuple, Union
 from datetime import datetime, timedelta
 import logging
 from cryptography.fernet import Fernet
 import base64
 from pathlib import Path
 
+# Менеджеры с буфером счетчиков токенов: сбрасываются при выходе одним обработчиком atexit,
+# не удерживая экземпляры в памяти
+_live_managers = weakref.WeakSet()
+
+@atexit.register
+def _flush_live_managers():
+    for manager in list(_live_managers):
+        manager.flush_token_usage()
+
 class SettingsManager:
     """Менеджер настроек и токенов"""
     
-    def __init__(self, db_path: str = "steam_rental.db"):
+    # Время жизни расшифрованных значений в кэше (секунды)
+    CACHE_TTL = 60.0
+    # Сброс счетчиков использования токенов: по количеству чтений или по времени
+    TOKEN_USAGE_FLUSH_SIZE = 1000
+    TOKEN_USAGE_FLUSH_INTERVAL = 30.0
+    
+    def __init__(self, db_path: str = "steam_rental.db", cache_ttl: Optional[float] = None):
         self.db_path = db_path
         self.logger = logging.getLogger(__name__)
         self.encryption_key = self._get_or_create_encryption_key()
+        self._fernet = self._create_fernet()
+        
+        # Кэш настроек и токенов: записи действительны, пока совпадает поколение
+        # и не истек TTL; set_setting/delete_setting/set_token увеличивают поколение
+        self.cache_ttl = self.CACHE_TTL if cache_ttl is None else cache_ttl
+        self._cache_lock = threading.RLock()
+        self._generation = 0
+        self._settings_cache: Dict[Tuple[str, str], Tuple[int, float, Optional[str]]] = {}
+        self._category_cache: Dict[str, Tuple[int, float, Dict[str, str]]] = {}
+        self._token_cache: Dict[Tuple[str, str], Tuple[int, float, Optional[str], Optional[datetime]]] = {}
+        self._change_listeners: List[Callable[[str, str, str], None]] = []
+        
+        # Буфер счетчиков использования токенов
+        self._token_usage: Dict[Tuple[str, str], List] = {}
+        self._pending_usage = 0
+        self._last_usage_flush = time.monotonic()
+        _live_managers.add(self)
+        
         self.setup_database()
     
     def _get_or_create_encryption_key(self) -> bytes:
@@ -47,6 +84,48 @@ class SettingsManager:
             # Возвращаем базовый ключ для совместимости
             return base64.urlsafe_b64encode(b"default_key_32_bytes_long!!")
     
+    def _create_fernet(self) -> Optional[Fernet]:
+        """Создание шифровальщика один раз на экземпляр"""
+        try:
+            return Fernet(self.encryption_key)
+        except Exception as e:
+            self.logger.error(f"Ошибка инициализации шифрования: {e}")
+            return None
+    
+    @property
+    def generation(self) -> int:
+        """Текущее поколение кэша настроек"""
+        return self._generation
+    
+    def add_change_listener(self, listener: Callable[[str, str, str], None]):
+        """Подписка на изменения: listener(scope, category_or_service, key_or_type)"""
+        with self._cache_lock:
+            self._change_listeners.append(listener)
+    
+    def invalidate_cache(self, scope: str = "all", name: str = "", key: str = ""):
+        """Сброс кэша с увеличением поколения и уведомлением подписчиков"""
+        with self._cache_lock:
+            self._generation += 1
+            self._settings_cache.clear()
+            self._category_cache.clear()
+            self._token_cache.clear()
+            listeners = list(self._change_listeners)
+        
+        for listener in listeners:
+            try:
+                listener(scope, name, key)
+            except Exception as e:
+                self.logger.error(f"Ошибка обработчика изменения настроек: {e}")
+    
+    def _cache_get(self, cache: Dict, cache_key):
+        """Чтение записи кэша, если она актуальна"""
+        entry = cache.get(cache_key)
+        if entry is None:
+            return None
+        if entry[0] != self._generation or entry[1] < time.monotonic():
+            return None
+        return entry
+    
     def setup_database(self):
         """Настройка базы данных для настроек"""
         with sqlite3.connect(self.db_path) as conn:
@@ -184,9 +263,12 @@ class SettingsManager:
             }
         }
         
-        for category, settings in default_settings.items():
-            for key, value in settings.items():
-                self.set_setting(category, key, value, description=f"Базовая настройка {category}.{key}")
+        # Только недостающие настройки, одной транзакцией
+        self.set_settings_bulk(
+            default_settings,
+            description=lambda category, key: f"Базовая настройка {category}.{key}",
+            overwrite=False
+        )
     
     def set_setting(self, category: str, key: str, value: str, 
                    encrypted: bool = False, description: str = "", user_id: str = "system") -> bool:
@@ -224,16 +306,102 @@ class SettingsManager:
                     """, (category, key, old_value, value, user_id))
                 
                 conn.commit()
-                self.logger.info(f"Настройка {category}.{key} обновлена")
-                return True
+            
+            self.invalidate_cache("setting", category, key)
+            self.logger.info(f"Настройка {category}.{key} обновлена")
+            return True
                 
         except Exception as e:
             self.logger.error(f"Ошибка установки настройки {category}.{key}: {e}")
             return False
     
+    def set_settings_bulk(self, settings: Dict[str, Dict[str, str]], encrypted: bool = False,
+                          description: Union[str, Callable[[str, str], str]] = "",
+                          user_id: str = "system", overwrite: bool = True) -> int:
+        """Установка набора настроек одной транзакцией
+        
+        Текущие значения читаются одним SELECT, записываются только изменившиеся.
+        При overwrite=False заполняются только отсутствующие и пустые настройки.
+        Возвращает количество записанных настроек.
+        """
+        categories = list(settings)
+        if not categories:
+            return 0
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                placeholders = ", ".join("?" for _ in categories)
+                cursor.execute(f"""
+                    SELECT category, key, value, encrypted FROM application_settings 
+                    WHERE category IN ({placeholders})
+                """, categories)
+                
+                current = {}
+                for category, key, value, is_encrypted in cursor.fetchall():
+                    if is_encrypted and value:
+                        current[(category, key)] = (value, self._decrypt_value(value))
+                    else:
+                        current[(category, key)] = (value, value)
+                
+                rows = []
+                history = []
+                for category, category_settings in settings.items():
+                    for key, value in category_settings.items():
+                        stored_value, old_value = current.get((category, key), (None, None))
+                        
+                        if (category, key) in current:
+                            if old_value == value:
+                                continue
+                            if not overwrite and old_value:
+                                continue
+                        
+                        new_value = self._encrypt_value(value) if encrypted and value else value
+                        row_description = description(category, key) if callable(description) else description
+                        rows.append((category, key, new_value, encrypted, row_description, user_id))
+                        history.append((category, key, stored_value, new_value, user_id))
+                
+                if not rows:
+                    return 0
+                
+                cursor.executemany("""
+                    INSERT INTO application_settings 
+                    (category, key, value, encrypted, description, last_modified, modified_by)
+                    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
+                    ON CONFLICT(category, key) DO UPDATE SET
+                        value = excluded.value,
+                        encrypted = excluded.encrypted,
+                        description = excluded.description,
+                        last_modified = excluded.last_modified,
+                        modified_by = excluded.modified_by
+                """, rows)
+                
+                cursor.executemany("""
+                    INSERT INTO settings_history 
+                    (category, key, old_value, new_value, user_id)
+                    VALUES (?, ?, ?, ?, ?)
+                """, history)
+                
+                conn.commit()
+            
+            self.invalidate_cache("bulk")
+            self.logger.info(f"Обновлено настроек: {len(rows)}")
+            return len(rows)
+            
+        except Exception as e:
+            self.logger.error(f"Ошибка пакетной установки настроек: {e}")
+            return 0
+    
     def get_setting(self, category: str, key: str, default: str = "") -> str:
         """Получение настройки"""
+        cache_key = (category, key)
+        entry = self._cache_get(self._settings_cache, cache_key)
+        if entry is not None:
+            return entry[2] or default
+        
         try:
+            generation = self._generation
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
@@ -243,13 +411,17 @@ class SettingsManager:
                 """, (category, key))
                 
                 result = cursor.fetchone()
+                value = None
                 if result:
                     value, encrypted = result
                     if encrypted and value:
                         value = self._decrypt_value(value)
-                    return value or default
                 
-                return default
+                with self._cache_lock:
+                    if generation == self._generation:
+                        self._settings_cache[cache_key] = (generation, time.monotonic() + self.cache_ttl, value)
+                
+                return value or default
                 
         except Exception as e:
             self.logger.error(f"Ошибка получения настройки {category}.{key}: {e}")
@@ -257,7 +429,12 @@ class SettingsManager:
     
     def get_category_settings(self, category: str) -> Dict[str, str]:
         """Получение всех настроек категории"""
+        entry = self._cache_get(self._category_cache, category)
+        if entry is not None:
+            return dict(entry[2])
+        
         try:
+            generation = self._generation
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
                 
@@ -273,6 +450,10 @@ class SettingsManager:
                         value = self._decrypt_value(value)
                     settings[key] = value or ""
                 
+                with self._cache_lock:
+                    if generation == self._generation:
+                        self._category_cache[category] = (generation, time.monotonic() + self.cache_ttl, dict(settings))
+                
                 return settings
                 
         except Exception as e:
@@ -338,6 +519,7 @@ class SettingsManager:
                     """, (category, key))
                     
                     conn.commit()
+                    self.invalidate_cache("setting", category, key)
                     self.logger.info(f"Настройка {category}.{key} удалена")
                     return True
                 
@@ -365,8 +547,10 @@ class SettingsManager:
                 """, (service_name, token_type, encrypted_token, expires_at, description))
                 
                 conn.commit()
-                self.logger.info(f"Токен {service_name}.{token_type} обновлен")
-                return True
+            
+            self.invalidate_cache("token", service_name, token_type)
+            self.logger.info(f"Токен {service_name}.{token_type} обновлен")
+            return True
                 
         except Exception as e:
             self.logger.error(f"Ошибка установки токена {service_name}.{token_type}: {e}")
@@ -374,48 +558,117 @@ class SettingsManager:
     
     def get_token(self, service_name: str, token_type: str) -> Optional[str]:
         """Получение API токена"""
+        cache_key = (service_name, token_type)
+        entry = self._cache_get(self._token_cache, cache_key)
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT token_value, expires_at, is_active FROM api_tokens 
-                    WHERE service_name = ? AND token_type = ?
-                """, (service_name, token_type))
-                
-                result = cursor.fetchone()
-                if result:
-                    token_value, expires_at, is_active = result
-                    
-                    if not is_active:
-                        return None
-                    
-                    if expires_at:
-                        expiry = datetime.fromisoformat(expires_at)
-                        if datetime.now() > expiry:
-                            self.logger.warning(f"Токен {service_name}.{token_type} истек")
-                            return None
-                    
-                    # Обновляем статистику использования
-                    cursor.execute("""
-                        UPDATE api_tokens 
-                        SET last_used = CURRENT_TIMESTAMP, usage_count = usage_count + 1
-                        WHERE service_name = ? AND token_type = ?
-                    """, (service_name, token_type))
-                    
-                    conn.commit()
-                    
-                    # Расшифровываем и возвращаем токен
-                    return self._decrypt_value(token_value)
-                
+            if entry is None:
+                entry = self._load_token(cache_key)
+            
+            token_value, expiry = entry[2], entry[3]
+            if token_value is None:
+                return None
+            
+            if expiry and datetime.now() > expiry:
+                self.logger.warning(f"Токен {service_name}.{token_type} истек")
                 return None
+            
+            self._record_token_usage(cache_key)
+            return token_value
                 
         except Exception as e:
             self.logger.error(f"Ошибка получения токена {service_name}.{token_type}: {e}")
             return None
     
+    def _load_token(self, cache_key: Tuple[str, str]) -> Tuple:
+        """Чтение и расшифровка токена с сохранением в кэш"""
+        generation = self._generation
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT token_value, expires_at, is_active FROM api_tokens 
+                WHERE service_name = ? AND token_type = ?
+            """, cache_key)
+            
+            result = cursor.fetchone()
+        
+        token_value, expiry = None, None
+        if result:
+            encrypted_value, expires_at, is_active = result
+            if is_active:
+                token_value = self._decrypt_value(encrypted_value)
+                expiry = datetime.fromisoformat(expires_at) if expires_at else None
+        
+        entry = (generation, time.monotonic() + self.cache_ttl, token_value, expiry)
+        with self._cache_lock:
+            if generation == self._generation:
+                self._token_cache[cache_key] = entry
+        return entry
+    
+    def _record_token_usage(self, cache_key: Tuple[str, str]):
+        """Учет использования токена в буфере"""
+        now = time.monotonic()
+        with self._cache_lock:
+            usage = self._token_usage.get(cache_key)
+            if usage is None:
+                usage = self._token_usage[cache_key] = [0, None]
+            usage[0] += 1
+            usage[1] = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+            self._pending_usage += 1
+            
+            should_flush = (self._pending_usage >= self.TOKEN_USAGE_FLUSH_SIZE or
+                            now - self._last_usage_flush >= self.TOKEN_USAGE_FLUSH_INTERVAL)
+        
+        if should_flush:
+            self.flush_token_usage()
+    
+    def flush_token_usage(self) -> int:
+        """Запись накопленных счетчиков использования токенов одной транзакцией"""
+        with self._cache_lock:
+            if not self._token_usage:
+                self._last_usage_flush = time.monotonic()
+                return 0
+            pending = self._token_usage
+            self._token_usage = {}
+            self._pending_usage = 0
+            self._last_usage_flush = time.monotonic()
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany("""
+                    UPDATE api_tokens 
+                    SET last_used = ?, usage_count = usage_count + ?
+                    WHERE service_name = ? AND token_type = ?
+                """, [(last_used, count, service_name, token_type)
+                      for (service_name, token_type), (count, last_used) in pending.items()])
+                conn.commit()
+            return len(pending)
+            
+        except Exception as e:
+            self.logger.error(f"Ошибка записи статистики использования токенов: {e}")
+            # Счетчики возвращаются в буфер и будут записаны при следующем сбросе
+            with self._cache_lock:
+                for cache_key, (count, last_used) in pending.items():
+                    usage = self._token_usage.get(cache_key)
+                    if usage is None:
+                        self._token_usage[cache_key] = [count, last_used]
+                    else:
+                        usage[0] += count
+                        usage[1] = max(usage[1], last_used)
+                    self._pending_usage += count
+            return 0
+    
+    def close(self):
+        """Запись буфера счетчиков токенов (при выходе процесса выполняется автоматически)"""
+        self.flush_token_usage()
+        _live_managers.discard(self)
+    
     def get_all_tokens(self) -> List[Dict[str, Any]]:
         """Получение всех токенов"""
+        # Счетчики использования должны быть актуальными
+        self.flush_token_usage()
+        
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
@@ -457,8 +710,12 @@ class SettingsManager:
                 """, (service_name, token_type))
                 
                 conn.commit()
-                self.logger.info(f"Токен {service_name}.{token_type} удален")
-                return True
+            
+            with self._cache_lock:
+                self._token_usage.pop((service_name, token_type), None)
+            self.invalidate_cache("token", service_name, token_type)
+            self.logger.info(f"Токен {service_name}.{token_type} удален")
+            return True
                 
         except Exception as e:
             self.logger.error(f"Ошибка удаления токена {service_name}.{token_type}: {e}")
@@ -585,12 +842,11 @@ class SettingsManager:
             with open(file_path, 'r', encoding='utf-8') as f:
                 settings = json.load(f)
             
-            imported_count = 0
-            for category, category_settings in settings.items():
-                for key, value in category_settings.items():
-                    if overwrite or not self.get_setting(category, key):
-                        self.set_setting(category, key, value, description=f"Импортировано из {file_path}")
-                        imported_count += 1
+            imported_count = self.set_settings_bulk(
+                settings,
+                description=f"Импортировано из {file_path}",
+                overwrite=overwrite
+            )
             
             self.logger.info(f"Импортировано {imported_count} настроек из {file_path}")
             return True
@@ -632,8 +888,7 @@ class SettingsManager:
     def _encrypt_value(self, value: str) -> str:
         """Шифрование значения"""
         try:
-            fernet = Fernet(self.encryption_key)
-            encrypted = fernet.encrypt(value.encode())
+            encrypted = self._fernet.encrypt(value.encode())
             return base64.urlsafe_b64encode(encrypted).decode()
         except Exception as e:
             self.logger.error(f"Ошибка шифрования: {e}")
@@ -642,9 +897,8 @@ class SettingsManager:
     def _decrypt_value(self, encrypted_value: str) -> str:
         """Расшифровка значения"""
         try:
-            fernet = Fernet(self.encryption_key)
             decoded = base64.urlsafe_b64decode(encrypted_value.encode())
-            decrypted = fernet.decrypt(decoded)
+            decrypted = self._fernet.decrypt(decoded)
             return decrypted.decode()
         except Exception as e:
             self.logger.error(f"Ошибка расшифровки: {e}")
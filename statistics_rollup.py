@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+📈 Дневные сводки аренд в account_statistics
+Завершение аренды (status -> 'completed') попадает триггером в очередь rental_completions,
+задача сворачивает очередь порциями в сводку (аккаунт, день, игра) и сдвигает
+контрольную точку в той же транзакции - повторный запуск продолжает с места остановки.
+
+Аккаунт сводки - steam_accounts_extended.id (сопоставление по логину),
+аренды аккаунтов без расширенной записи учитываются с account_id = 0.
+Доход аренды - сумма из журнала выручки (revenue_ledger), для аренд без записи в журнале -
+duration_hours * steam_accounts.price.
+"""
+
+import sqlite3
+import logging
+from contextlib import closing
+from typing import Dict, List, Optional
+from metrics import Counter
+
+ROLLUP_RENTALS = Counter('steam_rental_statistics_rollup_rentals', 'Аренды, свернутые в дневные сводки')
+
+CHECKPOINT_NAME = 'account_statistics'
+
+
+class StatisticsRollup:
+    """Инкрементальная сводка завершенных аренд по дням"""
+
+    def __init__(self, db_path: str, batch_size: int = 1000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(__name__)
+        self.setup()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def setup(self):
+        """Таблицы очереди и контрольных точек, триггеры, индексы сводки
+
+        Схемы аренд (Database) и расширенных аккаунтов (AccountManager) создают их владельцы
+        до создания сводки.
+        """
+        with closing(self._connect()) as conn, conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(account_statistics)")}
+            if 'game_name' not in columns:
+                conn.execute("ALTER TABLE account_statistics ADD COLUMN game_name TEXT NOT NULL DEFAULT ''")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_account_statistics_bucket "
+                         "ON account_statistics (account_id, date, game_name)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_account_statistics_date ON account_statistics (date, game_name)")
+
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rollup_checkpoints (
+                    name TEXT PRIMARY KEY,
+                    last_id INTEGER NOT NULL DEFAULT 0,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            queue_exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rental_completions'"
+            ).fetchone()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rental_completions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    rental_id INTEGER NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS rentals_completed_au AFTER UPDATE OF status ON rentals
+                WHEN new.status = 'completed' AND old.status IS NOT 'completed'
+                BEGIN INSERT INTO rental_completions (rental_id) VALUES (new.id); END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS rentals_completed_ai AFTER INSERT ON rentals
+                WHEN new.status = 'completed'
+                BEGIN INSERT INTO rental_completions (rental_id) VALUES (new.id); END
+            """)
+            if not queue_exists:
+                # Аренды, завершенные до появления очереди
+                conn.execute("""
+                    INSERT INTO rental_completions (rental_id)
+                    SELECT id FROM rentals WHERE status = 'completed' ORDER BY id
+                """)
+
+    def run(self) -> Dict:
+        """Свертка новых завершений порциями batch_size"""
+        processed = batches = 0
+        while True:
+            count = self._fold_batch()
+            if not count:
+                break
+            processed += count
+            batches += 1
+        if processed:
+            ROLLUP_RENTALS.inc(processed)
+            self.logger.info(f"📈 В сводку добавлено аренд: {processed}")
+        return {'rentals': processed, 'batches': batches, 'checkpoint': self.checkpoint()}
+
+    def _fold_batch(self) -> int:
+        """Одна порция: сводка, контрольная точка и очистка очереди в одной транзакции"""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                last_id = self._checkpoint(conn)
+                upper = conn.execute(
+                    "SELECT MAX(id), COUNT(*) FROM (SELECT id FROM rental_completions WHERE id > ? ORDER BY id LIMIT ?)",
+                    (last_id, self.batch_size)
+                ).fetchone()
+                if upper[0] is None:
+                    conn.rollback()
+                    return 0
+
+                conn.execute("""
+                    INSERT INTO account_statistics (account_id, date, game_name, earnings, rental_time, rental_count)
+                    SELECT COALESCE(e.id, 0), DATE(r.start_time), COALESCE(a.game_name, ''),
+                           SUM(COALESCE(
+                               (SELECT SUM(l.amount) FROM revenue_ledger l
+                                WHERE l.rental_id = r.id AND l.entry_type = 'rental'),
+                               r.duration_hours * COALESCE(a.price, 0)
+                           )),
+                           SUM(r.duration_hours * 60), COUNT(*)
+                    FROM rental_completions q
+                    JOIN rentals r ON r.id = q.rental_id
+                    LEFT JOIN steam_accounts a ON a.id = r.account_id
+                    LEFT JOIN steam_accounts_extended e ON e.login = a.username
+                    WHERE q.id > ? AND q.id <= ?
+                    GROUP BY 1, 2, 3
+                    ON CONFLICT (account_id, date, game_name) DO UPDATE SET
+                        earnings = earnings + excluded.earnings,
+                        rental_time = rental_time + excluded.rental_time,
+                        rental_count = rental_count + excluded.rental_count
+                """, (last_id, upper[0]))
+                conn.execute("""
+                    INSERT INTO rollup_checkpoints (name, last_id) VALUES (?, ?)
+                    ON CONFLICT (name) DO UPDATE SET last_id = excluded.last_id, updated_at = CURRENT_TIMESTAMP
+                """, (CHECKPOINT_NAME, upper[0]))
+                conn.execute("DELETE FROM rental_completions WHERE id <= ?", (upper[0],))
+                conn.commit()
+                return upper[1]
+            except Exception:
+                conn.rollback()
+                raise
+
+    @staticmethod
+    def _checkpoint(conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT last_id FROM rollup_checkpoints WHERE name = ?", (CHECKPOINT_NAME,)).fetchone()
+        return row[0] if row else 0
+
+    def checkpoint(self) -> int:
+        """Последнее свернутое завершение аренды"""
+        with closing(self._connect()) as conn:
+            return self._checkpoint(conn)
+
+    def game_totals(self, days: Optional[int] = 30) -> List[Dict]:
+        """Доход, время и число аренд по играм за последние days дней (None - за все время)"""
+        query = """
+            SELECT game_name, SUM(earnings), SUM(rental_time), SUM(rental_count)
+            FROM account_statistics
+        """
+        params = []
+        if days:
+            query += " WHERE date >= DATE('now', ?)"
+            params.append(f"-{days} days")
+        query += " GROUP BY game_name ORDER BY 2 DESC"
+        with closing(self._connect()) as conn:
+            return [
+                {'game_name': row[0], 'earnings': row[1], 'rental_time': row[2], 'rental_count': row[3]}
+                for row in conn.execute(query, params)
+            ]
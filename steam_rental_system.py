@@ -5,71 +5,147 @@
 Оркестратор всех компонентов
 """
 
-import time
-import schedule
-import threading
-import sqlite3
+import asyncio
 from datetime import datetime, timedelta
 from config import Config
 from database import Database
 from steam_manager import SteamManager
-from funpay_manager import FunPayManager
+from funpay_manager import FunPayManager, parse_price
+from backup_manager import BackupManager
+from retention_manager import RetentionManager
+from statistics_rollup import StatisticsRollup
+from account_manager import AccountManager
+from event_bus import RentalExpired
+from repositories import create_repositories
+from async_runtime import AsyncScheduler, offload
+from leader_lease import LeaderLease
+from job_queue import JobQueue
+from job_executor import Misfire, Priority
+from metrics import Counter, Gauge
+
+RENTALS_EXPIRED = Counter('steam_rental_rentals_expired', 'Завершенные по времени аренды')
+RENTALS_EXPIRED_LAST_TICK = Gauge(
+    'steam_rental_rentals_expired_last_tick', 'Аренды, завершенные при последней проверке'
+)
+ORDERS_FOUND = Counter('steam_rental_funpay_orders_found', 'Новые заказы FunPay')
+REVIEWS_FOUND = Counter('steam_rental_funpay_reviews_found', 'Новые отзывы FunPay')
+
+REVIEW_REMINDER = """⭐ Пожалуйста, оставьте отзыв!
+
+🎮 Ваша аренда завершена: {game}, {duration} ч.
+
+🎁 За отзыв 5 звезд вы получите +30 минут бонусного времени к следующей аренде."""
 
 class SteamRentalSystem:
     def __init__(self):
         self.db = Database()
+        # Аккаунты, аренды и бонусы (хранилище - Config.STORAGE_BACKEND)
+        self.repos = create_repositories(database=self.db, events=self.db.events)
         self.steam_manager = SteamManager()
         self.funpay_manager = FunPayManager()
+        self.subscriptions = []
+        # Задачи выполняет только держатель аренды (остальные реплики ждут ее освобождения)
+        self.lease = LeaderLease(self.db.db_path)
+        # Отложенные разовые действия (смена пароля, повторная выдача, напоминания)
+        self.job_queue = JobQueue(self.db.db_path)
+        self.scheduler = AsyncScheduler(runner=self.run_as_leader, gate=lambda: self.lease.is_leader)
+        # Дневные сводки: схема создается один раз, задача только сворачивает новые аренды
+        AccountManager(self.db.db_path)
+        self.statistics = StatisticsRollup(self.db.db_path)
         self.running = False
         
-    def start(self):
-        """Запуск всей системы"""
+    def start(self, on_ready=None):
+        """Запуск всей системы в собственном event loop (блокирует поток до остановки)"""
+        try:
+            asyncio.run(self.run_async(on_ready))
+        except KeyboardInterrupt:
+            print("\n⏹️ Получен сигнал остановки...")
+            self.stop()
+    
+    async def run_async(self, on_ready=None):
+        """Запуск системы в текущем event loop
+
+        on_ready вызывается после настройки планировщика, до входа в основной цикл.
+        """
         print("🚀 Запуск системы аренды аккаунтов Steam...")
         
-        # Запускаем планировщик задач
+        # Подписываемся на события и настраиваем планировщик задач
+        self.setup_subscribers()
         self.setup_scheduler()
         
+        if on_ready:
+            on_ready()
+        
         # Запускаем основной цикл
         self.running = True
-        self.main_loop()
+        if await offload(self.lease.acquire) is None:
+            print(f"👥 Задачи выполняет другой процесс, ожидание аренды {self.lease.name}...")
+        lease_task = asyncio.create_task(self.maintain_lease())
+        print("🔄 Основной цикл запущен")
+        try:
+            await self.scheduler.run()
+        except Exception as e:
+            print(f"❌ Ошибка в основном цикле: {e}")
+        finally:
+            lease_task.cancel()
+            if self.running:
+                self.stop()
+    
+    async def maintain_lease(self):
+        """Продление аренды лидера (ведомые процессы пытаются ее захватить)"""
+        while self.running:
+            await asyncio.sleep(self.lease.ttl / 3)
+            await offload(self.lease.acquire)
+    
+    def run_as_leader(self, job):
+        """Запуск задачи после проверки аренды по базе"""
+        self.lease.verify()
+        job()
+    
+    def setup_subscribers(self):
+        """Подписка на события базы (обработка в потоках шины)"""
+        self.subscriptions.append(
+            self.db.events.subscribe(self.schedule_password_rotation, RentalExpired, name='password_rotation')
+        )
+        print("📣 Подписчики событий настроены")
     
     def setup_scheduler(self):
         """Настройка планировщика задач"""
+        # Задачи выполняются в пуле потоков по приоритету, не более одного экземпляра каждой.
+        # Пропущенные проверки аренд и заказов выполняются один раз после текущей (COALESCE),
+        # остальные задачи просто ждут следующего срока.
         # Проверка истекших аренд каждые 5 минут
-        schedule.every(5).minutes.do(self.check_expired_rentals)
+        self.scheduler.every(5 * 60, self.check_expired_rentals, priority=Priority.CRITICAL,
+                             timeout=120, misfire=Misfire.COALESCE)
         
         # Проверка новых заказов каждые 10 минут
-        schedule.every(10).minutes.do(self.check_new_orders)
+        self.scheduler.every(10 * 60, self.check_new_orders, priority=Priority.HIGH,
+                             timeout=300, misfire=Misfire.COALESCE)
         
         # Проверка новых отзывов каждые 15 минут
-        schedule.every(15).minutes.do(self.check_new_reviews)
+        self.scheduler.every(15 * 60, self.check_new_reviews, priority=Priority.NORMAL, timeout=300)
         
         # Синхронизация с FunPay каждые 30 минут
-        schedule.every(30).minutes.do(self.sync_with_funpay)
+        self.scheduler.every(30 * 60, self.sync_with_funpay, priority=Priority.LOW,
+                             timeout=600, misfire_grace=15 * 60)
         
-        # Резервное копирование базы данных каждый день в 3:00
-        schedule.every().day.at("03:00").do(self.backup_database)
+        # Резервное копирование базы данных (хранятся часовые и дневные копии)
+        self.scheduler.every(Config.BACKUP_INTERVAL_MINUTES * 60, self.backup_database,
+                             priority=Priority.LOW, timeout=1800)
         
-        print("📅 Планировщик задач настроен")
-    
-    def main_loop(self):
-        """Основной цикл системы"""
-        print("🔄 Основной цикл запущен")
+        # Свертка завершенных аренд в дневные сводки
+        self.scheduler.every(Config.STATISTICS_ROLLUP_MINUTES * 60, self.rollup_statistics,
+                             priority=Priority.LOW, timeout=600)
         
-        try:
-            while self.running:
-                # Выполняем запланированные задачи
-                schedule.run_pending()
-                
-                # Небольшая пауза
-                time.sleep(1)
-                
-        except KeyboardInterrupt:
-            print("\n⏹️ Получен сигнал остановки...")
-            self.stop()
-        except Exception as e:
-            print(f"❌ Ошибка в основном цикле: {e}")
-            self.stop()
+        # Отложенные задачи из очереди delayed_jobs
+        self.scheduler.every(Config.JOB_QUEUE_POLL_SECONDS, self.process_delayed_jobs, priority=Priority.HIGH,
+                             timeout=300, misfire=Misfire.COALESCE)
+        
+        # Архивирование старой истории и сжатие базы раз в сутки
+        self.scheduler.daily(Config.RETENTION_TIME, self.archive_history, priority=Priority.LOW,
+                             timeout=3600, misfire_grace=3600)
+        
+        print("📅 Планировщик задач настроен")
     
     def check_expired_rentals(self):
         """Проверка и обработка истекших аренд"""
@@ -77,60 +153,91 @@ class SteamRentalSystem:
             print("⏰ Проверка истекших аренд...")
             
             # Получаем количество истекших аренд
-            expired_count = self.db.end_expired_rentals()
+            expired_count = self.repos.rentals.expire_due()
+            RENTALS_EXPIRED.inc(expired_count)
+            RENTALS_EXPIRED_LAST_TICK.set(expired_count)
             
             if expired_count > 0:
+                # Пароли меняет подписчик RentalExpired
                 print(f"🔄 Обработано {expired_count} истекших аренд")
-                
-                # Изменяем пароли для освобожденных аккаунтов
-                self.change_passwords_for_expired_accounts()
-                
-                # Обновляем объявления на FunPay
-                self.update_funpay_listings()
             else:
                 print("✅ Истекших аренд не найдено")
                 
         except Exception as e:
             print(f"❌ Ошибка при проверке истекших аренд: {e}")
+            raise
     
-    def change_passwords_for_expired_accounts(self):
-        """Изменение паролей для истекших аккаунтов"""
-        try:
-            print("🔑 Изменение паролей для истекших аккаунтов...")
-            
-            # Получаем список освобожденных аккаунтов
-            available_accounts = self.db.get_available_accounts_list()
-            
-            for account in available_accounts:
-                # Генерируем новый пароль
-                new_password = self.steam_manager.generate_password()
-                
-                # Изменяем пароль в Steam
-                if self.steam_manager.change_steam_password(
-                    account['username'], 
-                    account['password'], 
-                    new_password
-                ):
-                    # Обновляем пароль в базе данных
-                    self.update_account_password(account['id'], new_password)
-                    print(f"✅ Пароль изменен для аккаунта {account['username']}")
-                else:
-                    print(f"❌ Не удалось изменить пароль для {account['username']}")
-                    
-        except Exception as e:
-            print(f"❌ Ошибка при изменении паролей: {e}")
+    def schedule_password_rotation(self, event: RentalExpired):
+        """Смена пароля освобожденного аккаунта через PASSWORD_CHANGE_DELAY минут"""
+        self.job_queue.enqueue('rotate_password', {'account_id': event.account_id},
+                               delay=Config.PASSWORD_CHANGE_DELAY * 60,
+                               dedupe_key=f"rotate_password:{event.account_id}")
+    
+    def job_handlers(self) -> dict:
+        """Обработчики отложенных задач по kind"""
+        return {
+            'rotate_password': self.rotate_account_password,
+            'deliver_credentials': self.deliver_credentials,
+            'review_reminder': self.send_review_reminder,
+        }
+    
+    def process_delayed_jobs(self):
+        """Выполнение готовых задач очереди delayed_jobs порциями"""
+        totals = {'done': 0, 'retry': 0, 'dead': 0}
+        while True:
+            counts = self.job_queue.process(self.job_handlers(), limit=50)
+            for key, value in counts.items():
+                totals[key] += value
+            if sum(counts.values()) < 50:
+                break
+        if any(totals.values()):
+            print(f"📬 Отложенные задачи: выполнено {totals['done']}, повтор {totals['retry']}, "
+                  f"dead letter {totals['dead']}")
+    
+    def rotate_account_password(self, payload: dict) -> bool:
+        """Изменение пароля аккаунта, освобожденного после аренды"""
+        account = self.repos.accounts.get(payload['account_id'])
+        if not account or account['is_rented']:
+            # Аккаунт удален или уже снова выдан
+            return True
+        
+        print(f"🔑 Изменение пароля аккаунта {account['username']}...")
+        
+        # Генерируем новый пароль и изменяем его в Steam
+        new_password = self.steam_manager.generate_password()
+        if self.steam_manager.change_steam_password(account['username'], account['password'], new_password):
+            # Обновляем пароль в базе данных
+            self.update_account_password(account['id'], new_password)
+            print(f"✅ Пароль изменен для аккаунта {account['username']}")
+            return True
+        
+        print(f"❌ Не удалось изменить пароль для {account['username']}")
+        return False
+    
+    def deliver_credentials(self, payload: dict) -> bool:
+        """Повторная отправка данных аккаунта по заказу"""
+        account = self.repos.accounts.get(payload['account_id'])
+        if not account:
+            raise LookupError(f"аккаунт #{payload['account_id']} не найден")
+        account_data = {
+            'username': account['username'],
+            'password': account['password'],
+            'game_name': account['game_name'],
+            'duration': payload['duration_hours'],
+            'start_time': payload['start_time']
+        }
+        return self.funpay_manager.process_order(payload['order_id'], account_data)
+    
+    def send_review_reminder(self, payload: dict) -> bool:
+        """Напоминание об отзыве после окончания аренды"""
+        return self.funpay_manager.send_message(
+            payload['order_id'], REVIEW_REMINDER.format(game=payload['game_name'], duration=payload['duration_hours'])
+        )
     
     def update_account_password(self, account_id: int, new_password: str):
         """Обновление пароля аккаунта в базе данных"""
         try:
-            with sqlite3.connect(self.db.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE steam_accounts 
-                    SET password = ?, updated_at = datetime('now')
-                    WHERE id = ?
-                ''', (new_password, account_id))
-                conn.commit()
+            self.repos.accounts.update_password(account_id, new_password)
                 
         except Exception as e:
             print(f"❌ Ошибка при обновлении пароля в БД: {e}")
@@ -144,6 +251,7 @@ class SteamRentalSystem:
             new_orders = self.funpay_manager.check_new_orders()
             
             if new_orders:
+                ORDERS_FOUND.inc(len(new_orders))
                 print(f"🆕 Найдено {len(new_orders)} новых заказов")
                 
                 for order in new_orders:
@@ -154,6 +262,7 @@ class SteamRentalSystem:
                 
         except Exception as e:
             print(f"❌ Ошибка при проверке заказов: {e}")
+            raise
     
     def process_new_order(self, order: dict):
         """Обработка нового заказа"""
@@ -161,9 +270,7 @@ class SteamRentalSystem:
             print(f"🔄 Обработка заказа {order['id']} для игры {order['game_name']}")
             
             # Ищем доступный аккаунт для игры
-            available_accounts = self.db.get_available_accounts_list()
-            # Фильтруем по игре
-            available_accounts = [acc for acc in available_accounts if acc['game_name'] == order['game_name']]
+            available_accounts = self.repos.accounts.list_available(order['game_name'])
             
             if available_accounts:
                 # Берем первый доступный аккаунт
@@ -172,8 +279,9 @@ class SteamRentalSystem:
                 # Парсим длительность аренды
                 duration_hours = self.parse_duration(order['duration'])
                 
-                # Арендуем аккаунт
-                if self.db.create_rental(account['id'], order['id'], duration_hours):
+                # Арендуем аккаунт (сумма заказа попадает в журнал выручки)
+                if self.repos.rentals.start(account['id'], order['id'], duration_hours,
+                                            price=parse_price(order.get('price')), order_id=order['id']):
                     # Отправляем данные аккаунта через FunPay
                     account_data = {
                         'username': account['username'],
@@ -186,7 +294,18 @@ class SteamRentalSystem:
                     if self.funpay_manager.process_order(order['id'], account_data):
                         print(f"✅ Заказ {order['id']} обработан успешно")
                     else:
-                        print(f"❌ Не удалось отправить данные для заказа {order['id']}")
+                        # Повторная отправка через очередь
+                        self.job_queue.enqueue('deliver_credentials', {
+                            'order_id': order['id'], 'account_id': account['id'],
+                            'duration_hours': duration_hours, 'start_time': account_data['start_time']
+                        }, delay=60, dedupe_key=f"deliver_credentials:{order['id']}")
+                        print(f"❌ Не удалось отправить данные для заказа {order['id']}, повтор через очередь")
+                    
+                    # Напоминание об отзыве после окончания аренды
+                    self.job_queue.enqueue('review_reminder', {
+                        'order_id': order['id'], 'game_name': account['game_name'], 'duration_hours': duration_hours
+                    }, delay=duration_hours * 3600 + Config.REVIEW_REMINDER_DELAY * 60,
+                        dedupe_key=f"review_reminder:{order['id']}")
                 else:
                     print(f"❌ Не удалось арендовать аккаунт для заказа {order['id']}")
             else:
@@ -218,6 +337,7 @@ class SteamRentalSystem:
             new_reviews = self.funpay_manager.check_reviews()
             
             if new_reviews:
+                REVIEWS_FOUND.inc(len(new_reviews))
                 print(f"🆕 Найдено {len(new_reviews)} новых отзывов")
                 
                 for review in new_reviews:
@@ -228,6 +348,7 @@ class SteamRentalSystem:
                 
         except Exception as e:
             print(f"❌ Ошибка при проверке отзывов: {e}")
+            raise
     
     def process_new_review(self, review: dict):
         """Обработка нового отзыва"""
@@ -254,15 +375,7 @@ class SteamRentalSystem:
     def find_user_by_order(self, order_id: str) -> str:
         """Поиск пользователя по ID заказа"""
         try:
-            with sqlite3.connect(self.db.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT renter_id FROM rentals 
-                    WHERE id = ?
-                ''', (order_id,))
-                
-                result = cursor.fetchone()
-                return result[0] if result else None
+            return self.repos.rentals.get_renter(order_id)
                 
         except Exception as e:
             print(f"❌ Ошибка при поиске пользователя: {e}")
@@ -272,7 +385,7 @@ class SteamRentalSystem:
         """Добавление бонусного времени пользователю"""
         try:
             # Добавляем бонусное время через базу данных
-            success = self.db.add_bonus_time(user_id, minutes, "Положительный отзыв")
+            success = self.repos.bonuses.grant(user_id, minutes, "Положительный отзыв")
             if success:
                 print(f"🎁 Добавлено {minutes} минут бонусного времени для пользователя {user_id}")
             else:
@@ -296,27 +409,64 @@ class SteamRentalSystem:
             
         except Exception as e:
             print(f"❌ Ошибка при синхронизации с FunPay: {e}")
+            raise
     
     def backup_database(self):
         """Резервное копирование базы данных"""
         try:
             print("💾 Создание резервной копии базы данных...")
             
-            # Здесь должна быть логика создания резервной копии
-            # Для демонстрации просто логируем
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_filename = f"steam_rental_backup_{timestamp}.db"
+            result = BackupManager(self.db.db_path).backup()
             
-            print(f"✅ Резервная копия создана: {backup_filename}")
+            print(f"✅ Резервная копия создана: {result['path']} "
+                  f"({result['size_bytes']} байт, {result['duration_seconds']} с)")
             
         except Exception as e:
             print(f"❌ Ошибка при создании резервной копии: {e}")
+            raise
+    
+    def rollup_statistics(self):
+        """Свертка завершенных аренд в дневные сводки account_statistics"""
+        try:
+            result = self.statistics.run()
+            if result['rentals']:
+                print(f"📈 В сводку добавлено аренд: {result['rentals']}")
+            
+        except Exception as e:
+            print(f"❌ Ошибка свертки статистики: {e}")
+            raise
+    
+    def archive_history(self):
+        """Перенос старой истории в архивную базу"""
+        try:
+            print("🗄️ Архивирование старой истории...")
+            
+            report = RetentionManager(self.db.db_path).run()
+            
+            for table, stats in report['tables'].items():
+                if stats['rows']:
+                    print(f"  {table}: {stats['rows']} строк")
+            print(f"✅ Архивирование завершено за {report['duration_seconds']} с, "
+                  f"освобождено страниц: {report['vacuumed_pages']}")
+            
+        except Exception as e:
+            print(f"❌ Ошибка при архивировании истории: {e}")
+            raise
     
     def stop(self):
         """Остановка системы"""
         print("🛑 Остановка системы...")
         
         self.running = False
+        self.scheduler.stop()
+        
+        # Освобождаем аренду, чтобы другая реплика не ждала ее истечения
+        self.lease.release()
+        
+        # Отписываемся от событий
+        for subscription in self.subscriptions:
+            self.db.events.unsubscribe(subscription)
+        self.subscriptions = []
         
         # Закрываем FunPay менеджер
         self.funpay_manager.close()
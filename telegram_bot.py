@@ -4,6 +4,7 @@
 🤖 Telegram бот для системы аренды Steam аккаунтов
 """
 
+import time
 import logging
 import asyncio
 from datetime import datetime, timedelta
@@ -11,6 +12,26 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters, ContextTypes
 from config import Config
 from database import Database
+from callback_router import CallbackRouter
+from async_runtime import offload
+from metrics import REGISTRY, Counter, Histogram
+
+BOT_HANDLER_SECONDS = Histogram(
+    'steam_rental_bot_handler_seconds', 'Длительность обработчиков Telegram бота', ('handler',)
+)
+BOT_HANDLER_ERRORS = Counter(
+    'steam_rental_bot_handler_errors', 'Исключения в обработчиках Telegram бота', ('handler',)
+)
+
+# Допустимая длительность аренды из кнопок (часы)
+RENTAL_DURATIONS = (1, 3, 6, 12, 24)
+
+def rental_duration(value: str) -> int:
+    """Валидация длительности аренды из callback_data"""
+    duration = int(value)
+    if duration not in RENTAL_DURATIONS:
+        raise ValueError(f"недопустимая длительность: {duration}")
+    return duration
 
 class SteamRentalBot:
     def __init__(self):
@@ -26,6 +47,83 @@ class SteamRentalBot:
         )
         self.logger = logging.getLogger(__name__)
         
+        # Таблица маршрутов inline кнопок
+        self.router = CallbackRouter()
+        self.setup_routes()
+        
+    def setup_routes(self):
+        """Регистрация маршрутов inline кнопок"""
+        route = self.router.register
+        
+        # Пользовательские кнопки
+        route("acc", self.accounts_command, name="show_accounts", legacy="show_accounts")
+        route("st", self.status_command, name="show_status", legacy="show_status")
+        route("hlp", self.help_command, name="show_help", legacy="show_help")
+        route("rnt", self.rentals_command, name="show_rentals", legacy="show_rentals")
+        route("ra", self.handle_rent_request, (int,), name="rent_account", legacy="rent_account")
+        route("rt", self.handle_rent_confirmation, (int, rental_duration), name="rent_time", legacy="rent_time")
+        
+        # Админ-панель
+        route("as", self.admin_stats, name="admin_stats", legacy="admin_stats")
+        route("au", self.admin_users, name="admin_users", legacy="admin_users")
+        route("aa", self.admin_accounts, name="admin_accounts", legacy="admin_accounts")
+        route("aad", self.admin_add_account, name="admin_add_account", legacy="admin_add_account")
+        route("ae", self.admin_edit_accounts, name="admin_edit_accounts", legacy="admin_edit_accounts")
+        route("ar", self.admin_rentals, name="admin_rentals", legacy="admin_rentals")
+        route("al", self.admin_list_accounts, name="admin_list_accounts", legacy="admin_list_accounts")
+        route("ad", self.admin_delete_account, name="admin_delete_account", legacy="admin_delete_account")
+        route("da", self.confirm_delete_account, (int,), name="delete_account", legacy="delete_account")
+        route("cd", self.execute_delete_account, (int,), name="confirm_delete", legacy="confirm_delete")
+        route("ab", self.admin_command, name="admin_back", legacy="admin_back")
+    
+    def timed_handler(self, name: str, handler):
+        """Обработчик с замером длительности и счетчиком ошибок"""
+        observed = BOT_HANDLER_SECONDS.labels(name)
+        errors = BOT_HANDLER_ERRORS.labels(name)
+        
+        async def wrapper(update, context):
+            started = time.perf_counter()
+            try:
+                return await handler(update, context)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                observed.observe(time.perf_counter() - started)
+        return wrapper
+    
+    def collect_router_metrics(self):
+        """Счетчики маршрутов inline кнопок для /metrics"""
+        stats = self.router.get_stats()
+        lines = [
+            "# HELP steam_rental_bot_callback_calls_total Вызовы маршрутов inline кнопок",
+            "# TYPE steam_rental_bot_callback_calls_total counter",
+        ]
+        lines += [f'steam_rental_bot_callback_calls_total{{route="{name}"}} {route["calls"]}'
+                  for name, route in stats['routes'].items()]
+        lines += [
+            "# HELP steam_rental_bot_callback_errors_total Ошибки маршрутов inline кнопок",
+            "# TYPE steam_rental_bot_callback_errors_total counter",
+        ]
+        lines += [f'steam_rental_bot_callback_errors_total{{route="{name}"}} {route["errors"]}'
+                  for name, route in stats['routes'].items()]
+        lines += [
+            "# HELP steam_rental_bot_callback_seconds_total Суммарное время маршрутов inline кнопок",
+            "# TYPE steam_rental_bot_callback_seconds_total counter",
+        ]
+        lines += [f'steam_rental_bot_callback_seconds_total{{route="{name}"}} {route["total_time"]!r}'
+                  for name, route in stats['routes'].items()]
+        lines += [
+            "# HELP steam_rental_bot_callback_invalid_total Отклоненные callback-запросы",
+            "# TYPE steam_rental_bot_callback_invalid_total counter",
+            f"steam_rental_bot_callback_invalid_total {stats['invalid']}",
+        ]
+        return lines
+    
+    def callback(self, code: str, *args) -> str:
+        """callback_data для inline кнопки"""
+        return self.router.encode(code, *args)
+        
     def setup(self):
         """Настройка бота"""
         self.logger.info(f"🔧 Настройка Telegram бота...")
@@ -41,20 +139,23 @@ class SteamRentalBot:
             self.application = Application.builder().token(self.token).build()
             
             # Добавляем обработчики команд
-            self.application.add_handler(CommandHandler("start", self.start_command))
-            self.application.add_handler(CommandHandler("help", self.help_command))
-            self.application.add_handler(CommandHandler("status", self.status_command))
-            self.application.add_handler(CommandHandler("accounts", self.accounts_command))
-            self.application.add_handler(CommandHandler("rentals", self.rentals_command))
-            self.application.add_handler(CommandHandler("support", self.support_command))
-            self.application.add_handler(CommandHandler("admin", self.admin_command))
-            self.application.add_handler(CommandHandler("add_account", self.add_account_command))
-            self.application.add_handler(CommandHandler("edit_account", self.edit_account_command))
-            self.application.add_handler(CommandHandler("set_token", self.set_token_command))
-            self.application.add_handler(CommandHandler("tokens", self.tokens_command))
+            self.application.add_handler(CommandHandler("start", self.timed_handler("start", self.start_command)))
+            self.application.add_handler(CommandHandler("help", self.timed_handler("help", self.help_command)))
+            self.application.add_handler(CommandHandler("status", self.timed_handler("status", self.status_command)))
+            self.application.add_handler(CommandHandler("accounts", self.timed_handler("accounts", self.accounts_command)))
+            self.application.add_handler(CommandHandler("rentals", self.timed_handler("rentals", self.rentals_command)))
+            self.application.add_handler(CommandHandler("support", self.timed_handler("support", self.support_command)))
+            self.application.add_handler(CommandHandler("admin", self.timed_handler("admin", self.admin_command)))
+            self.application.add_handler(CommandHandler("add_account", self.timed_handler("add_account", self.add_account_command)))
+            self.application.add_handler(CommandHandler("edit_account", self.timed_handler("edit_account", self.edit_account_command)))
+            self.application.add_handler(CommandHandler("set_token", self.timed_handler("set_token", self.set_token_command)))
+            self.application.add_handler(CommandHandler("tokens", self.timed_handler("tokens", self.tokens_command)))
             
             # Обработчик для inline кнопок
-            self.application.add_handler(CallbackQueryHandler(self.button_callback))
+            self.application.add_handler(CallbackQueryHandler(self.timed_handler("callback", self.button_callback)))
+            
+            # Метрики маршрутов inline кнопок
+            REGISTRY.add_collector(self.collect_router_metrics)
             
             self.logger.info("✅ Telegram бот настроен успешно")
             return True
@@ -63,44 +164,65 @@ class SteamRentalBot:
             self.logger.error(f"❌ Ошибка настройки бота: {e}")
             return False
     
-    def run(self):
-        """Запуск бота"""
+    def run(self, on_ready=None) -> bool:
+        """Запуск бота в собственном event loop (блокирует поток до остановки)
+
+        on_ready вызывается, когда polling запущен.
+        """
         if not self.application:
             self.logger.error("❌ Бот не настроен!")
-            return
+            return False
             
+        async def serve():
+            await self.start_async(on_ready)
+            try:
+                # Polling работает, пока работает цикл
+                await asyncio.Event().wait()
+            finally:
+                await self.stop_async()
+        
         try:
-            self.logger.info("🚀 Запуск Telegram бота...")
-            
-            # Создаем новый event loop для этого потока
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            # Запускаем бота без signal handling
-            async def run_bot():
-                try:
-                    await self.application.initialize()
-                    await self.application.start()
-                    await self.application.updater.start_polling(
-                        allowed_updates=Update.ALL_TYPES,
-                        drop_pending_updates=True
-                    )
-                except KeyboardInterrupt:
-                    await self.application.stop()
-                    await self.application.shutdown()
-            
-            # Запускаем асинхронную функцию
-            loop.run_until_complete(run_bot())
-            
+            asyncio.run(serve())
+            return True
+        except KeyboardInterrupt:
+            return True
         except Exception as e:
             self.logger.error(f"❌ Ошибка запуска бота: {e}")
+            return False
+    
+    async def start_async(self, on_ready=None):
+        """Запуск polling в текущем event loop (без signal handling)
+
+        Возвращается сразу после запуска, обновления обрабатываются задачами цикла.
+        """
+        if not self.application:
+            raise RuntimeError("Бот не настроен")
+        
+        self.logger.info("🚀 Запуск Telegram бота...")
+        await self.application.initialize()
+        await self.application.start()
+        await self.application.updater.start_polling(
+            allowed_updates=Update.ALL_TYPES,
+            drop_pending_updates=True
+        )
+        if on_ready:
+            on_ready()
+    
+    async def stop_async(self):
+        """Остановка polling и приложения"""
+        if self.application.updater and self.application.updater.running:
+            await self.application.updater.stop()
+        if self.application.running:
+            await self.application.stop()
+        await self.application.shutdown()
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /start"""
         user = update.effective_user
         
         # Добавляем пользователя в базу данных
-        self.db.add_user(
+        await offload(
+            self.db.add_user,
             telegram_id=str(user.id),
             username=user.username,
             first_name=user.first_name,
@@ -125,10 +247,10 @@ class SteamRentalBot:
         """
         
         keyboard = [
-            [InlineKeyboardButton("📋 Аккаунты", callback_data="show_accounts")],
-            [InlineKeyboardButton("📋 Мои аренды", callback_data="show_rentals")],
-            [InlineKeyboardButton("📊 Статус", callback_data="show_status")],
-            [InlineKeyboardButton("❓ Помощь", callback_data="show_help")]
+            [InlineKeyboardButton("📋 Аккаунты", callback_data=self.callback("acc"))],
+            [InlineKeyboardButton("📋 Мои аренды", callback_data=self.callback("rnt"))],
+            [InlineKeyboardButton("📊 Статус", callback_data=self.callback("st"))],
+            [InlineKeyboardButton("❓ Помощь", callback_data=self.callback("hlp"))]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
@@ -167,9 +289,9 @@ class SteamRentalBot:
         """Обработчик команды /status"""
         try:
             # Получаем статистику из базы данных
-            total_accounts = self.db.get_total_accounts()
-            available_accounts = self.db.get_available_accounts()
-            active_rentals = self.db.get_active_rentals()
+            total_accounts = await offload(self.db.get_total_accounts)
+            available_accounts = await offload(self.db.get_available_accounts)
+            active_rentals = await offload(self.db.get_active_rentals)
             
             status_text = f"""
 📊 Статус системы
@@ -197,7 +319,7 @@ class SteamRentalBot:
     async def accounts_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /accounts"""
         try:
-            accounts = self.db.get_available_accounts_list()
+            accounts = await offload(self.db.get_available_accounts_list)
             
             if not accounts:
                 await update.message.reply_text("❌ Нет доступных аккаунтов в данный момент.")
@@ -213,7 +335,7 @@ class SteamRentalBot:
                 
                 keyboard.append([InlineKeyboardButton(
                     f"Арендовать #{account['id']}", 
-                    callback_data=f"rent_account_{account['id']}"
+                    callback_data=self.callback("ra", account['id'])
                 )])
             
             if len(accounts) > 10:
@@ -230,7 +352,7 @@ class SteamRentalBot:
         user_id = update.effective_user.id
         
         try:
-            rentals = self.db.get_user_rentals(user_id)
+            rentals = await offload(self.db.get_user_rentals, user_id)
             
             if not rentals:
                 await update.message.reply_text("📭 У вас нет активных аренд.")
@@ -299,10 +421,10 @@ class SteamRentalBot:
         """
         
         try:
-            total_accounts = self.db.get_total_accounts()
-            available_accounts = self.db.get_available_accounts()
-            active_rentals = self.db.get_active_rentals()
-            total_users = self.db.get_total_users()
+            total_accounts = await offload(self.db.get_total_accounts)
+            available_accounts = await offload(self.db.get_available_accounts)
+            active_rentals = await offload(self.db.get_active_rentals)
+            total_users = await offload(self.db.get_total_users)
             
             admin_text += f"""
 • Всего аккаунтов: {total_accounts}
@@ -314,9 +436,9 @@ class SteamRentalBot:
             admin_text += f"\n❌ Ошибка получения статистики: {e}"
         
         keyboard = [
-            [InlineKeyboardButton("📊 Статистика", callback_data="admin_stats")],
-            [InlineKeyboardButton("👥 Пользователи", callback_data="admin_users")],
-            [InlineKeyboardButton("🎮 Аккаунты", callback_data="admin_accounts")]
+            [InlineKeyboardButton("📊 Статистика", callback_data=self.callback("as"))],
+            [InlineKeyboardButton("👥 Пользователи", callback_data=self.callback("au"))],
+            [InlineKeyboardButton("🎮 Аккаунты", callback_data=self.callback("aa"))]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
@@ -327,49 +449,14 @@ class SteamRentalBot:
         query = update.callback_query
         await query.answer()
         
-        data = query.data
-        
-        if data == "show_accounts":
-            await self.accounts_command(update, context)
-        elif data == "show_status":
-            await self.status_command(update, context)
-        elif data == "show_help":
-            await self.help_command(update, context)
-        elif data.startswith("rent_account_"):
-            account_id = data.split("_")[2]
-            await self.handle_rent_request(update, context, account_id)
-        elif data.startswith("rent_time_"):
-            parts = data.split("_")
-            account_id = parts[2]
-            duration = int(parts[3])
-            await self.handle_rent_confirmation(update, context, account_id, duration)
-        elif data == "admin_stats":
-            await self.admin_stats(update, context)
-        elif data == "admin_users":
-            await self.admin_users(update, context)
-        elif data == "admin_accounts":
-            await self.admin_accounts(update, context)
-        elif data == "admin_list_accounts":
-            await self.admin_list_accounts(update, context)
-        elif data == "admin_delete_account":
-            await self.admin_delete_account(update, context)
-        elif data.startswith("delete_account_"):
-            account_id = data.split("_")[2]
-            await self.confirm_delete_account(update, context, account_id)
-        elif data.startswith("confirm_delete_"):
-            account_id = data.split("_")[2]
-            await self.execute_delete_account(update, context, account_id)
-        elif data == "show_rentals":
-            await self.rentals_command(update, context)
-        elif data == "admin_back":
-            await self.admin_command(update, context)
+        await self.router.dispatch(query.data, update, context)
     
-    async def handle_rent_request(self, update: Update, context: ContextTypes.DEFAULT_TYPE, account_id: str):
+    async def handle_rent_request(self, update: Update, context: ContextTypes.DEFAULT_TYPE, account_id: int):
         """Обработка запроса на аренду"""
         user_id = update.effective_user.id
         
         try:
-            account = self.db.get_account(account_id)
+            account = await offload(self.db.get_account, account_id)
             if not account:
                 await update.callback_query.edit_message_text("❌ Аккаунт не найден.")
                 return
@@ -384,12 +471,12 @@ class SteamRentalBot:
             """
             
             keyboard = [
-                [InlineKeyboardButton("1 час", callback_data=f"rent_time_{account_id}_1")],
-                [InlineKeyboardButton("3 часа", callback_data=f"rent_time_{account_id}_3")],
-                [InlineKeyboardButton("6 часов", callback_data=f"rent_time_{account_id}_6")],
-                [InlineKeyboardButton("12 часов", callback_data=f"rent_time_{account_id}_12")],
-                [InlineKeyboardButton("24 часа", callback_data=f"rent_time_{account_id}_24")],
-                [InlineKeyboardButton("« Назад", callback_data="show_accounts")]
+                [InlineKeyboardButton("1 час", callback_data=self.callback("rt", account_id, 1))],
+                [InlineKeyboardButton("3 часа", callback_data=self.callback("rt", account_id, 3))],
+                [InlineKeyboardButton("6 часов", callback_data=self.callback("rt", account_id, 6))],
+                [InlineKeyboardButton("12 часов", callback_data=self.callback("rt", account_id, 12))],
+                [InlineKeyboardButton("24 часа", callback_data=self.callback("rt", account_id, 24))],
+                [InlineKeyboardButton("« Назад", callback_data=self.callback("acc"))]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
@@ -398,18 +485,18 @@ class SteamRentalBot:
         except Exception as e:
             await update.callback_query.edit_message_text(f"❌ Ошибка: {e}")
     
-    async def handle_rent_confirmation(self, update: Update, context: ContextTypes.DEFAULT_TYPE, account_id: str, duration: int):
+    async def handle_rent_confirmation(self, update: Update, context: ContextTypes.DEFAULT_TYPE, account_id: int, duration: int):
         """Обработка подтверждения аренды"""
         user_id = update.effective_user.id
         
         try:
-            account = self.db.get_account(account_id)
+            account = await offload(self.db.get_account, account_id)
             if not account:
                 await update.callback_query.edit_message_text("❌ Аккаунт не найден.")
                 return
             
             # Создаем аренду
-            success = self.db.create_rental(int(account_id), str(user_id), duration)
+            success = await offload(self.db.create_rental, account_id, str(user_id), duration)
             
             if success:
                 total_cost = duration * account.get('price', 50)
@@ -435,8 +522,8 @@ class SteamRentalBot:
                 """
                 
                 keyboard = [
-                    [InlineKeyboardButton("📋 Мои аренды", callback_data="show_rentals")],
-                    [InlineKeyboardButton("🎮 Еще аккаунты", callback_data="show_accounts")]
+                    [InlineKeyboardButton("📋 Мои аренды", callback_data=self.callback("rnt"))],
+                    [InlineKeyboardButton("🎮 Еще аккаунты", callback_data=self.callback("acc"))]
                 ]
                 reply_markup = InlineKeyboardMarkup(keyboard)
                 
@@ -455,7 +542,7 @@ class SteamRentalBot:
             return
         
         try:
-            stats = self.db.get_detailed_stats()
+            stats = await offload(self.db.get_detailed_stats)
             
             text = """
 📊 Детальная статистика
@@ -480,7 +567,7 @@ class SteamRentalBot:
         except Exception as e:
             text = f"❌ Ошибка получения статистики: {e}"
         
-        keyboard = [[InlineKeyboardButton("« Назад", callback_data="admin_back")]]
+        keyboard = [[InlineKeyboardButton("« Назад", callback_data=self.callback("ab"))]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         await update.callback_query.edit_message_text(text, reply_markup=reply_markup)
@@ -493,7 +580,7 @@ class SteamRentalBot:
             return
         
         try:
-            users = self.db.get_users_list()
+            users = await offload(self.db.get_users_list)
             
             text = "👥 Список пользователей:\n\n"
             
@@ -508,7 +595,7 @@ class SteamRentalBot:
         except Exception as e:
             text = f"❌ Ошибка получения пользователей: {e}"
         
-        keyboard = [[InlineKeyboardButton("« Назад", callback_data="admin_back")]]
+        keyboard = [[InlineKeyboardButton("« Назад", callback_data=self.callback("ab"))]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         await update.callback_query.edit_message_text(text, reply_markup=reply_markup)
@@ -527,10 +614,10 @@ class SteamRentalBot:
         """
         
         keyboard = [
-            [InlineKeyboardButton("➕ Добавить аккаунт", callback_data="admin_add_account")],
-            [InlineKeyboardButton("📋 Список аккаунтов", callback_data="admin_list_accounts")],
-            [InlineKeyboardButton("🔧 Редактировать", callback_data="admin_edit_accounts")],
-            [InlineKeyboardButton("« Назад", callback_data="admin_back")]
+            [InlineKeyboardButton("➕ Добавить аккаунт", callback_data=self.callback("aad"))],
+            [InlineKeyboardButton("📋 Список аккаунтов", callback_data=self.callback("al"))],
+            [InlineKeyboardButton("🔧 Редактировать", callback_data=self.callback("ae"))],
+            [InlineKeyboardButton("« Назад", callback_data=self.callback("ab"))]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
@@ -544,7 +631,7 @@ class SteamRentalBot:
             return
         
         try:
-            accounts = self.db.get_all_accounts()
+            accounts = await offload(self.db.get_all_accounts)
             
             if not accounts:
                 text = "📭 Нет аккаунтов в системе."
@@ -565,8 +652,8 @@ class SteamRentalBot:
             text = f"❌ Ошибка получения аккаунтов: {e}"
         
         keyboard = [
-            [InlineKeyboardButton("🗑️ Удалить аккаунт", callback_data="admin_delete_account")],
-            [InlineKeyboardButton("« Назад", callback_data="admin_accounts")]
+            [InlineKeyboardButton("🗑️ Удалить аккаунт", callback_data=self.callback("ad"))],
+            [InlineKeyboardButton("« Назад", callback_data=self.callback("aa"))]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
@@ -580,7 +667,7 @@ class SteamRentalBot:
             return
         
         try:
-            accounts = self.db.get_all_accounts()
+            accounts = await offload(self.db.get_all_accounts)
             available_accounts = [acc for acc in accounts if not acc['is_rented']]
             
             if not available_accounts:
@@ -595,7 +682,7 @@ class SteamRentalBot:
                     
                     keyboard.append([InlineKeyboardButton(
                         f"🗑️ Удалить #{account['id']}", 
-                        callback_data=f"delete_account_{account['id']}"
+                        callback_data=self.callback("da", account['id'])
                     )])
                 
                 if len(available_accounts) > 10:
@@ -605,12 +692,12 @@ class SteamRentalBot:
             text = f"❌ Ошибка получения аккаунтов: {e}"
             keyboard = []
         
-        keyboard.append([InlineKeyboardButton("« Назад", callback_data="admin_list_accounts")])
+        keyboard.append([InlineKeyboardButton("« Назад", callback_data=self.callback("al"))])
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         await update.callback_query.edit_message_text(text, reply_markup=reply_markup)
     
-    async def confirm_delete_account(self, update: Update, context: ContextTypes.DEFAULT_TYPE, account_id: str):
+    async def confirm_delete_account(self, update: Update, context: ContextTypes.DEFAULT_TYPE, account_id: int):
         """Подтверждение удаления аккаунта"""
         user_id = update.effective_user.id
         
@@ -618,7 +705,7 @@ class SteamRentalBot:
             return
         
         try:
-            account = self.db.get_account(account_id)
+            account = await offload(self.db.get_account, account_id)
             if not account:
                 await update.callback_query.edit_message_text("❌ Аккаунт не найден.")
                 return
@@ -636,8 +723,8 @@ class SteamRentalBot:
             """
             
             keyboard = [
-                [InlineKeyboardButton("✅ Да, удалить", callback_data=f"confirm_delete_{account_id}")],
-                [InlineKeyboardButton("❌ Отмена", callback_data="admin_delete_account")]
+                [InlineKeyboardButton("✅ Да, удалить", callback_data=self.callback("cd", account_id))],
+                [InlineKeyboardButton("❌ Отмена", callback_data=self.callback("ad"))]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
@@ -646,7 +733,7 @@ class SteamRentalBot:
         except Exception as e:
             await update.callback_query.edit_message_text(f"❌ Ошибка: {e}")
     
-    async def execute_delete_account(self, update: Update, context: ContextTypes.DEFAULT_TYPE, account_id: str):
+    async def execute_delete_account(self, update: Update, context: ContextTypes.DEFAULT_TYPE, account_id: int):
         """Выполнение удаления аккаунта"""
         user_id = update.effective_user.id
         
@@ -654,7 +741,7 @@ class SteamRentalBot:
             return
         
         try:
-            success = self.db.delete_account(int(account_id))
+            success = await offload(self.db.delete_account, account_id)
             
             if success:
                 text = f"""
@@ -675,8 +762,8 @@ class SteamRentalBot:
                 """
             
             keyboard = [
-                [InlineKeyboardButton("📋 Список аккаунтов", callback_data="admin_list_accounts")],
-                [InlineKeyboardButton("« В админ-панель", callback_data="admin_back")]
+                [InlineKeyboardButton("📋 Список аккаунтов", callback_data=self.callback("al"))],
+                [InlineKeyboardButton("« В админ-панель", callback_data=self.callback("ab"))]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
@@ -709,7 +796,7 @@ class SteamRentalBot:
 • description - описание (необязательно)
         """
         
-        keyboard = [[InlineKeyboardButton("« Назад", callback_data="admin_accounts")]]
+        keyboard = [[InlineKeyboardButton("« Назад", callback_data=self.callback("aa"))]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         await update.callback_query.edit_message_text(text, reply_markup=reply_markup)
@@ -738,7 +825,7 @@ class SteamRentalBot:
 • game_name - название игры
         """
         
-        keyboard = [[InlineKeyboardButton("« Назад", callback_data="admin_accounts")]]
+        keyboard = [[InlineKeyboardButton("« Назад", callback_data=self.callback("aa"))]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         await update.callback_query.edit_message_text(text, reply_markup=reply_markup)
@@ -751,7 +838,7 @@ class SteamRentalBot:
             return
         
         try:
-            active_rentals = self.db.get_active_rentals_list()
+            active_rentals = await offload(self.db.get_active_rentals_list)
             
             if not active_rentals:
                 text = "📭 Нет активных аренд в системе."
@@ -780,8 +867,8 @@ class SteamRentalBot:
             text = f"❌ Ошибка получения аренд: {e}"
         
         keyboard = [
-            [InlineKeyboardButton("🔄 Обновить", callback_data="admin_rentals")],
-            [InlineKeyboardButton("« Назад", callback_data="admin_back")]
+            [InlineKeyboardButton("🔄 Обновить", callback_data=self.callback("ar"))],
+            [InlineKeyboardButton("« Назад", callback_data=self.callback("ab"))]
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
@@ -835,16 +922,17 @@ class SteamRentalBot:
                 return
             
             # Проверяем аккаунт через Steam API
-            steam_valid = self.verify_steam_account(username, password, steam_token)
+            steam_valid = await offload(self.verify_steam_account, username, password, steam_token)
             
             if not steam_valid:
                 await update.message.reply_text("❌ Ошибка: Не удалось проверить аккаунт через Steam API. Проверьте логин, пароль и токен.")
                 return
             
             # Добавляем аккаунт в базу данных
-            success = self.db.add_account(username, password, game_name, price, description)
+            success = await offload(self.db.add_account, username, password, game_name, price, description)
             
             if success:
+                total_accounts = await offload(self.db.get_total_accounts)
                 await update.message.reply_text(f"""
 ✅ Аккаунт успешно добавлен и проверен!
 
@@ -855,7 +943,7 @@ class SteamRentalBot:
 📄 Описание: {description if description else 'Не указано'}
 ✅ Steam API: Проверен
 
-📊 Всего аккаунтов: {self.db.get_total_accounts()}
+📊 Всего аккаунтов: {total_accounts}
                 """)
             else:
                 await update.message.reply_text("❌ Не удалось добавить аккаунт. Проверьте данные и попробуйте снова.")
@@ -901,7 +989,7 @@ class SteamRentalBot:
             value = " ".join(args[2:])
             
             # Проверяем, что аккаунт существует
-            account = self.db.get_account(account_id)
+            account = await offload(self.db.get_account, account_id)
             if not account:
                 await update.message.reply_text(f"❌ Аккаунт с ID {account_id} не найден.")
                 return
@@ -921,7 +1009,7 @@ class SteamRentalBot:
                     return
             
             # Обновляем аккаунт
-            success = self.db.update_account(account_id, field, value)
+            success = await offload(self.db.update_account, account_id, field, value)
             
             if success:
                 await update.message.reply_text(f"""
@@ -983,7 +1071,7 @@ class SteamRentalBot:
                 return
             
             # Сохраняем токен в базу данных или конфигурацию
-            success = self.db.save_token(token_type, token_value)
+            success = await offload(self.db.save_token, token_type, token_value)
             
             if success:
                 await update.message.reply_text(f"""
@@ -1011,8 +1099,8 @@ class SteamRentalBot:
         
         try:
             # Получаем токены из базы данных
-            funpay_token = self.db.get_token('FUNPAY_TOKEN')
-            steam_token = self.db.get_token('STEAM_API_KEY')
+            funpay_token = await offload(self.db.get_token, 'FUNPAY_TOKEN')
+            steam_token = await offload(self.db.get_token, 'STEAM_API_KEY')
             
             text = """
 🔑 Управление токенами
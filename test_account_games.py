@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест нормализованного индекса игр аккаунтов
+"""
+
+import os
+import json
+import sqlite3
+import tempfile
+from account_manager import AccountManager
+
+def test_account_games_index():
+    """Индекс заполняется из JSON, поиск по игре - точный и через индекс"""
+    print("🧪 Тест индекса игр...")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "steam_rental.db")
+        AccountManager(db_path)
+
+        # Аккаунты, добавленные до появления индекса (только JSON)
+        with sqlite3.connect(db_path) as conn:
+            conn.executemany(
+                "INSERT INTO steam_accounts_extended (login, password, games, price_per_hour) VALUES (?, 'p', ?, ?)",
+                [
+                    ('dota', json.dumps(['Dota']), 30.0),
+                    ('reborn', json.dumps(['Dota 2 Reborn', 'CS2']), 20.0),
+                    ('both', json.dumps(['dota 2', 'CS2']), 10.0),
+                    ('broken', 'not json', 10.0),
+                ]
+            )
+            conn.execute("DELETE FROM account_games")
+
+        manager = AccountManager(db_path)
+        assert [a.login for a in manager.get_accounts_by_game('Dota')] == ['dota']
+        assert [a.login for a in manager.get_accounts_by_game('  DOTA 2 ')] == ['both']
+        assert [a.login for a in manager.get_accounts_by_game('cs2')] == ['both', 'reborn']
+        assert manager.get_accounts_by_game('CS2')[0].games == ['dota 2', 'CS2']
+
+        # Статистика считается по играм, а не по JSON-спискам
+        game_stats = manager.get_account_statistics()['game_stats']
+        assert game_stats['CS2'] == 2 and game_stats['Dota'] == 1
+
+        assert {a.login for a in manager.search_accounts('Reborn')} == {'reborn'}
+
+        with sqlite3.connect(db_path) as conn:
+            plan = ' '.join(row[3] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT account_id FROM account_games WHERE game_key = ?", ('cs2',)
+            ))
+            assert 'SEARCH' in plan, plan
+
+    print("✅ Индекс игр работает")
+
+if __name__ == '__main__':
+    test_account_games_index()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест изменений аккаунтов одной транзакцией (теги, игры, история)
+"""
+
+import os
+import time
+import sqlite3
+import tempfile
+from account_manager import AccountManager
+
+def _tags(db_path: str, account_id: int):
+    with sqlite3.connect(db_path) as conn:
+        return sorted(row[0] for row in conn.execute("""
+            SELECT t.name FROM account_tag_relations r JOIN account_tags t ON t.id = r.tag_id
+            WHERE r.account_id = ?
+        """, (account_id,)))
+
+def test_account_mutations_single_transaction():
+    """Добавление, обновление и удаление пишут теги и историю без блокировок"""
+    print("🧪 Тест изменений аккаунтов...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = AccountManager(os.path.join(tmp_dir, "steam_rental.db"))
+
+        started = time.perf_counter()
+        account_id = manager.add_account({'login': 'acc', 'password': 'p', 'games': ['CS2'], 'tags': ['vip', 'new', 'vip']})
+        other_id = manager.add_account({'login': 'other', 'password': 'p', 'tags': ['vip']})
+        assert manager.update_account(account_id, {'tags': ['new', 'sale'], 'games': ['Dota 2'], 'notes': 'x'})
+        # Раньше каждая операция ждала блокировку отдельных соединений (по 5 с)
+        assert time.perf_counter() - started < 2
+
+        assert _tags(manager.db_path, account_id) == ['new', 'sale']
+        assert _tags(manager.db_path, other_id) == ['vip']
+        assert [a.login for a in manager.get_accounts_by_game('Dota 2')] == ['acc']
+
+        with sqlite3.connect(manager.db_path) as conn:
+            actions = [row[0] for row in conn.execute(
+                "SELECT action FROM account_history WHERE account_id = ? ORDER BY id", (account_id,)
+            )]
+            assert actions == ['account_created', 'account_updated']
+            assert conn.execute("SELECT COUNT(*) FROM account_tags").fetchone()[0] == 3
+
+        # Ошибка в середине изменения откатывает все его записи
+        assert not manager.update_account(account_id, {'tags': ['broken'], 'no_such_column': 1})
+        assert _tags(manager.db_path, account_id) == ['new', 'sale']
+
+        assert manager.delete_account(account_id)
+        assert _tags(manager.db_path, account_id) == []
+        assert manager.get_accounts_by_game('Dota 2') == []
+
+    print("✅ Изменения аккаунтов работают")
+
+if __name__ == '__main__':
+    test_account_mutations_single_transaction()
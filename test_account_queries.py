@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест выборки аккаунтов AccountManager.get_accounts / iter_accounts
+"""
+
+import os
+import json
+import sqlite3
+import tempfile
+from account_manager import AccountManager, AccountRecord, AccountStatus
+
+def _manager(tmp_dir: str) -> AccountManager:
+    db_path = os.path.join(tmp_dir, "steam_rental.db")
+    AccountManager(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO steam_accounts_extended (login, password, games, tags, status, price_per_hour, total_earnings) "
+            "VALUES (?, 'p', ?, ?, ?, ?, ?)",
+            [(f"acc{i}", json.dumps(['CS2'] if i % 2 else ['Dota 2']), json.dumps(['vip'] if i % 3 == 0 else []),
+              'rented' if i % 5 == 0 else 'available', 10.0 + i, i * 100.0) for i in range(1, 31)]
+        )
+    return AccountManager(db_path)
+
+def test_get_accounts_filters_and_sort():
+    """Фильтры, сортировка и лимит передаются параметрами, результат не теряется"""
+    print("🧪 Тест выборки аккаунтов...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = _manager(tmp_dir)
+
+        accounts = manager.get_accounts()
+        assert len(accounts) == 30
+        assert accounts[0].games in (['CS2'], ['Dota 2'])
+
+        top = manager.get_accounts({'status': AccountStatus.AVAILABLE, 'games': 'cs2'},
+                                   sort_by='total_earnings', sort_order='desc', limit=3)
+        assert [a.login for a in top] == ['acc29', 'acc27', 'acc23']
+
+        vip = manager.get_accounts({'tags': 'vip', 'price_range': (10, 20)}, sort_by='price_per_hour', sort_order='ASC')
+        assert [a.login for a in vip] == ['acc3', 'acc6', 'acc9']
+
+        for bad in ({'sort_by': 'price_per_hour; DROP TABLE x'}, {'sort_order': 'sideways'},
+                    {'filters': {'password': 'p'}}, {'fields': ['password', 'phone_number']}):
+            try:
+                manager.get_accounts(**bad)
+                assert False, f"Ожидалась ошибка для {bad}"
+            except ValueError:
+                pass
+
+        with sqlite3.connect(manager.db_path) as conn:
+            plan = ' '.join(row[3] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM steam_accounts_extended WHERE status = ? ORDER BY price_per_hour",
+                ('available',)
+            ))
+            assert 'idx_accounts_ext_status_price' in plan, plan
+
+    print("✅ Выборка аккаунтов работает")
+
+def test_iter_accounts_projection():
+    """Проекция полей и потоковый обход порциями"""
+    print("🧪 Тест потокового обхода аккаунтов...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = _manager(tmp_dir)
+
+        rows = manager.get_accounts({'status': 'rented'}, sort_by='id', sort_order='ASC', fields=['id', 'login', 'games'])
+        assert rows[0] == {'id': 5, 'login': 'acc5', 'games': ['CS2']}
+        assert len(rows) == 6
+
+        iterator = manager.iter_accounts(sort_by='id', sort_order='ASC', fields=['login'], batch_size=4)
+        assert next(iterator) == {'login': 'acc1'}
+        assert sum(1 for _ in iterator) == 29
+
+    print("✅ Потоковый обход аккаунтов работает")
+
+def test_lazy_account_records():
+    """AccountRecord разбирает поля при обращении и совпадает с AccountInfo"""
+    print("🧪 Тест компактных записей аккаунтов...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = _manager(tmp_dir)
+
+        eager = manager.get_accounts(sort_by='id', sort_order='ASC')
+        lazy = manager.get_accounts(sort_by='id', sort_order='ASC', lazy=True)
+        assert all(isinstance(record, AccountRecord) for record in lazy)
+        assert not hasattr(lazy[0], '__dict__')
+
+        record = lazy[2]
+        assert (record.id, record.login, record.status) == (3, 'acc3', AccountStatus.AVAILABLE)
+        assert record.tags == ['vip'] and record.tags is record.tags
+        assert [r.to_info() for r in lazy] == eager
+
+        # Одинаковые значения в одной выборке - один объект строки
+        assert lazy[0]._row[6] is lazy[1]._row[6]
+
+    print("✅ Компактные записи аккаунтов работают")
+
+if __name__ == '__main__':
+    test_get_accounts_filters_and_sort()
+    test_iter_accounts_projection()
+    test_lazy_account_records()
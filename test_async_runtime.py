@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест асинхронного планировщика задач
+"""
+
+import time
+import asyncio
+import threading
+from datetime import datetime
+from async_runtime import AsyncScheduler, ScheduledJob, offload
+
+def test_scheduler_runs_jobs_without_polling():
+    """Задачи выполняются по сроку, блокирующая задача не задерживает остальные"""
+    print("🧪 Тест асинхронного планировщика...")
+    calls = {'fast': [], 'async': 0, 'wrapped': []}
+
+    def fast():
+        calls['fast'].append(time.monotonic())
+
+    def blocking():
+        time.sleep(0.5)
+
+    async def coroutine_job():
+        calls['async'] += 1
+
+    scheduler = AsyncScheduler(runner=lambda func: (calls['wrapped'].append(func.__name__), func()))
+    scheduler.every(0.1, fast)
+    scheduler.every(0.2, blocking)
+    scheduler.every(0.15, coroutine_job)
+    scheduler.daily("04:00", fast, name='daily')
+
+    async def run():
+        asyncio.get_running_loop().call_later(0.75, scheduler.stop)
+        await scheduler.run()
+
+    started = time.monotonic()
+    asyncio.run(run())
+    # Дожидаемся задач, уже выполняющихся в пуле потоков
+    assert time.monotonic() - started < 2
+
+    assert 5 <= len(calls['fast']) <= 8, calls['fast']
+    gaps = [b - a for a, b in zip(calls['fast'], calls['fast'][1:])]
+    assert max(gaps) < 0.3, gaps
+    assert calls['async'] >= 3
+    assert 'blocking' in calls['wrapped'] and 'coroutine_job' not in calls['wrapped']
+    # Пробуждения только к срокам задач, а не каждые N мс
+    assert scheduler.wakeups <= len(calls['fast']) + calls['async'] + 4
+
+    print("✅ Асинхронный планировщик работает")
+
+def test_scheduler_next_run_and_stop():
+    """Ежедневные задачи, сон без задач и остановка из другого потока"""
+    print("🧪 Тест расписания и остановки...")
+    job = ScheduledJob('archive', lambda: None, at="04:00")
+    now = datetime(2026, 3, 1, 3, 59).timestamp()
+    job.schedule_next(now)
+    assert datetime.fromtimestamp(job.next_run) == datetime(2026, 3, 1, 4, 0)
+    job.schedule_next(job.next_run)
+    assert datetime.fromtimestamp(job.next_run) == datetime(2026, 3, 2, 4, 0)
+
+    scheduler = AsyncScheduler()
+    for bad in (lambda: scheduler.every(0, job.func), lambda: scheduler.daily("25:00", job.func)):
+        try:
+            bad()
+            assert False
+        except ValueError:
+            pass
+    assert scheduler.idle_seconds() is None
+
+    threading.Timer(0.2, scheduler.stop).start()
+    started = time.monotonic()
+    asyncio.run(scheduler.run())
+    assert time.monotonic() - started < 1 and scheduler.wakeups == 0
+
+    assert asyncio.run(offload(sum, [1, 2, 3])) == 6
+    print("✅ Расписание и остановка работают")
+
+def test_bot_handlers_offload_database():
+    """Обработчики бота обращаются к базе из пула потоков, а не из event loop"""
+    print("🧪 Тест обращений бота к базе...")
+    from types import SimpleNamespace
+    from telegram_bot import SteamRentalBot
+
+    calls = []
+
+    class RecordingDatabase:
+        def __getattr__(self, name):
+            def call(*args, **kwargs):
+                calls.append((name, threading.current_thread()))
+                return [] if name.endswith(('_list', '_rentals')) else 0
+            return call
+
+    bot = SteamRentalBot()
+    bot.db = RecordingDatabase()
+    replies = []
+
+    async def reply_text(text, **kwargs):
+        replies.append(text)
+
+    user = SimpleNamespace(id=1, username='user', first_name='Иван', last_name=None)
+    update = SimpleNamespace(effective_user=user, message=SimpleNamespace(reply_text=reply_text))
+
+    async def run():
+        loop_thread = threading.current_thread()
+        for handler in (bot.start_command, bot.status_command, bot.accounts_command, bot.rentals_command):
+            await handler(update, None)
+        return loop_thread
+
+    loop_thread = asyncio.run(run())
+    assert {name for name, _ in calls} >= {'add_user', 'get_total_accounts', 'get_available_accounts_list',
+                                           'get_user_rentals'}, calls
+    assert all(thread is not loop_thread for _, thread in calls), calls
+    assert len(replies) == 4
+    print("✅ Бот обращается к базе из пула потоков")
+
+if __name__ == '__main__':
+    test_scheduler_runs_jobs_without_polling()
+    test_scheduler_next_run_and_stop()
+    test_bot_handlers_offload_database()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест резервного копирования и восстановления базы
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from backup_manager import BackupManager
+
+def test_backup_and_restore():
+    """Копия создается во время записи, проходит проверку и восстанавливается"""
+    print("🧪 Тест резервного копирования...")
+    from database import Database
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, "steam_rental.db"))
+        for i in range(200):
+            db.add_account(f"user{i}", f"pass{i}", "CS2", 50.0, "x" * 200)
+
+        manager = BackupManager(db.db_path, os.path.join(tmp_dir, "backups"), pages_per_step=2, step_sleep=0.001)
+
+        # Параллельная запись не должна блокироваться копированием
+        stop = threading.Event()
+        written = []
+
+        def writer():
+            i = 0
+            while not stop.is_set():
+                if db.add_account(f"live{i}", "pass", "Dota 2", 50.0):
+                    written.append(i)
+                i += 1
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            result = manager.backup()
+        finally:
+            stop.set()
+            thread.join()
+
+        assert written, "Запись блокировалась во время копирования"
+        assert result['integrity'] == 'ok'
+        assert result['steps'] > 1
+        assert result['size_bytes'] < result['database_bytes']
+        assert manager.verify(result['path']) == 'ok'
+
+        restored_path = os.path.join(tmp_dir, "restored.db")
+        manager.restore(result['path'], restored_path)
+        with sqlite3.connect(restored_path) as conn:
+            restored = conn.execute("SELECT COUNT(*) FROM steam_accounts WHERE username LIKE 'user%'").fetchone()[0]
+        assert restored == 200
+
+    print("✅ Резервное копирование работает")
+
+def test_backup_retention():
+    """Хранятся последние копии по часам и по дням"""
+    print("🧪 Тест ротации копий...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        backup_dir = os.path.join(tmp_dir, "backups")
+        os.makedirs(backup_dir)
+        manager = BackupManager(os.path.join(tmp_dir, "steam_rental.db"), backup_dir, keep_hourly=3, keep_daily=2)
+
+        now = datetime(2026, 10, 19, 12, 30)
+        # Две копии в час за последние 3 дня
+        for minutes in range(0, 3 * 24 * 60, 30):
+            created = now - timedelta(minutes=minutes)
+            open(os.path.join(backup_dir, f"steam_rental_{created:%Y%m%d_%H%M%S}.db.gz"), 'wb').close()
+
+        manager.apply_retention(now)
+        kept = [created for created, _ in manager.list_backups()]
+        # 12:30, 11:30, 10:30 (часы) и 23:30 вчера (день)
+        assert kept == [now, now - timedelta(hours=1), now - timedelta(hours=2), datetime(2026, 10, 18, 23, 30)]
+
+    print("✅ Ротация копий работает")
+
+if __name__ == '__main__':
+    test_backup_and_restore()
+    test_backup_retention()
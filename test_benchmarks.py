@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест набора бенчмарков: синтетические данные, разбор FunPay, сравнение с базой
+"""
+
+import os
+import json
+import tempfile
+from benchmarks import (DatasetSpec, compare_results, generate_dataset, generate_orders_html,
+                        generate_reviews_html, main)
+
+def test_generate_dataset():
+    """Синтетический набор данных соответствует заданному размеру"""
+    print("🧪 Тест генератора данных...")
+    spec = DatasetSpec(accounts=50, games=5, rentals=200, reviews=20)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = generate_dataset(os.path.join(tmp_dir, "dataset.db"), spec)
+
+        assert db.get_total_accounts() == 50
+        assert db.get_active_rentals() == 10
+        assert len(db.get_available_accounts_list()) == 40
+        assert len(db.get_all_games()) == 5
+
+        # Аренда и завершение работают на сгенерированных данных
+        account_id = db.get_available_accounts_list()[0]['id']
+        assert db.create_rental(account_id, "bench_user", 3)
+        assert db.get_active_rentals() == 11
+
+    print("✅ Генератор данных работает")
+
+def test_funpay_parsing():
+    """Сгенерированные страницы FunPay разбираются полностью"""
+    print("🧪 Тест разбора страниц FunPay...")
+    from funpay_manager import parse_orders, parse_reviews
+
+    orders = parse_orders(generate_orders_html(25))
+    reviews = parse_reviews(generate_reviews_html(25))
+    assert len(orders) == 25 and orders[0]['id'] == "1"
+    assert len(reviews) == 25 and 1 <= reviews[0]['rating'] <= 5
+
+    print("✅ Разбор страниц FunPay работает")
+
+def test_compare_results():
+    """Замедление больше порога отмечается как регрессия"""
+    print("🧪 Тест сравнения с базой...")
+    baseline = {'results': {'lifecycle': {'create_rental': {'us_per_op': 100.0},
+                                          'get_detailed_stats': {'us_per_op': 100.0}}}}
+    current = {'lifecycle': {'create_rental': {'us_per_op': 150.0},
+                             'get_detailed_stats': {'us_per_op': 110.0},
+                             'new_case': {'us_per_op': 1.0}}}
+
+    regressions = compare_results(baseline, current, threshold=0.2)
+    assert [(item['benchmark'], item['case']) for item in regressions] == [('lifecycle', 'create_rental')]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "baseline.json")
+        assert main(['funpay_parsing', '--save', path]) == 0
+        with open(path, encoding='utf-8') as f:
+            saved = json.load(f)
+        assert 'parse_orders' in saved['results']['funpay_parsing']
+        assert main(['funpay_parsing', '--compare', path, '--threshold', '100']) == 0
+
+    print("✅ Сравнение с базой работает")
+
+if __name__ == '__main__':
+    test_generate_dataset()
+    test_funpay_parsing()
+    test_compare_results()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест пула браузеров (мессенджер - простой объект с интерфейсом FunPayMessenger)
+"""
+
+import time
+import threading
+from browser_pool import BrowserPool, ChatRateLimiter
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.heap = 10 * 2 ** 20
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("браузер не отвечает")
+        return self.heap if 'memory' in script else 'complete'
+
+class FakeMessenger:
+    def __init__(self, send_time=0.0):
+        self.driver = FakeDriver()
+        self.send_time = send_time
+        self.closed = False
+        self.sent = []
+
+    def send_message_to_order(self, order_id, message):
+        time.sleep(self.send_time)
+        self.sent.append((order_id, message, time.monotonic()))
+        return True
+
+    def close(self):
+        self.closed = True
+
+def make_pool(size=2, send_time=0.0, **kwargs):
+    created = []
+
+    def factory():
+        created.append(FakeMessenger(send_time))
+        return created[-1]
+    kwargs.setdefault('limiter', ChatRateLimiter(0))
+    return BrowserPool(size=size, factory=factory, login=None, **kwargs), created
+
+def test_pool_reuse_and_recycling():
+    """Браузер переиспользуется и пересоздается по числу задач, памяти, ошибке и проверке"""
+    print("🧪 Тест переиспользования браузеров...")
+    pool, created = make_pool(max_uses=3, max_memory_mb=100, idle_timeout=0)
+    for _ in range(2):
+        with pool.lease() as messenger:
+            assert messenger is created[0]
+    assert pool.stats()['created'] == 1 and pool.stats()['idle'] == 1
+
+    # Третья задача исчерпывает max_uses
+    with pool.lease():
+        pass
+    assert created[0].closed and pool.stats()['total'] == 0
+
+    # Рост памяти страницы
+    with pool.lease() as messenger:
+        messenger.driver.heap = 200 * 2 ** 20
+    assert messenger.closed
+
+    # Ошибка в задаче
+    try:
+        with pool.lease() as messenger:
+            raise RuntimeError("WebDriver упал")
+    except RuntimeError:
+        pass
+    assert messenger.closed
+
+    # Браузер, переставший отвечать, заменяется при выдаче
+    with pool.lease() as messenger:
+        pass
+    messenger.driver.alive = False
+    with pool.lease() as replacement:
+        assert replacement is not messenger
+    assert messenger.closed
+    assert pool.stats()['created'] == 5 and pool.stats()['recycled'] == 4
+    pool.close()
+    assert replacement.closed and pool.stats()['total'] == 0
+    print("✅ Переиспользование и пересоздание работают")
+
+def test_pool_limits_and_idle_eviction():
+    """Не больше size браузеров; простаивающие закрываются"""
+    print("🧪 Тест ограничения и простоя...")
+    pool, created = make_pool(size=1, idle_timeout=0.1)
+    release = threading.Event()
+
+    def hold():
+        with pool.lease():
+            release.wait(5)
+    holder = threading.Thread(target=hold)
+    holder.start()
+    time.sleep(0.05)
+    try:
+        with pool.lease(timeout=0.1):
+            assert False, "ожидается TimeoutError"
+    except TimeoutError:
+        pass
+    release.set()
+    holder.join()
+
+    deadline = time.monotonic() + 2
+    while pool.stats()['total'] and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert pool.stats()['total'] == 0 and pool.stats()['evicted'] == 1 and created[0].closed
+    with pool.lease() as messenger:
+        assert messenger is created[1]
+    pool.close()
+    print("✅ Ограничение и закрытие простаивающих работают")
+
+def test_send_bulk_fans_out():
+    """Массовая отправка идет параллельно, в один чат - не чаще интервала"""
+    print("🧪 Тест массовой отправки...")
+    pool, created = make_pool(size=3, send_time=0.2, idle_timeout=0)
+    started = time.monotonic()
+    results = pool.send_bulk([str(i) for i in range(6)], "Аренда {game}", game="CS2")
+    elapsed = time.monotonic() - started
+    assert results == {str(i): True for i in range(6)}
+    assert len(created) == 3 and 0.4 <= elapsed < 1.0, elapsed
+    assert all(message == "Аренда CS2" for messenger in created for _, message, _ in messenger.sent)
+
+    pool.limiter = ChatRateLimiter(0.3)
+    pool.send_bulk(["7", "7"], "Напоминание")
+    times = sorted(sent_at for messenger in created for order_id, _, sent_at in messenger.sent if order_id == "7")
+    assert times[1] - times[0] >= 0.25
+    pool.close()
+
+    # Единственный браузер занят: сообщения в один чат все равно разнесены на интервал
+    pool, created = make_pool(size=1, send_time=0.05, idle_timeout=0, limiter=ChatRateLimiter(0.5))
+    release = threading.Event()
+
+    def hold():
+        with pool.lease():
+            release.wait(5)
+    holder = threading.Thread(target=hold)
+    holder.start()
+    time.sleep(0.05)
+    threading.Timer(0.3, release.set).start()
+    assert pool.send_bulk(["9", "9"], "Напоминание") == {"9": True}
+    holder.join()
+    times = [sent_at for _, _, sent_at in created[0].sent]
+    assert len(times) == 2 and times[1] - times[0] >= 0.45, times
+    pool.close()
+    print("✅ Массовая отправка работает")
+
+def test_messenger_bulk_uses_pool():
+    """FunPayMessenger.send_bulk_messages отправляет через пул или по очереди с лимитом чата"""
+    print("🧪 Тест массовой отправки мессенджера...")
+    import logging
+    from funpay_messenger import FunPayMessenger
+
+    pool, created = make_pool(size=2, idle_timeout=0)
+    # Без Chrome: мессенджер без драйвера, отправка подменена
+    messenger = FunPayMessenger.__new__(FunPayMessenger)
+    messenger.logger = logging.getLogger(__name__)
+    messenger.chat_limiter = ChatRateLimiter(0.2)
+    sent = []
+    messenger.send_message_to_order = lambda order_id, message: sent.append((order_id, time.monotonic())) or True
+
+    assert messenger.send_bulk_messages(["1", "2"], "Аренда {game}", pool=pool, game="CS2") == {"1": True, "2": True}
+    assert not sent and sum(len(m.sent) for m in created) == 2
+    pool.close()
+
+    started = time.monotonic()
+    assert messenger.send_bulk_messages(["1", "2", "1"], "Привет") == {"1": True, "2": True}
+    # Разные чаты без пауз, повтор в чат 1 - через интервал
+    assert [order_id for order_id, _ in sent] == ["1", "2", "1"]
+    assert sent[1][1] - started < 0.1 and sent[2][1] - sent[0][1] >= 0.15
+    print("✅ Массовая отправка мессенджера работает")
+
+if __name__ == "__main__":
+    test_pool_reuse_and_recycling()
+    test_pool_limits_and_idle_eviction()
+    test_send_bulk_fans_out()
+    test_messenger_bulk_uses_pool()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест стратегий ожидания FunPayMessenger (драйвер - простой объект с тем же интерфейсом)
+"""
+
+import time
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from browser_waits import (ConditionWaits, FixedDelayWaits, NetworkIdle, create_waits, form_submitted,
+                           timed_action)
+
+class FakeElement:
+    def __init__(self, value="text"):
+        self.value = value
+        self.stale = False
+
+    def get_attribute(self, name):
+        if self.stale:
+            raise StaleElementReferenceException("stale")
+        return self.value
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        return True
+
+class FakeDriver:
+    """Страница готова через ready_after секунд, затем ресурсы догружаются еще resources_after секунд"""
+    def __init__(self, ready_after=0.2, resources_after=0.0):
+        self.ready_after = ready_after
+        self.resources_after = resources_after
+        self.loaded_at = None
+        self.element = FakeElement()
+        self.current_url = "about:blank"
+
+    def get(self, url):
+        self.current_url = url
+        self.loaded_at = time.monotonic()
+
+    def _elapsed(self):
+        return time.monotonic() - self.loaded_at
+
+    def execute_script(self, script):
+        ready = 'complete' if self._elapsed() >= self.ready_after else 'loading'
+        if 'performance' not in script:
+            return ready
+        # Пока идет догрузка, число ресурсов растет
+        resources = int(min(self._elapsed(), self.ready_after + self.resources_after) * 100)
+        return [ready, resources, 0]
+
+    def find_element(self, by, value):
+        if self._elapsed() < self.ready_after:
+            raise NoSuchElementException("not yet")
+        return self.element
+
+def test_condition_waits():
+    """Ожидание по условиям заканчивается, как только страница готова"""
+    print("🧪 Тест ожиданий по условиям...")
+    driver = FakeDriver(ready_after=0.2)
+    waits = ConditionWaits(driver, timeout=2, poll=0.01)
+
+    started = time.monotonic()
+    element = waits.page("http://stub/orders/1", (By.CSS_SELECTOR, "textarea"), delay=3)
+    elapsed = time.monotonic() - started
+    assert element is driver.element
+    assert 0.2 <= elapsed < 1.0, elapsed
+
+    # Без элемента страница ждет затишья сети
+    driver = FakeDriver(ready_after=0.05, resources_after=0.2)
+    waits = ConditionWaits(driver, timeout=2, poll=0.01)
+    started = time.monotonic()
+    assert waits.page("http://stub/chat") is None
+    elapsed = time.monotonic() - started
+    assert 0.25 + 0.1 <= elapsed < 1.5, elapsed
+
+    # Результат действия: дедлайн без исключения
+    assert waits.after(lambda d: True)
+    started = time.monotonic()
+    assert not waits.after(lambda d: False, timeout=0.1)
+    assert time.monotonic() - started < 0.5
+
+    try:
+        ConditionWaits(FakeDriver(ready_after=5), timeout=0.1, poll=0.01).page("http://stub", (By.NAME, "login"))
+        assert False, "ожидается TimeoutException"
+    except TimeoutException:
+        pass
+    print("✅ Ожидания по условиям работают")
+
+def test_network_idle_and_form():
+    """Затишье сети требует idle_time без новых ресурсов, форма - очистки или ухода поля"""
+    print("🧪 Тест условий сети и формы...")
+    driver = FakeDriver(ready_after=0.0, resources_after=0.0)
+    driver.get("http://stub")
+    idle = NetworkIdle(idle_time=0.05)
+    assert not idle(driver)
+    time.sleep(0.06)
+    assert idle(driver)
+
+    element = FakeElement("Данные аккаунта")
+    submitted = form_submitted(element)
+    assert not submitted(driver)
+    element.value = ""
+    assert submitted(driver)
+    element.value, element.stale = "text", True
+    assert submitted(driver)
+    print("✅ Условия сети и формы работают")
+
+def test_fixed_delays_and_report():
+    """fixed повторяет прежние паузы; время действий попадает в отчет"""
+    print("🧪 Тест фиксированных пауз и отчета...")
+    driver = FakeDriver(ready_after=0.0)
+    waits = create_waits(driver, 'fixed', timeout=1, poll=0.01)
+    assert isinstance(waits, FixedDelayWaits)
+
+    class Messenger:
+        def __init__(self, waits):
+            self.waits = waits
+
+        @timed_action('send_message')
+        def send(self):
+            self.waits.page("http://stub/orders/1", (By.CSS_SELECTOR, "textarea"), delay=0.1)
+            return self.waits.after(lambda d: False, delay=0.05)
+
+    messenger = Messenger(waits)
+    assert messenger.send() and messenger.send()
+    report = waits.report()['send_message']
+    assert report['count'] == 2 and report['avg_ms'] >= 150 and report['max_ms'] >= report['avg_ms']
+
+    assert isinstance(create_waits(driver, 'conditions'), ConditionWaits)
+    try:
+        create_waits(driver, 'sleepy')
+        assert False, "неизвестная стратегия должна вызывать ошибку"
+    except ValueError:
+        pass
+    print("✅ Фиксированные паузы и отчет работают")
+
+if __name__ == "__main__":
+    test_condition_waits()
+    test_network_idle_and_form()
+    test_fixed_delays_and_report()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест маршрутизатора callback-запросов
+"""
+
+import asyncio
+from callback_router import CallbackRouter, CallbackDataError
+
+def make_router(calls):
+    """Маршрутизатор с тестовыми обработчиками"""
+    router = CallbackRouter()
+
+    async def show_accounts(update, context):
+        calls.append(('show_accounts',))
+
+    async def rent_time(update, context, account_id, duration):
+        calls.append(('rent_time', account_id, duration))
+
+    async def broken(update, context):
+        raise RuntimeError("сбой обработчика")
+
+    router.register("acc", show_accounts, name="show_accounts", legacy="show_accounts")
+    router.register("rt", rent_time, (int, int), name="rent_time", legacy="rent_time")
+    router.register("err", broken, name="broken")
+    return router
+
+def test_encode_decode():
+    """Кодирование и разбор callback_data"""
+    print("🧪 Тест кодирования callback_data...")
+    router = make_router([])
+
+    data = router.encode("rt", 42, 3)
+    assert data == "1:rt:42:3"
+
+    route, args = router.decode(data)
+    assert route.name == "rent_time"
+    assert args == (42, 3)
+
+    # Старый формат кнопок из уже отправленных сообщений
+    route, args = router.decode("rent_time_42_3")
+    assert route.name == "rent_time" and args == (42, 3)
+    route, args = router.decode("show_accounts")
+    assert route.name == "show_accounts" and args == ()
+
+    for bad in ("", "1:rt:abc:3", "1:rt:42", "1:zz", "2:rt:42:3", "unknown_button"):
+        try:
+            router.decode(bad)
+        except CallbackDataError:
+            continue
+        raise AssertionError(f"callback_data не отклонены: {bad!r}")
+
+    print("✅ Кодирование и разбор работают")
+
+def test_dispatch_stats():
+    """Диспетчеризация и счетчики маршрутов"""
+    print("🧪 Тест диспетчеризации...")
+    calls = []
+    router = make_router(calls)
+
+    assert asyncio.run(router.dispatch("1:rt:7:24", None, None))
+    assert asyncio.run(router.dispatch("show_accounts", None, None))
+    assert not asyncio.run(router.dispatch("1:err", None, None))
+    assert not asyncio.run(router.dispatch("1:rt:x:1", None, None))
+
+    assert calls == [('rent_time', 7, 24), ('show_accounts',)]
+
+    stats = router.get_stats()
+    assert stats['routes']['rent_time']['calls'] == 1
+    assert stats['routes']['broken']['errors'] == 1
+    assert stats['invalid'] == 1
+
+    print("✅ Диспетчеризация и счетчики работают")
+
+if __name__ == '__main__':
+    test_encode_decode()
+    test_dispatch_stats()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест шины доменных событий
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from event_bus import (EventBus, AccountAdded, AccountDeleted, BonusGranted, PasswordRotated,
+                       RentalExpired, RentalStarted)
+
+def test_event_bus_delivery():
+    """Фильтр по типам, порядок, ограниченная очередь и изоляция ошибок"""
+    print("🧪 Тест доставки событий...")
+    bus = EventBus(maxsize=10)
+    rentals, everything = [], []
+    bus.subscribe(rentals.append, RentalStarted, RentalExpired, name='rentals')
+    bus.subscribe(everything.append, name='all')
+
+    def broken(event):
+        raise RuntimeError("boom")
+    failing = bus.subscribe(broken, AccountDeleted, name='broken')
+
+    assert bus.publish(AccountAdded(1, 'acc', 'CS2')) == 1
+    assert bus.publish(RentalExpired(7, 1, 'user')) == 2
+    assert bus.publish(AccountDeleted(1)) == 2
+    assert bus.wait_idle()
+    assert [event.name for event in rentals] == ['RentalExpired']
+    assert [event.name for event in everything] == ['AccountAdded', 'RentalExpired', 'AccountDeleted']
+    assert failing.errors == 1 and bus.stats()['all']['delivered'] == 3
+
+    # Медленный подписчик не блокирует издателя: лишние события отбрасываются
+    release = threading.Event()
+    slow = bus.subscribe(lambda event: release.wait(5), PasswordRotated, name='slow', maxsize=2)
+    accepted = [bus.publish(PasswordRotated(i)) for i in range(5)]
+    assert slow.dropped >= 2 and accepted.count(2) + slow.dropped == 5
+    release.set()
+    assert bus.wait_idle()
+
+    bus.close()
+    assert bus.stats() == {}
+    assert bus.publish(AccountDeleted(2)) == 0
+    print("✅ Доставка событий работает")
+
+def test_database_events_after_commit():
+    """Database публикует события после commit - подписчик видит изменения в базе"""
+    print("🧪 Тест событий базы данных...")
+    from database import Database
+
+    bus = EventBus()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, "steam_rental.db"), events=bus)
+        seen = []
+
+        def check_committed(event):
+            # Отдельное соединение: незафиксированные данные не видны
+            with sqlite3.connect(db.db_path) as conn:
+                if isinstance(event, RentalStarted):
+                    committed = conn.execute("SELECT is_rented FROM steam_accounts WHERE id = ?",
+                                             (event.account_id,)).fetchone()[0]
+                elif isinstance(event, RentalExpired):
+                    committed = conn.execute("SELECT status FROM rentals WHERE id = ?",
+                                             (event.rental_id,)).fetchone()[0] == 'completed'
+                else:
+                    committed = True
+            seen.append((event, committed))
+
+        bus.subscribe(check_committed)
+
+        account_id = db.add_steam_account("acc", "p", "CS2")
+        assert db.add_account("acc2", "p", "Dota 2", 70.0)
+        assert db.create_rental(account_id, "user_1", 2)
+        assert db.add_bonus_time("user_1", 30, "Отзыв")
+        with sqlite3.connect(db.db_path) as conn:
+            conn.execute("UPDATE rentals SET end_time = ?", (datetime.now() - timedelta(days=1),))
+        assert db.end_expired_rentals() == 1
+        # Удаление аккаунта удаляет и его аренды - подписчик должен успеть их прочитать
+        assert bus.wait_idle()
+        assert db.delete_account(account_id)
+        assert bus.wait_idle()
+
+        events = [event for event, _ in seen]
+        assert [event.name for event in events] == [
+            'AccountAdded', 'AccountAdded', 'RentalStarted', 'BonusGranted', 'RentalExpired', 'AccountDeleted'
+        ]
+        assert all(committed for _, committed in seen)
+        started, bonus, expired = events[2], events[3], events[4]
+        assert (started.account_id, started.user_id, started.game_name, started.duration_hours) == \
+            (account_id, 'user_1', 'CS2', 2)
+        assert isinstance(bonus, BonusGranted) and bonus.rental_id == started.rental_id == expired.rental_id
+        assert events[1].username == 'acc2' and events[5].account_id == account_id
+
+        # Неудачные операции событий не публикуют
+        assert not db.create_rental(999, "user_2", 1)
+        assert not db.delete_account(999)
+        assert bus.wait_idle() and len(seen) == 6
+    bus.close()
+    print("✅ События базы данных работают")
+
+if __name__ == '__main__':
+    test_event_bus_delivery()
+    test_database_events_after_commit()
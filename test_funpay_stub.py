@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест FunPayManager на локальном двойнике FunPay
+"""
+
+import requests
+from funpay_stub_server import FunPayStubServer, StubSettings
+from funpay_manager import FunPayManager
+
+def make_manager(stub):
+    """Менеджер, направленный на двойник, без пауз между повторами"""
+    manager = FunPayManager()
+    manager.base_url = stub.url
+    manager.RETRY_BACKOFF = 0
+    return manager
+
+def test_stub_flows():
+    """Вход, заказы, отзывы, сообщения и объявления через двойник"""
+    print("🧪 Тест двойника FunPay...")
+    with FunPayStubServer(settings=StubSettings(orders=30, reviews=10)) as stub:
+        manager = make_manager(stub)
+        assert manager.login_to_funpay()
+        assert manager.is_logged_in
+
+        assert len(manager.get_orders()) == 30
+        assert len(manager.get_reviews()) == 10
+        assert all(order['game_name'] for order in manager.check_new_orders())
+
+        assert manager.send_message("7", "Данные аккаунта")
+        assert stub.state.messages == [{'order_id': "7", 'message': "Данные аккаунта"}]
+        assert manager.update_listing("15", {'price': "99"})
+        assert stub.state.updated_listings["15"] == {'price': "99"}
+        assert manager.delete_listing("15")
+        assert stub.state.deleted_listings == ["15"]
+
+        # Форма создания объявления переводит на страницу объявления
+        created = manager.session.post(f"{stub.url}/account/sells/add", data={'_token': stub.csrf_token}, timeout=5)
+        assert created.url == f"{stub.url}/account/sells/1001" and stub.state.created_listings == 1
+
+        stats = requests.get(f"{stub.url}/__stub__/stats", timeout=5).json()
+        assert stats['requests']['GET /account/orders/:id/chat'] == 1
+        manager.close()
+
+    print("✅ Двойник FunPay работает")
+
+def test_stub_retries_and_csrf():
+    """Повторы при 503 и сброс сессии при отказе CSRF (419)"""
+    print("🧪 Тест повторов и 419...")
+    with FunPayStubServer() as stub:
+        manager = make_manager(stub)
+        assert manager.login_to_funpay()
+
+        # GET повторяется до успешного ответа
+        stub.fail_next("/account/orders", 503, count=2)
+        assert len(manager.get_orders()) == 50
+        assert stub.state.injected_errors == 2
+
+        # После исчерпания повторов запрос завершается ошибкой
+        stub.fail_next("/account/orders", 503, count=manager.REQUEST_RETRIES + 1)
+        assert manager.get_orders() == []
+
+        # POST с отказом CSRF не повторяется, сессия сбрасывается
+        stub.fail_next("/account/orders/3/send", 419)
+        assert not manager.send_message("3", "привет")
+        assert not manager.is_logged_in and 'golden_key' not in manager.session.cookies
+        assert stub.state.messages == []
+
+        # Следующая операция выполняет вход заново
+        assert manager.send_message("3", "привет")
+        assert stub.state.logins == 2
+
+        # Настройка на лету через управляющий эндпоинт
+        response = requests.post(f"{stub.url}/__stub__/config", json={'orders': 5}, timeout=5)
+        assert response.status_code == 200
+        assert len(manager.get_orders()) == 5
+        manager.close()
+
+    print("✅ Повторы и 419 работают")
+
+if __name__ == '__main__':
+    test_stub_flows()
+    test_stub_retries_and_csrf()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест исполнителя задач: приоритеты, один экземпляр задачи, таймауты, пропуски
+"""
+
+import time
+import asyncio
+import threading
+from async_runtime import ScheduledJob
+from job_executor import JobExecutor, Misfire, Priority
+
+def _job(name, func, **options):
+    return ScheduledJob(name, func, interval=60, **options)
+
+def test_job_executor_priorities_and_overlap():
+    """Очередь по приоритету, повторный запуск выполняющейся задачи пропускается или сворачивается"""
+    print("🧪 Тест приоритетов и перекрытий задач...")
+    order = []
+    release = threading.Event()
+
+    async def scenario():
+        executor = JobExecutor(workers=1)
+        await executor.start()
+
+        blocker = _job('blocker', lambda: release.wait(5))
+        expiry = _job('expiry', lambda: order.append('expiry'), priority=Priority.CRITICAL,
+                      misfire=Misfire.COALESCE)
+        orders = _job('orders', lambda: order.append('orders'), priority=Priority.HIGH)
+        stats = _job('stats', lambda: order.append('stats'), priority=Priority.LOW)
+
+        assert executor.submit(blocker)
+        await asyncio.sleep(0.05)
+        assert executor.running() == ['blocker']
+        # Единственный слот занят - очередь упорядочивается по приоритету
+        for job in (stats, orders, expiry):
+            assert executor.submit(job)
+        # Уже поставленные в очередь задачи не дублируются
+        assert not executor.submit(stats)
+        assert not executor.submit(blocker)
+        assert not executor.submit(expiry)
+        await asyncio.sleep(0.1)
+        release.set()
+
+        for _ in range(100):
+            if len(order) == 4:
+                break
+            await asyncio.sleep(0.02)
+        await executor.stop()
+        return executor
+
+    executor = asyncio.run(scenario())
+    # Свернутый повтор expiry сохраняет приоритет и обгоняет остальные
+    assert order == ['expiry', 'expiry', 'orders', 'stats'], order
+    stats = executor.stats()
+    assert stats['stats']['runs'] == {'ok': 1, 'skipped': 1}
+    assert stats['blocker']['runs'] == {'ok': 1, 'skipped': 1}
+    assert stats['expiry']['runs'] == {'coalesced': 1, 'ok': 2}
+    assert stats['stats']['last_lag'] >= 0.05 and stats['blocker']['last_duration'] >= 0.05
+
+    print("✅ Приоритеты и перекрытия работают")
+
+def test_job_executor_timeouts_and_misfire():
+    """Таймаут освобождает слот, опоздавший запуск SKIP-задачи пропускается"""
+    print("🧪 Тест таймаутов и опозданий...")
+    done = []
+
+    async def slow_coroutine():
+        await asyncio.sleep(5)
+
+    async def scenario():
+        executor = JobExecutor(workers=1)
+        await executor.start()
+        started = time.monotonic()
+
+        executor.submit(_job('slow_sync', lambda: time.sleep(0.4), timeout=0.1))
+        executor.submit(_job('fast', lambda: done.append(time.monotonic() - started)))
+        executor.submit(_job('slow_async', slow_coroutine, timeout=0.1))
+        executor.submit(_job('late', lambda: done.append('late'), misfire_grace=1), time.time() - 10)
+        await asyncio.sleep(0.3)
+        # Поток еще работает - новый запуск не начинается
+        assert 'slow_sync' in executor.running()
+        assert not executor.submit(_job('slow_sync', lambda: None))
+        await executor.stop()
+        return executor
+
+    executor = asyncio.run(scenario())
+    assert len(done) == 1 and done[0] < 0.3, done
+    stats = executor.stats()
+    assert stats['slow_sync']['runs'] == {'timeout': 1, 'skipped': 1}
+    assert stats['slow_sync']['last_duration'] >= 0.4
+    assert stats['slow_async']['runs'] == {'timeout': 1}
+    assert stats['late']['runs'] == {'skipped': 1}
+
+    print("✅ Таймауты и опоздания работают")
+
+if __name__ == '__main__':
+    test_job_executor_priorities_and_overlap()
+    test_job_executor_timeouts_and_misfire()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест очереди отложенных задач delayed_jobs
+"""
+
+import os
+import time
+import tempfile
+import threading
+from job_queue import JobQueue
+
+def test_job_queue_claim_retry_dead_letter():
+    """Срок запуска, дедупликация, блокировка на время обработки, повторы и dead letter"""
+    print("🧪 Тест очереди отложенных задач...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "steam_rental.db")
+        queue = JobQueue(db_path, visibility_timeout=0.2, max_attempts=2, retry_delay=0.05, worker_id='w1')
+
+        first = queue.enqueue('rotate_password', {'account_id': 1}, dedupe_key='rotate_password:1')
+        assert first and queue.enqueue('rotate_password', {'account_id': 1}, dedupe_key='rotate_password:1') is None
+        queue.enqueue('review_reminder', {'order_id': 'A'}, delay=60)
+        assert queue.stats() == {'ready': 1, 'delayed': 1, 'in_flight': 0, 'dead': 0}
+
+        # Захваченная задача не видна другим обработчикам до истечения блокировки
+        [job] = queue.claim(10)
+        assert (job.id, job.kind, job.payload, job.attempts) == (first, 'rotate_password', {'account_id': 1}, 1)
+        other = JobQueue(db_path, visibility_timeout=0.2, worker_id='w2')
+        assert other.claim(10) == []
+        time.sleep(0.25)
+        [reclaimed] = other.claim(10)
+        assert reclaimed.id == first and reclaimed.attempts == 2
+        # Первый обработчик уже не держит задачу
+        assert queue.complete([first]) == 0
+        assert other.complete([first]) == 1
+
+        # Ошибки: повтор с паузой, затем dead letter
+        calls = []
+
+        def flaky(payload):
+            calls.append(payload['n'])
+            raise RuntimeError("Steam недоступен")
+
+        queue.enqueue('flaky', {'n': 1})
+        queue.enqueue('unknown', {})
+        assert queue.process({'flaky': flaky}) == {'done': 0, 'retry': 2, 'dead': 0}
+        assert queue.process({'flaky': flaky}) == {'done': 0, 'retry': 0, 'dead': 0}
+        time.sleep(0.06)
+        assert queue.process({'flaky': flaky}) == {'done': 0, 'retry': 0, 'dead': 2}
+        assert calls == [1, 1]
+        dead = {item['kind']: item for item in queue.dead_letters()}
+        assert dead['flaky']['last_error'] == "Steam недоступен" and dead['flaky']['attempts'] == 2
+        assert 'unknown' in dead['unknown']['last_error']
+
+        assert queue.requeue_dead(dead['flaky']['id'])
+        assert queue.process({'flaky': lambda payload: True}) == {'done': 1, 'retry': 0, 'dead': 0}
+        assert queue.stats() == {'ready': 0, 'delayed': 1, 'in_flight': 0, 'dead': 1}
+
+    print("✅ Очередь отложенных задач работает")
+
+def test_job_queue_concurrent_claims():
+    """Параллельные обработчики не получают одну задачу дважды"""
+    print("🧪 Тест параллельного захвата задач...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "steam_rental.db")
+        assert JobQueue(db_path).enqueue_many({'kind': 'n', 'payload': {'n': i}} for i in range(2000)) == 2000
+
+        seen = []
+
+        def worker(name):
+            queue = JobQueue(db_path, worker_id=name)
+            while True:
+                jobs = queue.claim(25)
+                if not jobs:
+                    return
+                seen.extend(job.payload['n'] for job in jobs)
+                queue.complete(job.id for job in jobs)
+
+        threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(seen) == list(range(2000))
+
+    print("✅ Параллельный захват задач работает")
+
+def test_system_rotates_password_through_queue():
+    """Истекшая аренда ставит смену пароля в очередь, задача выполняется планировщиком"""
+    print("🧪 Тест смены пароля через очередь...")
+    from steam_rental_system import SteamRentalSystem
+    from event_bus import RentalExpired
+
+    class FakeSteam:
+        def generate_password(self):
+            return "new_password"
+
+        def change_steam_password(self, username, old_password, new_password):
+            return old_password == "old_password"
+
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            system = SteamRentalSystem()
+            system.steam_manager = FakeSteam()
+            account_id = system.db.add_steam_account("acc", "old_password", "CS2")
+
+            system.schedule_password_rotation(RentalExpired(1, account_id, "order_1"))
+            system.schedule_password_rotation(RentalExpired(2, account_id, "order_2"))
+            assert system.job_queue.stats()['delayed'] == 1
+
+            # Срок наступил
+            with system.db.connect() as conn:
+                conn.execute("UPDATE delayed_jobs SET run_at = 0")
+            system.process_delayed_jobs()
+            assert system.db.get_account(account_id)['password'] == "new_password"
+            assert system.job_queue.stats() == {'ready': 0, 'delayed': 0, 'in_flight': 0, 'dead': 0}
+            system.funpay_manager.close()
+        finally:
+            os.chdir(previous_cwd)
+
+    print("✅ Смена пароля через очередь работает")
+
+if __name__ == '__main__':
+    test_job_queue_claim_retry_dead_letter()
+    test_job_queue_concurrent_claims()
+    test_system_rotates_password_through_queue()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест аренды лидерства между процессами
+"""
+
+import os
+import time
+import asyncio
+import sqlite3
+import tempfile
+import threading
+from leader_lease import LeaderLease, LeaseLostError
+from async_runtime import AsyncScheduler
+
+def test_leader_lease_takeover():
+    """Одна аренда на всех, передача при освобождении и истечении, рост fencing token"""
+    print("🧪 Тест аренды лидерства...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "steam_rental.db")
+        first = LeaderLease(db_path, ttl=0.3, holder='replica-1')
+        second = LeaderLease(db_path, ttl=0.3, holder='replica-2')
+
+        assert first.acquire() == 1 and first.is_leader
+        assert second.acquire() is None and not second.is_leader
+        # Продление сохраняет token
+        assert first.acquire() == 1
+        first.verify()
+        with sqlite3.connect(db_path) as conn:
+            first.verify(conn)
+
+        # Лидер перестал продлевать - аренда переходит после ttl
+        time.sleep(0.35)
+        assert not first.is_leader
+        assert second.acquire() == 2
+        assert first.acquire() is None
+        for check in (first.verify, lambda: LeaderLease(db_path, holder='replica-1').verify()):
+            try:
+                check()
+                assert False
+            except LeaseLostError:
+                pass
+        assert second.current()['holder'] == 'replica-2'
+
+        # Освобождение передает аренду сразу
+        second.release()
+        assert not second.is_leader and second.current()['expired']
+        assert first.acquire() == 3
+
+        # Одновременный захват: лидер ровно один
+        contenders = [LeaderLease(db_path, name='race', holder=f'r{i}') for i in range(8)]
+        tokens = []
+        threads = [threading.Thread(target=lambda lease=lease: tokens.append(lease.acquire())) for lease in contenders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(tokens, key=lambda token: token is None) == [1] + [None] * 7
+
+    print("✅ Аренда лидерства работает")
+
+def test_scheduler_runs_only_on_leader():
+    """Задачи планировщика выполняет только держатель аренды"""
+    print("🧪 Тест планировщика у лидера...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "steam_rental.db")
+        runs = []
+        schedulers = []
+        for holder in ('replica-1', 'replica-2'):
+            lease = LeaderLease(db_path, holder=holder)
+            lease.acquire()
+            scheduler = AsyncScheduler(runner=lambda job, lease=lease: (lease.verify(), job()),
+                                       gate=lambda lease=lease: lease.is_leader)
+            scheduler.every(0.05, lambda holder=holder: runs.append(holder), name='tick')
+            schedulers.append(scheduler)
+
+        async def run_all():
+            asyncio.get_running_loop().call_later(0.4, lambda: [s.stop() for s in schedulers])
+            await asyncio.gather(*(s.run() for s in schedulers))
+        asyncio.run(run_all())
+
+        assert runs and set(runs) == {'replica-1'}
+        assert schedulers[1].jobs[0].runs == 0
+
+    print("✅ Планировщик работает только у лидера")
+
+if __name__ == '__main__':
+    test_leader_lease_takeover()
+    test_scheduler_runs_only_on_leader()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест метрик и эндпоинта /metrics
+"""
+
+from metrics import Counter, Gauge, Histogram, Registry, timed
+
+def test_metrics_render():
+    """Счетчики, gauge и гистограммы в текстовом формате"""
+    print("🧪 Тест метрик...")
+    registry = Registry()
+    runs = Counter('test_runs', 'Запуски', ('job',), registry=registry)
+    queue = Gauge('test_queue', 'Очередь', registry=registry)
+    latency = Histogram('test_latency_seconds', 'Задержка', ('job',), buckets=(0.1, 1.0), registry=registry)
+
+    runs.labels('sync').inc()
+    runs.labels('sync').inc(2)
+    queue.set(5)
+    queue.dec()
+    latency.labels('sync').observe(0.05)
+    latency.labels('sync').observe(0.5)
+    latency.labels('sync').observe(5)
+
+    @timed(latency, 'decorated')
+    def work():
+        return 42
+
+    assert work() == 42
+
+    text = registry.render()
+    assert '# TYPE test_runs counter' in text
+    assert 'test_runs_total{job="sync"} 3' in text
+    assert 'test_queue 4' in text
+    assert 'test_latency_seconds_bucket{job="sync",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{job="sync",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{job="sync",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{job="sync"} 3' in text
+    assert 'test_latency_seconds_count{job="decorated"} 1' in text
+
+    try:
+        runs.inc()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Счетчик с метками увеличен без меток")
+
+    print("✅ Метрики работают")
+
+def test_metrics_endpoint():
+    """/metrics отдает метрики БД, FunPay и готовности компонентов"""
+    print("🧪 Тест /metrics...")
+    import main
+    import database
+    from funpay_manager import normalize_endpoint
+
+    assert normalize_endpoint("https://funpay.com/account/orders/123/chat") == "/account/orders/:id/chat"
+
+    response = main.app.test_client().get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    text = response.get_data(as_text=True)
+    assert 'steam_rental_component_ready{component="bot"}' in text
+    assert '# TYPE steam_rental_db_operation_seconds histogram' in text
+
+    print("✅ /metrics работает")
+
+if __name__ == '__main__':
+    test_metrics_render()
+    test_metrics_endpoint()
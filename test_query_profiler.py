@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест профилировщика SQL-запросов
+"""
+
+import os
+import json
+import tempfile
+
+def test_fingerprint():
+    """Литералы и списки IN сворачиваются в один отпечаток"""
+    print("🧪 Тест отпечатков запросов...")
+    from query_profiler import fingerprint
+
+    assert fingerprint("SELECT * FROM rentals WHERE id = 5 AND status = 'active'") == \
+        "SELECT * FROM rentals WHERE id = ? AND status = ?"
+    assert fingerprint("SELECT 1 FROM t WHERE id IN (?, ?, ?)") == fingerprint("SELECT 1  FROM t WHERE id IN (?,?)")
+
+    print("✅ Отпечатки работают")
+
+def test_profiled_database():
+    """Запросы Database попадают в агрегат с вызывающим методом и числом строк"""
+    print("🧪 Тест профилирования Database...")
+    from database import Database
+    from query_profiler import profiler, main
+
+    previous = profiler.enabled
+    profiler.enabled = True
+    profiler.reset()
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(os.path.join(tmp_dir, "profile.db"))
+            db.add_account("user1", "pass1", "CS2", 10.0)
+            db.add_account("user2", "pass2", "CS2", 10.0)
+            assert len(db.get_all_accounts()) == 2
+            assert len(db.get_all_accounts()) == 2
+
+            top = profiler.top(limit=100, sort='calls')
+            select = next(item for item in top if item['query'].startswith("SELECT") and "steam_accounts" in item['query']
+                          and any(caller.startswith("Database.get_all_accounts") for caller in item['callers']))
+            assert select['calls'] == 2
+            assert select['rows'] == 4
+
+            snapshot_path = os.path.join(tmp_dir, "query_profile.json")
+            profiler.save(snapshot_path)
+            with open(snapshot_path, encoding='utf-8') as f:
+                assert json.load(f)['total_calls'] > 0
+            assert main(['report', '--file', snapshot_path, '--top', '3']) == 0
+    finally:
+        profiler.enabled = previous
+        profiler.reset()
+
+    print("✅ Профилирование Database работает")
+
+def test_admin_queries_endpoint():
+    """/admin/queries доступен только с токеном администратора"""
+    print("🧪 Тест /admin/queries...")
+    import main
+
+    client = main.app.test_client()
+    previous = os.environ.pop('ADMIN_API_TOKEN', None)
+    try:
+        assert client.get("/admin/queries").status_code == 403
+        os.environ['ADMIN_API_TOKEN'] = "secret"
+        assert client.get("/admin/queries", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        response = client.get("/admin/queries", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        assert 'queries' in response.get_json()
+    finally:
+        os.environ.pop('ADMIN_API_TOKEN', None)
+        if previous is not None:
+            os.environ['ADMIN_API_TOKEN'] = previous
+
+    print("✅ /admin/queries работает")
+
+if __name__ == '__main__':
+    test_fingerprint()
+    test_profiled_database()
+    test_admin_queries_endpoint()
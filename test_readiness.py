@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест готовности компонентов и эндпоинтов /health и /ready
+"""
+
+from readiness import Readiness
+
+def test_readiness():
+    """Компоненты сообщают о готовности, профиль запуска заполняется"""
+    print("🧪 Тест готовности компонентов...")
+    readiness = Readiness()
+    readiness.register(("database", "bot"))
+
+    with readiness.phase("import_bot"):
+        pass
+
+    assert not readiness.is_ready()
+    readiness.mark_ready("database")
+    assert readiness.is_ready("database")
+    assert not readiness.wait("bot", timeout=0.01)
+
+    readiness.mark_failed("bot", RuntimeError("нет токена"))
+    snapshot = readiness.snapshot()
+    assert not snapshot['ready']
+    assert snapshot['components']['bot'] == {
+        'status': 'failed',
+        'after_seconds': snapshot['components']['bot']['after_seconds'],
+        'error': 'нет токена'
+    }
+    assert snapshot['boot']['cold_start_to_ready_seconds'] is not None
+    assert "import_bot" in snapshot['boot']['phases']
+
+    print("✅ Готовность компонентов работает")
+
+def test_health_endpoints():
+    """/health отвечает сразу, /ready - 503 до запуска компонентов"""
+    print("🧪 Тест /health и /ready...")
+    import main
+
+    client = main.app.test_client()
+    health = client.get("/health")
+    assert health.status_code == 200
+    assert set(health.get_json()['components']) == set(main.COMPONENTS)
+
+    assert client.get("/ready").status_code == 503
+    for name in main.COMPONENTS:
+        main.readiness.mark_ready(name)
+    assert client.get("/ready").status_code == 200
+
+    print("✅ /health и /ready работают")
+
+if __name__ == '__main__':
+    test_readiness()
+    test_health_endpoints()
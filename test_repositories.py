@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест репозиториев: одинаковое поведение хранилищ sqlite и memory
+"""
+
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from event_bus import EventBus, BonusGranted, RentalStarted
+from repositories import BACKENDS, create_repositories
+
+@contextmanager
+def open_repositories(backend, bus):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        yield create_repositories(backend, db_path=os.path.join(tmp_dir, "steam_rental.db"), events=bus)
+
+def expire_rental(repos, rental_id):
+    """Перевод конца аренды в прошлое"""
+    past = datetime.now() - timedelta(minutes=1)
+    if repos.backend == 'memory':
+        repos.rentals.store.rentals[rental_id]['end_time'] = past
+    else:
+        with sqlite3.connect(repos.rentals.db.db_path) as conn:
+            conn.execute("UPDATE rentals SET end_time = ? WHERE id = ?", (past, rental_id))
+
+def check_contract(backend):
+    bus = EventBus()
+    events = []
+    bus.subscribe(events.append, name='test')
+    with open_repositories(backend, bus) as repos:
+        assert repos.backend == backend
+        if backend == 'sqlite':
+            # SettingsManager (ключ шифрования, настройки по умолчанию) создается только по требованию
+            assert repos.settings._manager is None
+
+        # Аккаунты
+        first = repos.accounts.add('acc1', 'pass1', 'CS2', price=40.0)
+        second = repos.accounts.add('acc2', 'pass2', 'Dota 2')
+        assert first and second and first != second
+        assert repos.accounts.add('acc1', 'other', 'CS2') is None
+        account = repos.accounts.get(first)
+        assert account == {'id': first, 'username': 'acc1', 'password': 'pass1', 'game_name': 'CS2',
+                           'price': 40.0, 'description': '', 'is_rented': False}
+        assert repos.accounts.get(999) is None
+        assert [acc['id'] for acc in repos.accounts.list_all()] == [second, first]
+        assert [acc['id'] for acc in repos.accounts.list_available('CS2')] == [first]
+        assert repos.accounts.count() == 2
+        assert repos.accounts.update_password(first, 'new-pass')
+        assert repos.accounts.get(first)['password'] == 'new-pass'
+        assert not repos.accounts.update_password(999, 'x')
+
+        # Пользователи
+        repos.users.add('user1', 'nick', 'Имя')
+        repos.users.add('user1', 'other')
+        assert repos.users.get('user1') == {'telegram_id': 'user1', 'username': 'nick',
+                                            'first_name': 'Имя', 'last_name': None}
+        assert repos.users.get('nobody') is None and repos.users.count() == 1
+
+        # Аренды
+        rental_id = repos.rentals.start(first, 'user1', 2, price=80.0, order_id='order-1')
+        assert rental_id and repos.rentals.start(first, 'user2', 1) is None
+        assert repos.rentals.start(999, 'user2', 1) is None
+        assert repos.accounts.get(first)['is_rented'] and not repos.accounts.delete(first)
+        assert repos.accounts.list_available() == [repos.accounts.get(second)]
+        assert repos.rentals.get_renter(rental_id) == 'user1' and repos.rentals.get_renter(999) is None
+        active = repos.rentals.list_active('user1')
+        assert [(r['id'], r['account_id'], r['game_name'], r['status']) for r in active] == \
+            [(rental_id, first, 'CS2', 'active')]
+        assert repos.rentals.count_active() == 1
+        assert repos.rentals.expire_due() == 0
+
+        # Бонусы продлевают активную аренду
+        end_before = datetime.fromisoformat(active[0]['end_time'])
+        assert repos.bonuses.grant('user1', 30, 'Положительный отзыв')
+        end_after = datetime.fromisoformat(repos.rentals.list_active('user1')[0]['end_time'])
+        assert end_after - end_before == timedelta(minutes=30)
+        assert repos.bonuses.total_minutes('user1') == 30
+        assert [(b['bonus_minutes'], b['reason'], b['is_used']) for b in repos.bonuses.list('user1')] == \
+            [(30, 'Положительный отзыв', False)]
+        assert repos.bonuses.total_minutes('user2') == 0
+
+        # Завершение аренды освобождает аккаунт
+        expire_rental(repos, rental_id)
+        assert repos.rentals.expire_due() == 1 and repos.rentals.count_active() == 0
+        assert not repos.accounts.get(first)['is_rented'] and repos.rentals.list_active('user1') == []
+        assert repos.accounts.delete(first) and repos.accounts.get(first) is None
+        assert repos.accounts.count() == 1
+
+        # Настройки
+        assert repos.settings.get('funpay', 'missing', 'default') == 'default'
+        assert repos.settings.set('funpay', 'golden_key', 'secret')
+        assert repos.settings.get('funpay', 'golden_key') == 'secret'
+        assert repos.settings.get_category('funpay')['golden_key'] == 'secret'
+
+        assert bus.wait_idle()
+    bus.close()
+    names = [event.name for event in events]
+    assert names.count('AccountAdded') == 2 and names.count('PasswordRotated') == 1
+    assert names.count('RentalStarted') == 1 and names.count('RentalExpired') == 1
+    assert names.count('BonusGranted') == 1 and names.count('AccountDeleted') == 1
+    started = next(event for event in events if isinstance(event, RentalStarted))
+    assert (started.rental_id, started.user_id, started.game_name, started.duration_hours) == \
+        (rental_id, 'user1', 'CS2', 2)
+    bonus = next(event for event in events if isinstance(event, BonusGranted))
+    assert bonus.rental_id == rental_id
+
+def test_repositories_contract():
+    """Оба хранилища проходят один и тот же набор проверок"""
+    print("🧪 Тест контракта репозиториев...")
+    for backend in BACKENDS:
+        check_contract(backend)
+        print(f"  ✅ {backend}")
+    try:
+        create_repositories('postgres')
+        assert False, "неизвестное хранилище должно вызывать ошибку"
+    except ValueError:
+        pass
+    print("✅ Репозитории ведут себя одинаково")
+
+def test_system_uses_memory_backend():
+    """SteamRentalSystem выдает заказ и завершает аренду через репозитории в памяти"""
+    print("🧪 Тест системы с хранилищем в памяти...")
+    from config import Config
+    from steam_rental_system import SteamRentalSystem
+
+    previous_backend, previous_dir = Config.STORAGE_BACKEND, os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        Config.STORAGE_BACKEND = 'memory'
+        try:
+            system = SteamRentalSystem()
+            assert system.repos.backend == 'memory'
+            account_id = system.repos.accounts.add('mem_acc', 'mem_pass', 'CS2')
+            delivered = []
+            system.funpay_manager.process_order = lambda order_id, data: delivered.append(data) or True
+            system.process_new_order({'id': 'order-7', 'game_name': 'CS2', 'duration': '2 часа', 'price': '100 ₽'})
+            assert delivered and delivered[0]['password'] == 'mem_pass'
+            assert system.repos.accounts.get(account_id)['is_rented']
+            with sqlite3.connect(system.db.db_path) as conn:
+                assert conn.execute("SELECT COUNT(*) FROM rentals").fetchone()[0] == 0
+
+            rental = system.repos.rentals.list_active('order-7')[0]
+            expire_rental(system.repos, rental['id'])
+            system.check_expired_rentals()
+            assert not system.repos.accounts.get(account_id)['is_rented']
+
+            # Ошибка задачи доходит до исполнителя (метрики steam_rental_job_runs{status="error"})
+            def broken():
+                raise RuntimeError("база недоступна")
+            system.repos.rentals.expire_due = broken
+            try:
+                system.check_expired_rentals()
+                assert False, "ошибка должна пробрасываться"
+            except RuntimeError:
+                pass
+        finally:
+            Config.STORAGE_BACKEND = previous_backend
+            os.chdir(previous_dir)
+    print("✅ Система работает с хранилищем в памяти")
+
+if __name__ == "__main__":
+    test_repositories_contract()
+    test_system_uses_memory_backend()
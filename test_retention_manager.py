@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест архивирования старой истории
+"""
+
+import os
+import sqlite3
+import tempfile
+from retention_manager import RetentionManager, RetentionPolicy, parse_overrides
+
+def test_retention_archives_old_rows():
+    """Старые строки переносятся в архив порциями, свежие и непрочитанные остаются"""
+    print("🧪 Тест архивирования истории...")
+    from database import Database
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, "steam_rental.db"))
+        with sqlite3.connect(db.db_path) as conn:
+            conn.executemany(
+                "INSERT INTO operation_history (user_id, operation_type, description, created_at) "
+                "VALUES (1, 'rent', ?, datetime('now', ?))",
+                [("x" * 500, f"-{days} days") for days in range(200)]
+            )
+            conn.executemany(
+                "INSERT INTO notifications (user_id, message, type, is_read, created_at) "
+                "VALUES (1, 'msg', 'info', ?, datetime('now', '-60 days'))",
+                [(True,), (False,)]
+            )
+
+        archive_path = os.path.join(tmp_dir, "archive.db")
+        policies = [
+            RetentionPolicy('operation_history', 'created_at', 90),
+            RetentionPolicy('notifications', 'created_at', 30, condition='is_read = TRUE'),
+            RetentionPolicy('account_history', 'timestamp', 180),
+        ]
+        manager = RetentionManager(db.db_path, policies, archive_path, batch_size=25, batch_pause=0)
+        assert manager.eligible_rows() == {'operation_history': 109, 'notifications': 1}
+
+        report = manager.run()
+        assert report['tables']['operation_history'] == {'rows': 109, 'batches': 5, 'max_age_days': 90}
+        assert report['tables']['notifications']['rows'] == 1
+        # Таблицы account_history в этой базе нет
+        assert 'account_history' not in report['tables']
+        # Первый запуск переводит базу в auto_vacuum=INCREMENTAL полным VACUUM
+        assert report['full_vacuum']
+
+        with sqlite3.connect(db.db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM operation_history").fetchone()[0] == 91
+            assert conn.execute("SELECT is_read FROM notifications").fetchall() == [(0,)]
+            assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        with sqlite3.connect(archive_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM operation_history").fetchone()[0] == 109
+
+        # Повторный запуск ничего не переносит
+        assert manager.run()['tables']['operation_history']['rows'] == 0
+
+        # Дальше свободные страницы возвращаются инкрементально
+        with sqlite3.connect(db.db_path) as conn:
+            conn.executemany(
+                "INSERT INTO operation_history (user_id, operation_type, description, created_at) "
+                "VALUES (1, 'rent', ?, datetime('now', '-120 days'))",
+                [("y" * 500,) for _ in range(100)]
+            )
+        size_before = os.path.getsize(db.db_path)
+        report = manager.run()
+        assert report['tables']['operation_history']['rows'] == 100
+        assert not report['full_vacuum'] and report['vacuumed_pages'] > 0
+        assert os.path.getsize(db.db_path) < size_before
+
+    print("✅ Архивирование истории работает")
+
+def test_retention_overrides():
+    """Сроки переопределяются строкой RETENTION_POLICIES"""
+    print("🧪 Тест настройки сроков хранения...")
+    assert parse_overrides("operation_history=30, notifications=0") == {'operation_history': 30, 'notifications': 0}
+    assert parse_overrides("") == {}
+    print("✅ Настройка сроков хранения работает")
+
+if __name__ == '__main__':
+    test_retention_archives_old_rows()
+    test_retention_overrides()
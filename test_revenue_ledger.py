@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест журнала выручки и нарастающих итогов
+"""
+
+import os
+import sqlite3
+import tempfile
+from datetime import date
+
+def test_revenue_ledger():
+    """Аренды и бонусы пишутся в журнал, итоги обновляются без пересчета"""
+    print("🧪 Тест журнала выручки...")
+    from database import Database
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, "steam_rental.db"))
+        cs = db.add_steam_account("cs_acc", "p", "CS2")
+        dota = db.add_steam_account("dota_acc", "p", "Dota 2")
+
+        assert db.create_rental(cs, "order_1", 3, price=120.0, order_id="order_1")
+        assert db.create_rental(dota, "user_2", 2)  # по цене аккаунта: 2 * 50
+        assert db.add_bonus_time("order_1", 30, "Положительный отзыв")
+
+        assert db.get_revenue_total() == {'revenue': 220.0, 'rentals': 2, 'rental_minutes': 300, 'bonus_minutes': 30}
+        assert db.get_revenue_total('CS2')['revenue'] == 120.0
+        assert db.get_revenue_total('Valorant')['revenue'] == 0.0
+        assert db.get_detailed_stats()['total_revenue'] == 220.0
+
+        today = date.today().isoformat()
+        report = db.get_revenue_report(today, today)
+        assert [(row['game_name'], row['revenue'], row['bonus_minutes']) for row in report] == \
+            [('CS2', 120.0, 30), ('Dota 2', 100.0, 0)]
+        assert db.get_revenue_report(today, today, by_game=False)[0]['revenue'] == 220.0
+        assert db.get_revenue_report('2000-01-01', '2000-12-31') == []
+
+        with sqlite3.connect(db.db_path) as conn:
+            order_id = conn.execute("SELECT order_id FROM revenue_ledger WHERE amount = 120").fetchone()[0]
+            assert order_id == "order_1"
+            # Журнал только дополняется
+            for statement in ("UPDATE revenue_ledger SET amount = 0", "DELETE FROM revenue_ledger"):
+                try:
+                    conn.execute(statement)
+                    assert False, statement
+                except sqlite3.DatabaseError as e:
+                    assert 'append-only' in str(e)
+
+    print("✅ Журнал выручки работает")
+
+def test_revenue_ledger_backfill():
+    """Аренды, созданные до появления журнала, переносятся в него один раз"""
+    print("🧪 Тест заполнения журнала выручки...")
+    from database import Database
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, "steam_rental.db"))
+        account = db.add_steam_account("acc", "p", "PUBG")
+        with sqlite3.connect(db.db_path) as conn:
+            for table in ('revenue_ledger', 'revenue_daily', 'revenue_totals'):
+                conn.execute(f"DROP TABLE {table}")
+            conn.execute("""
+                INSERT INTO rentals (account_id, renter_id, start_time, end_time, duration_hours, status)
+                VALUES (?, 'u', '2026-01-05 10:00:00', '2026-01-05 14:00:00', 4, 'completed')
+            """, (account,))
+
+        db = Database(db.db_path)
+        Database(db.db_path)
+        assert db.get_revenue_total() == {'revenue': 200.0, 'rentals': 1, 'rental_minutes': 240, 'bonus_minutes': 0}
+        assert db.get_revenue_report('2026-01-01', '2026-01-31')[0]['day'] == '2026-01-05'
+
+    print("✅ Заполнение журнала выручки работает")
+
+if __name__ == '__main__':
+    test_revenue_ledger()
+    test_revenue_ledger_backfill()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест полнотекстового поиска аккаунтов
+"""
+
+import os
+import sqlite3
+import tempfile
+from search_index import ACCOUNT_SEARCH, fts5_available, match_query
+
+def test_match_query():
+    """Слова запроса превращаются в префиксы, кавычки и операторы не ломают MATCH"""
+    print("🧪 Тест построения запроса...")
+    assert match_query('Counter STR') == '"counter"* "str"*'
+    assert match_query('steam_12 "OR" -') == '"steam_12"* "or"*'
+    assert match_query('  ') == ''
+    print("✅ Построение запроса работает")
+
+def test_account_search():
+    """Поиск по префиксам, синхронизация триггерами и запасной LIKE"""
+    print("🧪 Тест полнотекстового поиска...")
+    from database import Database
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, "steam_rental.db"))
+        dota = db.add_steam_account("steam_1", "p", "Dota 2")
+        cs = db.add_steam_account("steam_12", "p", "Counter-Strike 2")
+        db.add_steam_account("other", "p", "PUBG")
+
+        assert [a['id'] for a in db.search_accounts('dot')] == [dota]
+        assert [a['id'] for a in db.search_accounts('counter str')] == [cs]
+        assert {a['id'] for a in db.search_accounts('steam_1')} == {dota, cs}
+        assert db.search_accounts('нет такого') == []
+
+        # Индекс следует за изменениями таблицы
+        with sqlite3.connect(db.db_path) as conn:
+            conn.execute("UPDATE steam_accounts SET game_name = 'Valorant' WHERE id = ?", (dota,))
+            conn.execute("UPDATE steam_accounts SET is_rented = TRUE WHERE id = ?", (cs,))
+        assert db.search_accounts('dot') == []
+        assert [a['username'] for a in db.search_accounts('valo')] == ['steam_1']
+        # Арендованные аккаунты не показываются
+        assert db.search_accounts('counter') == []
+
+        db.delete_account(dota)
+        assert db.search_accounts('valorant') == []
+
+        # Запасной вариант без FTS5 находит те же строки
+        with sqlite3.connect(db.db_path) as conn:
+            rows = ACCOUNT_SEARCH.search(conn.cursor(), 'PUBG', use_fts=False)
+            assert [row[1] for row in rows] == ['other']
+            if fts5_available():
+                assert conn.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+                conn.execute("INSERT INTO steam_accounts_fts (steam_accounts_fts) VALUES ('integrity-check')")
+
+    print("✅ Полнотекстовый поиск работает")
+
+def test_extended_account_search():
+    """Поиск AccountManager по логину, заметкам и играм"""
+    print("🧪 Тест поиска расширенных аккаунтов...")
+    import json
+    from account_manager import AccountManager
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "steam_rental.db")
+        AccountManager(db_path)
+        with sqlite3.connect(db_path) as conn:
+            conn.executemany(
+                "INSERT INTO steam_accounts_extended (login, password, games, notes) VALUES (?, 'p', ?, ?)",
+                [('prime_acc', json.dumps(['CS2']), 'прайм статус'), ('dota_acc', json.dumps(['Dota 2']), '')]
+            )
+
+        manager = AccountManager(db_path)
+        assert [a.login for a in manager.search_accounts('прайм')] == ['prime_acc']
+        assert [a.login for a in manager.search_accounts('dota 2')] == ['dota_acc']
+        # Логин - одно слово: ищется по началу, а не по середине
+        assert [a.login for a in manager.search_accounts('prime')] == ['prime_acc']
+        assert manager.search_accounts('acc') == []
+
+    print("✅ Поиск расширенных аккаунтов работает")
+
+if __name__ == '__main__':
+    test_match_query()
+    test_account_search()
+    test_extended_account_search()
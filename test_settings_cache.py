@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест кэша настроек и токенов SettingsManager
+"""
+
+import os
+import sqlite3
+import tempfile
+
+def test_settings_cache():
+    """Кэш настроек и токенов сбрасывается при изменениях"""
+    print("🧪 Тест кэша настроек...")
+    from settings_manager import SettingsManager
+
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            db_path = os.path.join(tmp_dir, "settings.db")
+            settings = SettingsManager(db_path)
+
+            changes = []
+            settings.add_change_listener(lambda scope, name, key: changes.append((scope, name, key)))
+
+            assert settings.get_setting("system", "log_level") == "INFO"
+            generation = settings.generation
+            settings.set_setting("system", "log_level", "DEBUG")
+            assert settings.generation > generation
+            assert settings.get_setting("system", "log_level") == "DEBUG"
+            assert settings.get_category_settings("system")["log_level"] == "DEBUG"
+            assert changes[-1] == ("setting", "system", "log_level")
+
+            settings.set_token("funpay", "session", "secret")
+            for _ in range(5):
+                assert settings.get_token("funpay", "session") == "secret"
+
+            # Чтение токена не пишет в БД до сброса буфера
+            with sqlite3.connect(db_path) as conn:
+                usage = conn.execute("SELECT usage_count FROM api_tokens WHERE service_name = 'funpay'").fetchone()[0]
+            assert usage == 0
+
+            settings.flush_token_usage()
+            with sqlite3.connect(db_path) as conn:
+                usage = conn.execute("SELECT usage_count FROM api_tokens WHERE service_name = 'funpay'").fetchone()[0]
+            assert usage == 5
+
+            # Неудачная запись не теряет счетчики: они возвращаются в буфер
+            for _ in range(3):
+                settings.get_token("funpay", "session")
+            settings.db_path = os.path.join(tmp_dir, "missing", "settings.db")
+            assert settings.flush_token_usage() == 0
+            settings.get_token("funpay", "session")
+            settings.db_path = db_path
+            assert settings.flush_token_usage() == 1
+            with sqlite3.connect(db_path) as conn:
+                usage = conn.execute("SELECT usage_count FROM api_tokens WHERE service_name = 'funpay'").fetchone()[0]
+            assert usage == 9
+
+            # Обработчик выхода не удерживает менеджеры в памяти
+            import gc
+            import weakref
+            released = weakref.ref(SettingsManager(db_path))
+            gc.collect()
+            assert released() is None
+
+            settings.delete_token("funpay", "session")
+            assert settings.get_token("funpay", "session") is None
+        finally:
+            os.chdir(previous_cwd)
+
+    print("✅ Кэш настроек работает")
+
+def test_settings_bulk():
+    """Пакетная запись настроек и повторная инициализация"""
+    print("🧪 Тест пакетной записи настроек...")
+    import json
+    from settings_manager import SettingsManager
+
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            db_path = os.path.join(tmp_dir, "settings.db")
+            settings = SettingsManager(db_path)
+            settings.set_setting("system", "log_level", "DEBUG")
+
+            # Повторный запуск не перезаписывает измененные значения и ничего не пишет
+            restarted = SettingsManager(db_path)
+            assert restarted.get_setting("system", "log_level") == "DEBUG"
+            assert restarted.set_settings_bulk({"system": {"log_level": "DEBUG"}}) == 0
+
+            export_path = os.path.join(tmp_dir, "settings.json")
+            with open(export_path, "w", encoding="utf-8") as f:
+                json.dump({"system": {"log_level": "WARNING", "new_key": "1"},
+                           "telegram": {"admin_id": "42"}}, f)
+
+            assert restarted.import_settings(export_path, overwrite=False)
+            assert restarted.get_setting("system", "log_level") == "DEBUG"
+            assert restarted.get_setting("system", "new_key") == "1"
+            assert restarted.get_setting("telegram", "admin_id") == "42"
+
+            assert restarted.import_settings(export_path, overwrite=True)
+            assert restarted.get_setting("system", "log_level") == "WARNING"
+
+            with sqlite3.connect(db_path) as conn:
+                history = conn.execute(
+                    "SELECT COUNT(*) FROM settings_history WHERE category = 'system' AND key = 'log_level'"
+                ).fetchone()[0]
+            # Начальное значение, DEBUG и WARNING
+            assert history == 3
+        finally:
+            os.chdir(previous_cwd)
+
+    print("✅ Пакетная запись настроек работает")
+
+if __name__ == '__main__':
+    test_settings_cache()
+    test_settings_bulk()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Тест дневных сводок аренд
+"""
+
+import os
+import sqlite3
+import tempfile
+from statistics_rollup import StatisticsRollup
+
+def test_statistics_rollup():
+    """Завершенные аренды сворачиваются по дням инкрементально, без повторного учета"""
+    print("🧪 Тест дневных сводок...")
+    from database import Database
+    from account_manager import AccountManager
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, "steam_rental.db"))
+        dota = db.add_steam_account("dota_acc", "p", "Dota 2")
+        cs = db.add_steam_account("cs_acc", "p", "CS2")
+        manager = AccountManager(db.db_path)
+        dota_ext = manager.add_account({'login': 'dota_acc', 'password': 'p'})
+        cs_ext = manager.add_account({'login': 'cs_acc', 'password': 'p'})
+
+        with sqlite3.connect(db.db_path) as conn:
+            # Аренда, завершенная до появления сводок, учитывается при первом запуске
+            conn.execute("""
+                INSERT INTO rentals (account_id, renter_id, start_time, end_time, duration_hours, status)
+                VALUES (?, 'u1', datetime('now', '-40 days'), datetime('now', '-40 days', '+2 hours'), 2, 'completed')
+            """, (dota,))
+
+        rollup = StatisticsRollup(db.db_path, batch_size=2)
+        with sqlite3.connect(db.db_path) as conn:
+            conn.executemany("""
+                INSERT INTO rentals (account_id, renter_id, start_time, end_time, duration_hours, status)
+                VALUES (?, 'u2', datetime('now', '-1 days'), datetime('now', '-1 days', '+1 hours'), ?, 'active')
+            """, [(dota, 1), (cs, 3), (cs, 2)])
+            conn.execute("UPDATE rentals SET status = 'completed' WHERE status = 'active'")
+            # Повторная смена статуса не дублирует завершение
+            conn.execute("UPDATE rentals SET status = 'completed' WHERE account_id = ?", (cs,))
+
+        result = rollup.run()
+        assert result['rentals'] == 4 and result['batches'] == 2
+        assert rollup.run()['rentals'] == 0
+
+        # Доход = часы * цена аккаунта (50 по умолчанию)
+        recent = {row['game_name']: row for row in rollup.game_totals(days=30)}
+        assert recent['CS2']['earnings'] == 250.0 and recent['CS2']['rental_count'] == 2
+        assert recent['Dota 2']['earnings'] == 50.0
+        assert {row['game_name']: row['earnings'] for row in rollup.game_totals(days=None)}['Dota 2'] == 150.0
+
+        top = manager.get_top_earning_accounts(limit=5)
+        assert [a.id for a in top] == [cs_ext, dota_ext]
+        assert [a.id for a in manager.get_top_earning_accounts(limit=1, days=30)] == [cs_ext]
+
+        stats = manager.get_account_statistics()
+        assert stats['total_accounts'] == 2 and stats['total_earnings'] == 400.0 and stats['total_rentals'] == 4
+        assert manager.get_account_statistics(dota_ext)['total_rental_time'] == 180
+
+    print("✅ Дневные сводки работают")
+
+if __name__ == '__main__':
+    test_statistics_rollup()